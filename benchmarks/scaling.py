@@ -0,0 +1,223 @@
+"""
+Scaling benchmark of hierarchy building, traversal and printing on synthetic documents.
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --sizes 1000 10000 --depth 8 --header-ratio 0.2 --output scaling.json
+
+Synthetic annotated paragraphs (no PDF involved) are fed into HierarchyParser.create_hierarchy, the resulting
+document is traversed, its full content is collected and it is printed by each printer. Each stage is measured for
+growing amounts of paragraphs, the run fails (exit code 1) if the time or memory of a stage grows super-linear,
+i.e. the slope of log(value) over log(size) exceeds the max exponent.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+
+from benchmarks.stages import StageTimer, PRINTERS
+from pdfstructure.analysis.styledistribution import StyleDistribution
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order, traverse_level_order
+from pdfstructure.model.document import StructuredPdfDocument, TextElement, TextFeatures
+from pdfstructure.model.style import Style, TextSize
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+BODY_SIZE = 10.0
+# top-level headers are bigger than nested ones, nested headers are nested by their enumeration, e.g. 1.2. > 1.2.1.
+TOP_LEVEL_STYLE = Style(bold=False, italic=False, font_name="Synthetic-Regular", mapped_font_size=TextSize.xlarge,
+                        mean_size=20.0, max_size=20.0)
+HEADER_STYLE = Style(bold=False, italic=False, font_name="Synthetic-Regular", mapped_font_size=TextSize.large,
+                     mean_size=14.0, max_size=14.0)
+BODY_STYLE = Style(bold=False, italic=False, font_name="Synthetic-Regular", mapped_font_size=TextSize.middle,
+                   mean_size=BODY_SIZE, max_size=BODY_SIZE)
+
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do", "eiusmod",
+         "tempor", "incididunt", "ut", "labore", "et", "dolore", "magna", "aliqua")
+
+
+def synthetic_distribution():
+    """
+    style distribution matching the synthetic paragraphs, see synthetic_elements.
+    """
+    return StyleDistribution(Counter({BODY_SIZE: 100, HEADER_STYLE.max_size: 10, TOP_LEVEL_STYLE.max_size: 1}))
+
+
+def synthetic_elements(count, depth=4, header_ratio=0.1, words=12, per_page=40, seed=0, levels=None):
+    """
+    yields a stream of annotated paragraphs, like StyleAnnotator.process does for a real document.
+    the stream starts with a top-level header, each further paragraph is a header with probability header_ratio.
+    a header opens a section at most one level below the current one and at most depth - 1.
+    @param count: amount of paragraphs
+    @param depth: max nesting of headers
+    @param header_ratio: share of headers among all paragraphs
+    @param words: words per content paragraph
+    @param per_page: paragraphs per page
+    @param seed: random seed, the same arguments generate the same stream
+    @param levels: list, the level each paragraph is expected to get within the hierarchy is appended to it
+    """
+    rng = random.Random(seed)
+    # enumeration of currently open headers
+    numbers = []
+    for index in range(count):
+        if index == 0 or rng.random() < header_ratio:
+            level = rng.randint(0, min(len(numbers), depth - 1))
+            if level < len(numbers):
+                numbers = numbers[:level + 1]
+                numbers[-1] += 1
+            else:
+                numbers.append(1)
+            text = "{}. Header {}".format(".".join(map(str, numbers)), " ".join(rng.choices(WORDS, k=3)))
+            style = HEADER_STYLE if level else TOP_LEVEL_STYLE
+        else:
+            level = len(numbers)
+            text = " ".join(rng.choices(WORDS, k=words))
+            style = BODY_STYLE
+        if levels is not None:
+            levels.append(level)
+        yield TextElement(text_container=None, style=style, text=text, page=index // per_page,
+                          features=TextFeatures.from_text(text))
+
+
+def run_stages(elements, timer: StageTimer, output_dir):
+    """
+    builds, traverses and prints a document of given paragraphs.
+    @return: number of sections
+    """
+    distribution = synthetic_distribution()
+    with timer.stage("create_hierarchy"):
+        sections = HierarchyParser().create_hierarchy(elements, distribution)
+    document = StructuredPdfDocument(elements=sections, style_info=distribution)
+
+    with timer.stage("traverse_in_order"):
+        count = sum(1 for _ in traverse_in_order(document))
+    with timer.stage("traverse_level_order"):
+        for _ in traverse_level_order(document):
+            pass
+    with timer.stage("full_content"):
+        for section in document.elements:
+            section.full_content
+
+    for name, (printer_type, to_file) in PRINTERS.items():
+        kwargs = {"file_path": os.path.join(output_dir, name)} if to_file else {}
+        with timer.stage("print:{}".format(name)), contextlib.redirect_stdout(io.StringIO()):
+            printer_type().print(document, **kwargs)
+    return count
+
+
+def benchmark_size(count, repeat=1, trace_memory=True, **kwargs):
+    """
+    @param count: amount of paragraphs
+    @param kwargs: passed to synthetic_elements
+    @return: dict stage -> {"time": seconds, "peak_memory": bytes or None}
+    """
+    elements = list(synthetic_elements(count, **kwargs))
+    times = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            timer = StageTimer()
+            run_stages(elements, timer, output_dir)
+            for name, duration in timer.times.items():
+                times[name] = min(times.get(name, duration), duration)
+
+        peak_memory = {}
+        if trace_memory:
+            timer = StageTimer(trace_memory=True)
+            run_stages(elements, timer, output_dir)
+            peak_memory = timer.peak_memory
+
+    return {name: {"time": times[name], "peak_memory": peak_memory.get(name)} for name in times}
+
+
+def run(sizes=SIZES, repeat=1, trace_memory=True, **kwargs):
+    """
+    @return: json serializable results, measurements per stage & size
+    """
+    results = {str(count): benchmark_size(count, repeat, trace_memory, **kwargs) for count in sizes}
+    return {"meta": dict(kwargs, sizes=list(sizes), repeat=repeat), "sizes": results}
+
+
+def growth_exponent(sizes, values):
+    """
+    least squares slope of log(value) over log(size), 1 for linear growth, 2 for quadratic growth.
+    @return: None if there are less than two positive values
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if value and value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def super_linear(results: dict, max_exponent=1.2, min_time=0.005, min_memory=64 * 1024):
+    """
+    find stages whose time or memory grows faster than linear.
+    measurements below min_time / min_memory are dominated by noise and constant overhead, thus ignored.
+    @return: list of (stage, metric, growth exponent)
+    """
+    sizes = sorted(results["sizes"], key=int)
+    stages = results["sizes"][sizes[0]] if sizes else {}
+    flagged = []
+    for stage in stages:
+        for metric, floor in (("time", min_time), ("peak_memory", min_memory)):
+            measured = [(int(size), results["sizes"][size][stage][metric]) for size in sizes]
+            measured = [(size, value) for size, value in measured if value is not None and value >= floor]
+            exponent = growth_exponent([size for size, _ in measured], [value for _, value in measured])
+            if exponent is not None and exponent > max_exponent:
+                flagged.append((stage, metric, exponent))
+    return flagged
+
+
+def format_results(results: dict) -> str:
+    sizes = sorted(results["sizes"], key=int)
+    stages = list(results["sizes"][sizes[0]]) if sizes else []
+    lines = ["{:<32}".format("stage [ms / KiB]") + "".join("{:>22}".format(size) for size in sizes)
+             + "{:>10}".format("exponent")]
+    for stage in stages:
+        measured = [results["sizes"][size][stage] for size in sizes]
+        exponent = growth_exponent([int(size) for size in sizes], [m["time"] for m in measured])
+        cells = ["{:>10.1f} / {:>9}".format(m["time"] * 1000, "-" if m["peak_memory"] is None
+                                            else "{:.0f}".format(m["peak_memory"] / 1024)) for m in measured]
+        lines.append("{:<32}".format(stage) + "".join("{:>22}".format(cell) for cell in cells)
+                     + "{:>10}".format("-" if exponent is None else "{:.2f}".format(exponent)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arguments.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="amounts of paragraphs")
+    arguments.add_argument("--depth", type=int, default=4, help="max nesting of headers")
+    arguments.add_argument("--header-ratio", type=float, default=0.1, help="share of headers among all paragraphs")
+    arguments.add_argument("--seed", type=int, default=0)
+    arguments.add_argument("--repeat", type=int, default=1, help="timing runs per size, fastest one counts")
+    arguments.add_argument("--no-memory", action="store_true", help="skip the (slow) memory traced run")
+    arguments.add_argument("--max-exponent", type=float, default=1.2,
+                           help="growth exponent of time or memory counted as super-linear")
+    arguments.add_argument("--output", help="write results as json")
+    args = arguments.parse_args(argv)
+
+    results = run(sorted(args.sizes), repeat=args.repeat, trace_memory=not args.no_memory, depth=args.depth,
+                  header_ratio=args.header_ratio, seed=args.seed)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=4)
+
+    flagged = super_linear(results, max_exponent=args.max_exponent)
+    for stage, metric, exponent in flagged:
+        print("super-linear: {} {} grows with exponent {:.2f}".format(stage, metric, exponent))
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Per-stage benchmark of the parse pipeline over the test PDFs.
+
+    python -m benchmarks.stages --output before.json
+    python -m benchmarks.stages --output after.json --baseline before.json --threshold 0.25
+
+Each document runs through the stages of HierarchyParser.parse_pdf one by one, followed by traversals and printers.
+Wall time is the fastest of #repeat runs without memory tracing, peak memory is measured in a separate traced run
+and covers the allocations of a stage only. The run fails (exit code 1) if a stage got slower or allocates more
+than threshold compared to the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pdfminer.layout import LAParams
+
+from pdfstructure.analysis.annotate import StyleAnnotator
+from pdfstructure.analysis.sizemapper import PivotLogMapper
+from pdfstructure.analysis.styledistribution import count_sizes
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order, traverse_level_order
+from pdfstructure.model.document import StructuredPdfDocument
+from pdfstructure.printer import PrettyStringPrinter, PrettyStringFilePrinter, JsonStringPrinter, JsonFilePrinter, \
+    JsonLinesPrinter
+from pdfstructure.source import FileSource
+
+RESOURCES = Path(__file__).absolute().parent.parent / "tests" / "resources"
+
+# printer name -> (printer type, writes to file)
+PRINTERS = {
+    "PrettyStringPrinter": (PrettyStringPrinter, False),
+    "PrettyStringFilePrinter": (PrettyStringFilePrinter, True),
+    "JsonStringPrinter": (JsonStringPrinter, False),
+    "JsonFilePrinter": (JsonFilePrinter, True),
+    "JsonLinesPrinter": (JsonLinesPrinter, True),
+}
+
+
+class StageTimer:
+    """
+    records wall time and optionally peak memory of named stages.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.times = {}
+        self.peak_memory = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # stages that run more than once (e.g. two reads) are summed up
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.peak_memory[name] = max(self.peak_memory.get(name, 0), peak)
+
+
+def run_stages(file_path, timer: StageTimer, output_dir):
+    """
+    parses one document stage by stage, like HierarchyParser.parse_pdf does.
+    """
+    source = FileSource(str(file_path))
+    parser = HierarchyParser()
+
+    with timer.stage("extraction"):
+        elements = list(source.read())
+    with timer.stage("count_sizes"):
+        distribution = count_sizes(elements)
+    del elements
+
+    with timer.stage("extraction"):
+        elements = list(source.read(override_la_params=LAParams(line_margin=distribution.line_margin)))
+    with timer.stage("annotate"):
+        annotator = StyleAnnotator(sizemapper=PivotLogMapper(distribution), style_info=distribution)
+        annotated = list(annotator.process(elements))
+    with timer.stage("create_hierarchy"):
+        sections = parser.create_hierarchy(annotated, distribution)
+    document = StructuredPdfDocument(elements=sections, style_info=distribution)
+
+    with timer.stage("traversal"):
+        for _ in traverse_in_order(document):
+            pass
+        for _ in traverse_level_order(document):
+            pass
+
+    for name, (printer_type, to_file) in PRINTERS.items():
+        kwargs = {"file_path": os.path.join(output_dir, name)} if to_file else {}
+        with timer.stage("print:{}".format(name)), contextlib.redirect_stdout(io.StringIO()):
+            printer_type().print(document, **kwargs)
+
+
+def benchmark_document(file_path, repeat=3):
+    """
+    @return: dict stage -> {"time": seconds, "peak_memory": bytes}
+    """
+    times = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            timer = StageTimer()
+            run_stages(file_path, timer, output_dir)
+            for name, duration in timer.times.items():
+                times[name] = min(times.get(name, duration), duration)
+
+        timer = StageTimer(trace_memory=True)
+        run_stages(file_path, timer, output_dir)
+
+    return {name: {"time": times[name], "peak_memory": timer.peak_memory[name]} for name in times}
+
+
+def run(paths, repeat=3):
+    """
+    benchmark all given documents.
+    @return: json serializable results, including some information about the environment
+    """
+    return {"meta": {"commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                     "repeat": repeat},
+            "documents": {Path(path).name: benchmark_document(path, repeat) for path in paths}}
+
+
+def compare(baseline: dict, current: dict, threshold=0.25, min_time=0.005, min_memory=64 * 1024):
+    """
+    find stages that got slower or allocate more memory than the relative threshold.
+    tiny values are ignored as they are dominated by noise.
+    @return: list of (document, stage, metric, baseline value, current value)
+    """
+    regressions = []
+    for document, stages in current["documents"].items():
+        for stage, measured in stages.items():
+            before = baseline["documents"].get(document, {}).get(stage)
+            if not before:
+                continue
+            for metric, floor in (("time", min_time), ("peak_memory", min_memory)):
+                if measured[metric] > floor and measured[metric] > before[metric] * (1 + threshold):
+                    regressions.append((document, stage, metric, before[metric], measured[metric]))
+    return regressions
+
+
+def format_results(results: dict, baseline: dict = None) -> str:
+    lines = ["{:<40} {:<32} {:>10} {:>12} {:>8}".format("document", "stage", "time [ms]", "peak [KiB]", "change")]
+    for document, stages in results["documents"].items():
+        for stage, measured in stages.items():
+            change = ""
+            before = baseline["documents"].get(document, {}).get(stage) if baseline else None
+            if before and before["time"]:
+                change = "{:+.0%}".format(measured["time"] / before["time"] - 1)
+            lines.append("{:<40} {:<32} {:>10.1f} {:>12.1f} {:>8}".format(
+                document, stage, measured["time"] * 1000, measured["peak_memory"] / 1024, change))
+    return "\n".join(lines)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=str(RESOURCES), capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arguments.add_argument("pdfs", nargs="*", help="documents to benchmark, defaults to all test resources")
+    arguments.add_argument("--repeat", type=int, default=3, help="timing runs per document, fastest one counts")
+    arguments.add_argument("--output", help="write results as json")
+    arguments.add_argument("--baseline", help="results of a prior run to compare with")
+    arguments.add_argument("--threshold", type=float, default=0.25, help="relative change counted as regression")
+    args = arguments.parse_args(argv)
+
+    paths = args.pdfs or sorted(str(path) for path in RESOURCES.glob("*.pdf"))
+    results = run(paths, repeat=args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+
+    print(format_results(results, baseline))
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=4)
+
+    if baseline:
+        regressions = compare(baseline, results, threshold=args.threshold)
+        for document, stage, metric, before, after in regressions:
+            print("regression: {} {} {}: {:.4g} -> {:.4g}".format(document, stage, metric, before, after))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,12 @@
-import statistics
-from collections import Counter
+import math
+from typing import List
 
-from pdfminer.layout import LTTextBoxHorizontal, LTChar
+from pdfminer.layout import LTTextBoxHorizontal
 
+from pdfstructure.analysis.chartable import CharTable, page_batches
 from pdfstructure.analysis.sizemapper import SizeMapper
 from pdfstructure.analysis.styledistribution import StyleDistribution
-from pdfstructure.model.document import TextElement
+from pdfstructure.model.document import TextElement, TextFeatures
 from pdfstructure.model.style import Style, TextSize
 from pdfstructure.utils import truncate
 
@@ -22,44 +23,52 @@ class StyleAnnotator:
         self._sizeMapper = sizemapper
         self._styleInfo = style_info
 
-    @staticmethod
-    def __investigate_box_style(element):
-        fonts = Counter()
-        sizes = []
-        for line in element:
-            for c in line:
-                if isinstance(c, LTChar):
-                    fonts.update([c.fontname])
-                    sizes.append(c.size)
-        return fonts, sizes
-
     def process(self, element_gen):  # element: LTTextContainer):
         """"
-        annotate each element with fontsize
+        annotate each element with fontsize, all elements of a page are annotated at once.
         """
-        for element in element_gen:
-            if isinstance(element, LTTextBoxHorizontal):
+        for elements in page_batches(element_gen):
+            yield from self.annotate_many(elements)
 
-                fonts, sizes = self.__investigate_box_style(element)
-                if not fonts or not element.get_text().rstrip():
-                    continue
+    def annotate_many(self, elements) -> List[TextElement]:
+        """
+        annotate given elements in bulk, sizes are mapped with a single SizeMapper.translate_many call.
+        @param elements: pdf-paragraphs, e.g. of one page
+        @return: annotated elements, in order
+        """
+        boxes = [element for element in elements if isinstance(element, LTTextBoxHorizontal)]
+        if not boxes:
+            return []
+        # font name, mean size truncated to 1 decimal & max size of all boxes at once
+        table, line_ranges = CharTable.of_boxes(boxes)
+        mean_sizes, max_sizes, fonts = table.box_styles(line_ranges)
+        annotated = []
+        for element, mean_size, max_size, font in zip(boxes, mean_sizes.tolist(), max_sizes.tolist(), fonts.tolist()):
+            if math.isnan(max_size):
+                # no characters
+                continue
+            features = TextFeatures.from_container(element)
+            if not features.text:
+                continue
+            annotated.append((element, features, (table.fonts[font], truncate(mean_size, 1), max_size)))
 
-                font_name = fonts.most_common(1)[0][0]
-                mean_size = truncate(statistics.mean(sizes), 1)
-                max_size = max(sizes)
-                # todo currently empty boxes are forwarded.. with holding only \n
-                mapped_size = self._sizeMapper.translate(target_enum=TextSize,
-                                                         value=max_size)
-                s = Style(bold="bold" in str(font_name.lower()),
-                          italic="italic" in font_name.lower(),
-                          font_name=font_name,
-                          mapped_font_size=mapped_size,
-                          mean_size=mean_size, max_size=max_size)
+        # todo currently empty boxes are forwarded.. with holding only \n
+        mapped_sizes = self._sizeMapper.translate_many(target_enum=TextSize,
+                                                       values=[max_size for _, _, (_, _, max_size) in annotated])
+        result = []
+        for (element, features, (font_name, mean_size, max_size)), mapped_size in zip(annotated, mapped_sizes):
+            s = Style(bold="bold" in str(font_name.lower()),
+                      italic="italic" in font_name.lower(),
+                      font_name=font_name,
+                      mapped_font_size=mapped_size,
+                      mean_size=mean_size, max_size=max_size)
 
-                # todo, split lines within LTTextBoxHorizontal
-                #  split using style as differentiator
-                #  e.g 1st is title with bold text
-                #      2nd & 3rd line are introduction lines with body style
-                #      -> forward 2 boxes (header, content)
-                yield TextElement(text_container=element, style=s,
-                                  page=element.page if hasattr(element, "page") else None)
+            # todo, split lines within LTTextBoxHorizontal
+            #  split using style as differentiator
+            #  e.g 1st is title with bold text
+            #      2nd & 3rd line are introduction lines with body style
+            #      -> forward 2 boxes (header, content)
+            result.append(TextElement(text_container=element, style=s,
+                                      page=element.page if hasattr(element, "page") else None,
+                                      features=features))
+        return result
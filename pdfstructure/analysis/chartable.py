@@ -0,0 +1,233 @@
+import numpy as np
+from pdfminer.layout import LTChar, LTTextContainer
+
+COLUMNS = ("x0", "y0", "x1", "y1", "size", "font", "line", "box", "position")
+# amount of elements analysed at once if their page is unknown, see page_batches
+BATCH_SIZE = 256
+
+
+class CharTable:
+    """
+    Columnar representation of the characters (LTChar) within text containers, typically all containers of a page.
+    One row per character:
+        x0, y0, x1, y1: bounding box
+        size: font size
+        font: index into fonts
+        line: index of the text line within the table
+        box: index of the text container within the table
+        position: index of the character within its line, layout annotations (e.g. whitespace) included
+    Style analysis, box splitting and annotation are computed with vectorized operations on these columns.
+    """
+
+    def __init__(self, data: np.ndarray, fonts: list, line_count: int, box_lines: list, parent=None,
+                 line_range=None):
+        """
+
+        @param data: array of shape (characters, len(COLUMNS)), rows ordered by line
+        @param fonts: font names in order of first occurrence
+        @param line_count: amount of lines, including lines without characters
+        @param box_lines: index of the first line of each box
+        @param parent: table this one is a view on, see lines()
+        @param line_range: lines (start, end) of the parent covered by this view
+        """
+        self.data = data
+        self.fonts = fonts
+        self.line_count = line_count
+        self.box_lines = box_lines
+        self.parent = parent
+        self.line_range = line_range if line_range else (0, line_count)
+        self._line_rows = None
+        self._line_max_sizes = {}
+
+    @classmethod
+    def from_containers(cls, containers) -> "CharTable":
+        # a flat list of values is converted way faster than a list of row tuples
+        values = []
+        extend = values.extend
+        font_ids = {}
+        box_lines = []
+        line_id = 0
+        for box_id, container in enumerate(containers):
+            box_lines.append(line_id)
+            for line in container:
+                for position, c in enumerate(line):
+                    if isinstance(c, LTChar):
+                        font = font_ids.get(c.fontname)
+                        if font is None:
+                            font = font_ids[c.fontname] = len(font_ids)
+                        extend(c.bbox)
+                        extend((c.size, font, line_id, box_id, position))
+                line_id += 1
+        data = np.array(values, dtype=np.float64).reshape(-1, len(COLUMNS))
+        return cls(data, list(font_ids), line_count=line_id, box_lines=box_lines)
+
+    @classmethod
+    def of_boxes(cls, containers) -> tuple:
+        """
+        characters of given containers, e.g. all paragraphs of a page.
+        the page table created while reading is reused if all containers hold a view on it as char_table
+        (see FileSource.split_boxes_by_style), otherwise a table is created from the containers.
+        @return: CharTable, lines (start, end) of each container within the table
+        """
+        views = [getattr(container, "char_table", None) for container in containers]
+        if views and all(view is not None and view.parent is not None and view.parent is views[0].parent
+                         for view in views):
+            return views[0].parent, [view.line_range for view in views]
+        table = cls.from_containers(containers)
+        return table, list(zip(table.box_lines, table.box_lines[1:] + [table.line_count]))
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def x0(self):
+        return self.data[:, 0]
+
+    @property
+    def y0(self):
+        return self.data[:, 1]
+
+    @property
+    def x1(self):
+        return self.data[:, 2]
+
+    @property
+    def y1(self):
+        return self.data[:, 3]
+
+    @property
+    def size(self):
+        return self.data[:, 4]
+
+    @property
+    def font(self):
+        return self.data[:, 5].astype(np.intp)
+
+    @property
+    def line(self):
+        return self.data[:, 6].astype(np.intp)
+
+    @property
+    def box(self):
+        return self.data[:, 7].astype(np.intp)
+
+    @property
+    def position(self):
+        return self.data[:, 8].astype(np.intp)
+
+    @property
+    def box_count(self):
+        return len(self.box_lines)
+
+    def lines(self, start, end) -> "CharTable":
+        """
+        view on the characters of lines [start, end), line & box indices still refer to this table.
+        """
+        if self._line_rows is None:
+            self._line_rows = np.searchsorted(self.data[:, 6], np.arange(self.line_count + 1)).tolist()
+        return CharTable(self.data[self._line_rows[start]:self._line_rows[end]], self.fonts,
+                         line_count=self.line_count, box_lines=self.box_lines, parent=self, line_range=(start, end))
+
+    def line_max_sizes(self, first_chars=None, first_positions=None):
+        """
+        max font size per line, considering leading characters only.
+        @param first_chars: consider the first n characters of each line
+        @param first_positions: consider characters within the first n objects of each line
+        @return: max size (nan for lines without characters), how often the max size occurred
+        """
+        key = (first_chars, first_positions)
+        if key not in self._line_max_sizes:
+            self._line_max_sizes[key] = self.__line_max_sizes(first_chars, first_positions)
+        return self._line_max_sizes[key]
+
+    def __line_max_sizes(self, first_chars, first_positions):
+        lines = self.line
+        sizes = self.size
+        mask = np.ones(len(self), dtype=bool)
+        if first_chars is not None:
+            line_start = np.searchsorted(lines, np.arange(self.line_count))
+            mask &= (np.arange(len(self)) - line_start[lines]) < first_chars
+        if first_positions is not None:
+            mask &= self.position < first_positions
+        lines, sizes = lines[mask], sizes[mask]
+
+        max_sizes = np.full(self.line_count, -np.inf)
+        np.maximum.at(max_sizes, lines, sizes)
+        counts = np.bincount(lines, weights=sizes == max_sizes[lines], minlength=self.line_count).astype(np.intp)
+        max_sizes[counts == 0] = np.nan
+        return max_sizes, counts
+
+    def box_styles(self, line_ranges=None):
+        """
+        style of each box.
+        @param line_ranges: lines (start, end) of each box, e.g. of views on this table (see lines() & of_boxes).
+            defaults to the containers the table was created from
+        @return: mean size, max size and most common font (index into fonts) per box, nan sizes for empty boxes.
+            ties between fonts are resolved by first occurrence, like Counter.most_common.
+            sizes are averaged as difference to the max size, thus boxes of a single size have exactly that mean
+        """
+        if line_ranges is None:
+            line_ranges = zip(self.box_lines, self.box_lines[1:] + [self.line_count])
+        line_ranges = list(line_ranges)
+        box_count = len(line_ranges)
+        line_boxes = np.full(self.line_count, -1, dtype=np.intp)
+        for box, (start, end) in enumerate(line_ranges):
+            line_boxes[start:end] = box
+        boxes = line_boxes[self.line]
+        covered = boxes >= 0
+        boxes, sizes, fonts = boxes[covered], self.size[covered], self.font[covered]
+
+        amount = np.bincount(boxes, minlength=box_count)
+        max_sizes = np.full(box_count, -np.inf)
+        np.maximum.at(max_sizes, boxes, sizes)
+        with np.errstate(invalid="ignore"):
+            mean_sizes = max_sizes + np.bincount(boxes, weights=sizes - max_sizes[boxes], minlength=box_count) / amount
+        empty = amount == 0
+        max_sizes[empty] = np.nan
+        mean_sizes[empty] = np.nan
+
+        font_count = max(len(self.fonts), 1)
+        pairs = boxes * font_count + fonts
+        font_counts = np.bincount(pairs, minlength=box_count * font_count)
+        first_seen = np.full(box_count * font_count, len(boxes))
+        np.minimum.at(first_seen, pairs, np.arange(len(boxes)))
+        # prefer most frequent font, then the earliest one
+        rank = font_counts * (len(boxes) + 1) + (len(boxes) - first_seen)
+        dominant_fonts = rank.reshape(box_count, font_count).argmax(axis=1)
+        return mean_sizes, max_sizes, dominant_fonts
+
+
+def page_batches(elements, batch_size=BATCH_SIZE):
+    """
+    splits elements into lists of consecutive elements of the same page, e.g. to analyse all characters of a page
+    at once. elements split by FileSource.split_boxes_by_style are grouped by the CharTable of their page,
+    others by their page attribute (or meta["page"], see utils.element_generator).
+    elements of unknown page are grouped into batches of batch_size, memory stays bounded for any source.
+    @param elements: iterable of elements, consumed lazily
+    @param batch_size: max amount of elements of unknown page per batch
+    """
+    batch = []
+    # CharTable of the page or page number of the current batch, None if unknown.
+    # the table is compared by identity, the reference keeps it alive until the batch is complete
+    current = None
+    for element in elements:
+        table = getattr(element, "char_table", None)
+        if table is not None and table.parent is not None:
+            key = table.parent
+        else:
+            key = getattr(element, "page", None)
+            if key is None:
+                key = (getattr(element, "meta", None) or {}).get("page")
+        if isinstance(key, CharTable):
+            complete = key is not current
+        elif key is None:
+            complete = current is not None or len(batch) >= batch_size
+        else:
+            complete = isinstance(current, CharTable) or key != current
+        if batch and complete:
+            yield batch
+            batch = []
+        current = key
+        batch.append(element)
+    if batch:
+        yield batch
@@ -2,6 +2,8 @@ import math
 from enum import Enum
 from typing import Type
 
+import numpy as np
+
 from pdfstructure.analysis.styledistribution import StyleDistribution
 from pdfstructure.model.style import TextSize
 
@@ -18,6 +20,25 @@ class SizeMapper:
     def translate(self, target_enum: Type[TextSize], value) -> Enum:
         return TextSize.from_range(self.borders, value)
 
+    def translate_many(self, target_enum: Type[TextSize], values) -> list:
+        """
+        maps many values at once with a binary search over the borders, same results as translate() per value.
+        subclasses overriding translate() or without borders are mapped by translate() per value.
+        @param target_enum:
+        @param values: sequence or array of sizes
+        @return: list of TextSize
+        """
+        if type(self).translate is not SizeMapper.translate or self.borders is None:
+            return [self.translate(target_enum, value) for value in values]
+        values = np.asarray(values, dtype=np.float64)
+        borders = np.asarray(self.borders, dtype=np.float64)
+        if len(borders) != len(TextSize) - 1 or np.any(np.diff(borders) < 0) or np.isnan(values).any():
+            # unsorted borders or nan values, stick to the range checks of TextSize.from_range
+            return [self.translate(target_enum, value) for value in values.tolist()]
+        # amount of borders <= value, i.e. index of the matching range
+        members = tuple(TextSize)
+        return [members[index] for index in np.searchsorted(borders, values, side="right").tolist()]
+
 
 class PivotLogMapper(SizeMapper):
     def __init__(self, style_info: StyleDistribution, bins=5):
@@ -94,14 +115,15 @@ class LinearSizeMapper(SizeMapper):
     def __init__(self, style_info: StyleDistribution):
         super().__init__()
         self.style_info = style_info
+        # Figure out how 'wide' the found sizes range is
+        self._left_span = float(style_info.max_found_size - style_info.min_found_size)
 
     def translate(self, target_enum, value) -> Enum:
         # Figure out how 'wide' each range is
-        leftSpan = self.style_info.max_found_size - self.style_info.min_found_size
         rightSpan = target_enum.xlarge.value - target_enum.xsmall.value
 
         # Convert the left range into a 0-1 range (float)
-        scaled = float(value - self.style_info.min_found_size) / float(leftSpan)
+        scaled = float(value - self.style_info.min_found_size) / self._left_span
         if scaled > 1.0:
             return target_enum.xlarge
         elif scaled < 0:
@@ -110,3 +132,17 @@ class LinearSizeMapper(SizeMapper):
         else:
             # Convert the 0-1 range into a value in the right range.
             return TextSize(int(target_enum.xsmall.value + (scaled * rightSpan)))
+
+    def translate_many(self, target_enum, values) -> list:
+        if type(self).translate is not LinearSizeMapper.translate:
+            return [self.translate(target_enum, value) for value in values]
+        values = np.asarray(values, dtype=np.float64)
+        if not self._left_span or np.isnan(values).any():
+            # raise the same errors as translate()
+            return [self.translate(target_enum, value) for value in values.tolist()]
+        rightSpan = target_enum.xlarge.value - target_enum.xsmall.value
+        scaled = (values - self.style_info.min_found_size) / self._left_span
+        scaled_sizes = np.trunc(target_enum.xsmall.value + scaled * rightSpan)
+        sizes = np.where(scaled > 1.0, target_enum.xlarge.value,
+                         np.where(scaled < 0, target_enum.xsmall.value, scaled_sizes)).astype(int)
+        return [TextSize(size) for size in sizes.tolist()]
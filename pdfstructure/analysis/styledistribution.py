@@ -4,6 +4,7 @@ from collections import Counter, defaultdict
 from pdfminer.layout import LTTextContainer, LTTextLine, LTChar
 from sortedcontainers import SortedDict
 
+from pdfstructure.analysis.chartable import CharTable, page_batches
 from pdfstructure.utils import truncate, closest_key
 
 
@@ -11,6 +12,8 @@ class StyleDistribution:
     """
     Represents style information for one analysed element stream (typically one stream per document).
     """
+    # sampling stats if only a page sample was analysed, see count_sizes_sampled
+    sampling = None
 
     def __init__(self, data=None, line_margin=0.5):
         """
@@ -103,10 +106,17 @@ class SizeAnalyser:
     def consume(self, node: LTTextContainer):
         sizes = list(itertools.islice(
             [c.size for c in node if isinstance(c, LTChar)], 10))
-        # get max size, check that it occurred at least twice
         maxSize = max(sizes)
-        if sizes.count(maxSize) > 2:
-            self.sizeDistribution.update([truncate(maxSize, 2)])
+        self.consume_line_size(maxSize, sizes.count(maxSize))
+
+    def consume_line_size(self, max_size, count):
+        """
+        @param max_size: max size within the first 10 characters of a line
+        @param count: how often max_size occurred within these characters
+        """
+        # check that max size occurred more than twice
+        if count > 2:
+            self.sizeDistribution.update([truncate(float(max_size), 2)])
 
     def process_result(self):
         pass
@@ -132,6 +142,10 @@ class LineMarginAnalyer:
 
         self._previousNode = node
 
+    @property
+    def has_result(self):
+        return bool(self._distanceCounter)
+
     def process_result(self):
         """
         Find relative line margin threshold that will be used in pdfminers paragraphs algorithm.
@@ -155,17 +169,113 @@ def count_sizes(element_gen) -> StyleDistribution:
     sizeAnalyser = SizeAnalyser()
     lineMarginAnalyser = LineMarginAnalyer()
 
-    for element in element_gen:
-        if isinstance(element, LTTextContainer):
+    consume_elements(element_gen, sizeAnalyser, lineMarginAnalyser)
+
+    if not sizeAnalyser.sizeDistribution:
+        raise TypeError("document does not contain text")
+
+    return StyleDistribution(sizeAnalyser.sizeDistribution, line_margin=lineMarginAnalyser.process_result())
+
+
+def consume_elements(element_gen, size_analyser: SizeAnalyser, line_margin_analyser: LineMarginAnalyer):
+    """
+    forward each non-empty text line of given elements to the analysers.
+    line sizes are computed at once for all elements of a page, see CharTable.
+    """
+    for elements in page_batches(element_gen):
+        containers = [element for element in elements if isinstance(element, LTTextContainer)]
+        if not containers:
+            continue
+        table, line_ranges = CharTable.of_boxes(containers)
+        max_sizes, counts = table.line_max_sizes(first_chars=10)
+        for element, (line, _) in zip(containers, line_ranges):
             for node in element:
-                if not isinstance(node, LTTextLine) or node.is_empty() \
-                        or len(node._objs) == 0:
-                    continue
+                if isinstance(node, LTTextLine) and not node.is_empty() and len(node._objs) > 0:
+                    size_analyser.consume_line_size(max_sizes[line], counts[line])
+                    line_margin_analyser.consume(node)
+                line += 1
+
+
+def stratified_page_order(page_numbers):
+    """
+    orders pages so that each prefix is spread evenly across the document (van der Corput sequence),
+    e.g. 8 pages: [0, 4, 2, 6, 1, 5, 3, 7]
+    @param page_numbers: pages to order
+    @return: list of all given pages
+    """
+    page_numbers = list(page_numbers)
+    ordered = []
+    seen = set()
+    n = 0
+    while len(ordered) < len(page_numbers):
+        # radical inverse of n in base 2
+        position, denominator, k = 0.0, 1.0, n
+        while k:
+            denominator *= 2
+            k, remainder = divmod(k, 2)
+            position += remainder / denominator
+        index = int(position * len(page_numbers))
+        if index not in seen:
+            seen.add(index)
+            ordered.append(page_numbers[index])
+        n += 1
+    return ordered
+
+
+def count_sizes_sampled(read_pages, page_numbers, batch_size=8, tolerance=0.02, patience=2):
+    """
+    analyse style distribution on a stratified page sample instead of the whole document.
+    pages are read batch by batch, sampling stops as soon as body size, min / max size and line margin
+    did not change more than the relative tolerance for #patience consecutive batches.
+    @param read_pages: callable yielding text containers for a list of page numbers,
+        e.g. lambda pages: source.read(override_page_numbers=pages)
+    @param page_numbers: pages that may be sampled
+    @param batch_size: amount of pages read at once
+    @param tolerance: relative change that is still considered as stable
+    @param patience: amount of stable batches required to stop sampling
+    @return: StyleDistribution, interchangeable with the result of count_sizes.
+        sampling stats (pages used, estimates per batch, convergence) are attached as distribution.sampling
+    """
 
-                sizeAnalyser.consume(node)
-                lineMarginAnalyser.consume(node)
+    def estimate():
+        if not sizeAnalyser.sizeDistribution or not lineMarginAnalyser.has_result:
+            return None
+        distribution = StyleDistribution(sizeAnalyser.sizeDistribution.copy(),
+                                         line_margin=lineMarginAnalyser.process_result())
+        return (distribution.body_size, distribution.min_found_size, distribution.max_found_size,
+                distribution.line_margin)
+
+    def is_stable(prior, current):
+        return prior is not None and current is not None and \
+               all(abs(a - b) <= tolerance * max(abs(a), abs(b)) for a, b in zip(prior, current))
+
+    sizeAnalyser = SizeAnalyser()
+    lineMarginAnalyser = LineMarginAnalyer()
+
+    ordered = stratified_page_order(page_numbers)
+    used = []
+    history = []
+    stable = 0
+    prior = None
+    converged = False
+
+    for start in range(0, len(ordered), batch_size):
+        batch = sorted(ordered[start:start + batch_size])
+        consume_elements(read_pages(batch), sizeAnalyser, lineMarginAnalyser)
+        used.extend(batch)
+
+        current = estimate()
+        history.append({"pages": len(used), "estimate": list(current) if current else None})
+        stable = stable + 1 if is_stable(prior, current) else 0
+        prior = current
+        if stable >= patience:
+            converged = True
+            break
 
     if not sizeAnalyser.sizeDistribution:
         raise TypeError("document does not contain text")
 
-    return StyleDistribution(sizeAnalyser.sizeDistribution, line_margin=lineMarginAnalyser.process_result())
+    distribution = StyleDistribution(sizeAnalyser.sizeDistribution, line_margin=lineMarginAnalyser.process_result())
+    distribution.sampling = {"pages": sorted(used), "page_count": len(ordered), "converged": converged,
+                             "tolerance": tolerance, "history": history}
+    return distribution
@@ -0,0 +1,297 @@
+"""
+Compact binary document format with random access to sections.
+
+Layout (little endian):
+    header      magic, version, section count, string count, top-level count, offsets of the blocks below
+    metadata    document metadata as compact json
+    strings     offset index (string count + 1 offsets) followed by the utf-8 encoded string data
+    sections    fixed-size records in preorder, see RECORD
+
+Sections are stored in order of traverse_in_order, thus the subtree of a section is the consecutive range of
+records [index, subtree_end). Texts and font names are deduplicated within the string table.
+"""
+import json
+import mmap
+import struct
+from typing import List, Iterator
+
+from pdfstructure.model.document import StructuredPdfDocument, Section, TextElement, DanglingTextSection
+from pdfstructure.model.style import Style, TextSize
+from pdfstructure.printer import Printer, encode_pdf_element
+
+MAGIC = b"PDFS"
+VERSION = 1
+
+# magic, version, sections, strings, top-level sections, metadata offset & length, strings offset, sections offset
+HEADER = struct.Struct("<4sHIIIQQQQ")
+# parent, first child, next sibling, subtree end, level, page, text, font name, mean size, max size, font size, flags
+RECORD = struct.Struct("<iiiiiiiiddBB")
+OFFSET = struct.Struct("<Q")
+
+NONE = -1
+HAS_HEADING = 1
+DANGLING = 2
+BOLD = 4
+ITALIC = 8
+HAS_STYLE = 16
+
+
+def write_binary(document: StructuredPdfDocument, fp):
+    """
+    writes document in the binary format, see module docs.
+    @param document:
+    @param fp: binary file handle
+    """
+    strings = {}
+    records = []
+
+    def string_id(text):
+        if text is None:
+            return NONE
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    # preorder walk, remembers the parent of each record to link the records afterwards
+    stack = [(section, NONE) for section in reversed(document.elements)]
+    parents = []
+    while stack:
+        section, parent = stack.pop()
+        index = len(records)
+        parents.append(parent)
+        heading = section.heading
+        flags = DANGLING if isinstance(section, DanglingTextSection) else 0
+        text = font = NONE
+        page = NONE
+        mean_size = max_size = 0.0
+        font_size = 0
+        if heading is not None:
+            flags |= HAS_HEADING
+            text = string_id(heading.text)
+            page = NONE if heading.page is None else heading.page
+            style = heading.style
+            if style is not None:
+                flags |= HAS_STYLE | (BOLD if style.bold else 0) | (ITALIC if style.italic else 0)
+                font = string_id(style.font_name)
+                mean_size, max_size = style.mean_size, style.max_size
+                font_size = int(style.mapped_font_size)
+        records.append([parent, NONE, NONE, NONE, section.level, page, text, font, mean_size, max_size, font_size,
+                        flags])
+        stack.extend((child, index) for child in reversed(section.children))
+
+    # link first child / next sibling, subtree ends are known once all descendants are numbered
+    last_child = {}
+    for index in range(len(records) - 1, -1, -1):
+        parent = parents[index]
+        records[index][3] = max(index + 1, last_child.get(index, index + 1))
+        if parent != NONE:
+            records[index][2] = records[parent][1]
+            records[parent][1] = index
+            last_child[parent] = max(last_child.get(parent, 0), records[index][3])
+    previous = NONE
+    for index in range(len(records) - 1, -1, -1):
+        if parents[index] == NONE:
+            records[index][2] = previous
+            previous = index
+
+    metadata = json.dumps(document.metadata, default=encode_pdf_element, separators=(",", ":")).encode("utf-8")
+    encoded = [text.encode("utf-8", "surrogatepass") for text in strings]
+    offsets = bytearray()
+    position = 0
+    for data in encoded:
+        offsets += OFFSET.pack(position)
+        position += len(data)
+    offsets += OFFSET.pack(position)
+
+    metadata_offset = HEADER.size
+    strings_offset = metadata_offset + len(metadata)
+    sections_offset = strings_offset + len(offsets) + position
+    fp.write(HEADER.pack(MAGIC, VERSION, len(records), len(strings), len(document.elements), metadata_offset,
+                         len(metadata), strings_offset, sections_offset))
+    fp.write(metadata)
+    fp.write(offsets)
+    for data in encoded:
+        fp.write(data)
+    for record in records:
+        fp.write(RECORD.pack(*record))
+
+
+class BinaryDocument:
+    """
+    Reads documents of the binary format, sections are decoded on demand only.
+    Opened from a file the data is memory-mapped, thus reading a single section or subtree does not touch the rest.
+    Usable as context manager, closes the mapped file on exit.
+    """
+
+    def __init__(self, buffer):
+        """
+
+        @param buffer: bytes-like object holding the whole document, e.g. mmap
+        """
+        self._buffer = buffer
+        magic, version, self.section_count, self.string_count, self.top_level_count, metadata_offset, \
+            metadata_length, self._strings_offset, self._sections_offset = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a binary pdfstructure document")
+        if version != VERSION:
+            raise ValueError("unsupported binary document version {}".format(version))
+        self._metadata_range = (metadata_offset, metadata_offset + metadata_length)
+        self._string_data_offset = self._strings_offset + OFFSET.size * (self.string_count + 1)
+        self._mapped = None
+
+    @classmethod
+    def open(cls, file_path) -> "BinaryDocument":
+        with open(file_path, "rb") as fp:
+            mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        document = cls(mapped)
+        document._mapped = mapped
+        return document
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.section_count
+
+    @property
+    def metadata(self) -> dict:
+        start, end = self._metadata_range
+        return json.loads(bytes(self._buffer[start:end]).decode("utf-8"))
+
+    def string(self, index):
+        if index == NONE:
+            return None
+        start, end = struct.unpack_from("<QQ", self._buffer, self._strings_offset + OFFSET.size * index)
+        start += self._string_data_offset
+        return bytes(self._buffer[start:self._string_data_offset + end]).decode("utf-8", "surrogatepass")
+
+    def record(self, index) -> tuple:
+        """
+        @return: raw record of section #index, fields as listed in RECORD
+        """
+        if not 0 <= index < self.section_count:
+            raise IndexError("section index out of range")
+        return RECORD.unpack_from(self._buffer, self._sections_offset + RECORD.size * index)
+
+    def parent(self, index):
+        """
+        @return: index of parent section, None for top-level sections
+        """
+        parent = self.record(index)[0]
+        return None if parent == NONE else parent
+
+    def children(self, index) -> List[int]:
+        """
+        @return: indices of the direct children of section #index
+        """
+        children = []
+        child = self.record(index)[1]
+        while child != NONE:
+            children.append(child)
+            child = self.record(child)[2]
+        return children
+
+    def top_level(self) -> List[int]:
+        """
+        @return: indices of the top-level sections
+        """
+        indices = []
+        index = 0 if self.section_count else NONE
+        while index != NONE:
+            indices.append(index)
+            index = self.record(index)[2]
+        return indices
+
+    def subtree_range(self, index):
+        """
+        @return: record indices (start, end) of section #index and all its descendants
+        """
+        return index, self.record(index)[3]
+
+    def section(self, index) -> Section:
+        """
+        decodes section #index without its children.
+        """
+        return self.__decode(self.record(index))
+
+    def subtree(self, index) -> Section:
+        """
+        decodes section #index including all nested children.
+        """
+        start, end = self.subtree_range(index)
+        decoded = {}
+        root = None
+        for position in range(start, end):
+            record = self.record(position)
+            section = self.__decode(record)
+            decoded[position] = section
+            if position == start:
+                root = section
+            else:
+                decoded[record[0]].append_children(section)
+        return root
+
+    def iter_sections(self) -> Iterator[Section]:
+        """
+        yields all sections without their children in order of traverse_in_order.
+        """
+        for index in range(self.section_count):
+            yield self.section(index)
+
+    def to_document(self) -> StructuredPdfDocument:
+        """
+        decodes the whole document.
+        """
+        document = StructuredPdfDocument(elements=[self.subtree(index) for index in self.top_level()])
+        document.metadata.update(self.metadata)
+        return document
+
+    def __decode(self, record) -> Section:
+        _, _, _, _, level, page, text, font, mean_size, max_size, font_size, flags = record
+        if flags & DANGLING:
+            section = DanglingTextSection()
+            section.set_level(level)
+            return section
+        heading = None
+        if flags & HAS_HEADING:
+            style = None
+            if flags & HAS_STYLE:
+                style = Style(bold=bool(flags & BOLD), italic=bool(flags & ITALIC), font_name=self.string(font),
+                              mapped_font_size=TextSize(font_size), mean_size=mean_size, max_size=max_size)
+            heading = TextElement(text_container=None, style=style, text=self.string(text),
+                                  page=None if page == NONE else page)
+        return Section(heading, level=level)
+
+
+def load_binary(file_path) -> StructuredPdfDocument:
+    """
+    reads a whole document written by write_binary / BinaryFilePrinter.
+    """
+    with BinaryDocument.open(file_path) as document:
+        return document.to_document()
+
+
+class BinaryFilePrinter(Printer):
+    def print(self, document: StructuredPdfDocument, *args, **kwargs):
+        """
+        writes document in the binary format, read it with BinaryDocument.open or load_binary.
+        @param document:
+        @param args:
+        @param kwargs:
+            Keyword Args:
+                file_path (str): path to output file
+        @return:
+        """
+        file_path = kwargs.get("file_path")
+        with open(file_path, "wb") as fp:
+            write_binary(document, fp)
+        return file_path
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from pdfstructure.model.document import StructuredPdfDocument
+from pdfstructure.printer import JsonStringPrinter
+from pdfstructure.utils import write_atomic
+
+
+def cache_key(fingerprint: str, parser_config: dict) -> str:
+    """
+    content addressed key of a parse result.
+    @param fingerprint: identifies source content & read settings, see Source.fingerprint()
+    @param parser_config: parser settings, see HierarchyParser.config()
+    @return: hex digest
+    """
+    config = json.dumps(parser_config, sort_keys=True, default=repr)
+    return hashlib.sha256("{}\n{}".format(fingerprint, config).encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    Stores parsed documents as json, bounded by max_bytes. Least recently used documents are evicted first.
+    Cached documents are returned as loaded by StructuredPdfDocument.from_json.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key) -> StructuredPdfDocument:
+        data = self._load(key)
+        self.count(data is not None)
+        if data is None:
+            return None
+        return StructuredPdfDocument.from_json(json.loads(data))
+
+    def count(self, hit):
+        """
+        counts a lookup, e.g. one done by a copy of this cache within a parse_many worker process.
+        @param hit: True for hits, False for misses
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, document: StructuredPdfDocument):
+        data = JsonStringPrinter().print(document)
+        self._store(key, data)
+        self._evict()
+
+    @property
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def __getstate__(self):
+        # caches are shipped to parse_many worker processes, locks can't be pickled.
+        # lookups of the copies are counted by the original cache with the ParseResults
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        """
+        @return: serialized document and mark it as recently used, None if unknown
+        """
+        pass
+
+    def _store(self, key, data: str):
+        """
+        stores serialized document under key, replaces existing ones.
+        """
+        pass
+
+    def _evict(self):
+        """
+        remove least recently used documents until the cache is smaller than max_bytes
+        """
+        pass
+
+
+class DirectoryCache(ParseCache):
+    """
+    One json file per document within a local directory, file modification time tracks last usage.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        super().__init__(max_bytes=max_bytes)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __path(self, key) -> Path:
+        return self.directory / "{}.json".format(key)
+
+    def _load(self, key):
+        path = self.__path(key)
+        try:
+            data = path.read_text(encoding="utf-8")
+            os.utime(str(path))
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key, data: str):
+        # temporary file is unique per process & thread, readers never see partially written documents
+        write_atomic(self.__path(key), data.encode("utf-8"))
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class SqliteCache(ParseCache):
+    """
+    Stores documents within a single SQLite database file.
+    """
+
+    def __init__(self, db_path, max_bytes=512 * 1024 * 1024):
+        super().__init__(max_bytes=max_bytes)
+        self.db_path = str(db_path)
+        with self.__connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS documents "
+                       "(key TEXT PRIMARY KEY, data TEXT, size INTEGER, last_used REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS documents_last_used ON documents (last_used)")
+
+    @contextmanager
+    def __connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _load(self, key):
+        with self.__connect() as db:
+            row = db.execute("SELECT data FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE documents SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def _store(self, key, data: str):
+        with self.__connect() as db:
+            db.execute("INSERT OR REPLACE INTO documents (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                       (key, data, len(data.encode("utf-8")), time.time()))
+
+    def _evict(self):
+        with self.__connect() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, size in db.execute("SELECT key, size FROM documents ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM documents WHERE key = ?", (key,))
+                total -= size
@@ -1,9 +1,7 @@
 import re
 
 from pdfstructure.model.document import Section
-from pdfstructure.utils import word_generator
 
-numeration_pattern = re.compile("^(?=.*\d+)((?=.*\.)|(?=.*:)).*$")
 white_space_pattern = re.compile("\\s+")
 
 
@@ -19,6 +17,10 @@ class SubHeaderPredicate:
     def add_condition(self, condition):
         self._conditions.append(condition)
 
+    @property
+    def conditions(self):
+        return list(self._conditions)
+
     def test(self, h1, h2):
         return any(condition(h1, h2) for condition in self._conditions)
 
@@ -41,9 +43,7 @@ def condition_boldness(h1: Section, h2: Section):
     @param h2:
     @return:
     """
-    h1start = next(word_generator(h1.heading._data))
-    h2start = next(word_generator(h2.heading._data))
-    if numeration_pattern.match(h2start) and not numeration_pattern.match(h1start):
+    if h2.heading.features.enumerated and not h1.heading.features.enumerated:
         return False
 
     return h1.heading.style.bold and not h2.heading.style.bold
@@ -57,8 +57,8 @@ def condition_h2_extends_h1(h1: Section, h2: Section):
     @param h2:
     @return:
     """
-    h1start = next(word_generator(h1.heading._data))
-    h2start = next(word_generator(h2.heading._data))
+    h1start = h1.heading.features.first_token
+    h2start = h2.heading.features.first_token
     return len(h2start) > len(h1start) and h1start in h2start
 
 
@@ -74,9 +74,7 @@ def condition_h1_enum_h2_not(h1: Section, h2: Section):
     # if h2.heading.style.font_name != h1.heading.style.font_name:
     #    return False
 
-    h1start = next(word_generator(h1.heading._data))
-    h2start = next(word_generator(h2.heading._data))
-    return numeration_pattern.match(h1start) and not numeration_pattern.match(h2start)
+    return h1.heading.features.enumerated and not h2.heading.features.enumerated
 
 
 def condition_h1_slightly_bigger_h2(h1: Section, h2: Section):
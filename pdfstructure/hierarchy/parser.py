@@ -1,50 +1,311 @@
+import functools
+import inspect
+import itertools
+import os
+import time
+import traceback
+import types
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Generator
+from typing import List, Generator, Iterable, Union
 
 from pdfminer.layout import LTTextContainer, LAParams
 
 from pdfstructure.analysis.annotate import StyleAnnotator
 from pdfstructure.analysis.sizemapper import PivotLogMapper
-from pdfstructure.analysis.styledistribution import count_sizes, StyleDistribution
+from pdfstructure.analysis.styledistribution import count_sizes, StyleDistribution, count_sizes_sampled
+from pdfstructure.cache import cache_key
 from pdfstructure.hierarchy.detectheader import header_detector
 from pdfstructure.hierarchy.headercompare import get_default_sub_header_conditions
 from pdfstructure.model.document import TextElement, Section, StructuredPdfDocument, DanglingTextSection
-from pdfstructure.source import Source
+from pdfstructure.observer import ParseObserver, ParseStats, ObserverGroup, StageClock
+from pdfstructure.source import Source, FileSource
+
+
+class ParseResult:
+    """
+    Outcome of parsing one document with HierarchyParser.parse_many.
+    Either holds the parsed document or the error that occurred while parsing it.
+    """
+
+    def __init__(self, index, uri, document: StructuredPdfDocument = None, error=None, error_trace=None,
+                 duration=0.0, cached=None):
+        """
+
+        @param index: position of the source within the input of parse_many
+        @param uri: source uri, e.g. file path
+        @param document: parsed document, None if parsing failed
+        @param error: error message, e.g. "TypeError: document does not contain text"
+        @param error_trace: formatted traceback of the error
+        @param duration: time spent parsing the document in seconds
+        @param cached: True if the document was loaded from the parsers cache, False if the cache missed it,
+            None without cache lookup
+        """
+        self.index = index
+        self.uri = uri
+        self.document = document
+        self.error = error
+        self.error_trace = error_trace
+        self.duration = duration
+        self.cached = cached
+
+    @property
+    def ok(self):
+        return self.error is None
 
 
 class HierarchyParser:
+    """
+    Parses the natural hierarchy of a PDF document.
+    Thread-safe: the parser holds configuration only, all state of a parse run is local to it.
+    Thus one parser instance can serve concurrent parse_pdf calls, e.g. from a thread pool.
+    """
 
-    def __init__(self, sub_header_conditions=get_default_sub_header_conditions()):
+    def __init__(self, sub_header_conditions=get_default_sub_header_conditions(), pre_scan=False,
+                 sample_pages=False, compact=False, size_mapper=PivotLogMapper, cache=None, collect_stats=False):
+        """
+
+        @param sub_header_conditions: decides whether headers with the same mapped font size are nested
+        @param pre_scan: analyse the style distribution with the lightweight Source.pre_scan() instead of read()
+        @param sample_pages: analyse the style distribution on a page sample until it converged,
+            see count_sizes_sampled. used pages & convergence stats are stored in metadata["style_sampling"]
+        @param compact: convert paragraphs into CompactTextElements as soon as a top-level section is complete,
+            extracted pdfminer objects are released
+        @param size_mapper: SizeMapper type, created with the analysed StyleDistribution.
+            use functools.partial to pass further arguments, e.g. partial(PivotLogMapper, bins=7)
+        @param cache: ParseCache, parse results of sources with the same fingerprint & parser config are reused.
+            cached documents are returned as loaded by StructuredPdfDocument.from_json.
+            conditions and size mapper must be identifiable then, see config()
+        @param collect_stats: measure the parse run, ParseStats are stored in metadata["parse_stats"]
+        """
         self._isSubHeader = sub_header_conditions
+        self._pre_scan = pre_scan
+        self._sample_pages = sample_pages
+        self._compact = compact
+        self._size_mapper = size_mapper
+        self._cache = cache
+        self._collect_stats = collect_stats
+        if cache is not None:
+            # fail early for settings that can't be part of a cache key
+            self.config()
 
-    def parse_pdf(self, source: Source) -> StructuredPdfDocument:
+    def config(self):
+        """
+        parser settings that affect the parse result.
+        conditions & size mapper are identified by their importable name, including the arguments of
+        functools.partial objects and the attributes of callable objects.
+        @raise ValueError: a condition or the size mapper can't be identified, e.g. a lambda or closure
+        @return: dict
+        """
+
+        def name(obj):
+            identifier = stable_name(obj)
+            if identifier is None:
+                raise ValueError("{!r} has no stable name, use a module level function or class "
+                                 "to cache parse results".format(obj))
+            return identifier
+
+        return {"sub_header_conditions": [name(condition) for condition in self._isSubHeader.conditions],
+                "size_mapper": name(self._size_mapper),
+                "pre_scan": self._pre_scan,
+                "sample_pages": self._sample_pages}
+
+    def parse_pdf(self, source: Source, observer: ParseObserver = None) -> StructuredPdfDocument:
         """
         Analysises and parses a PDF document from a given @Source containing its natural hierarchy.
         @param source:
+        @param observer: notified about stages, pages and emitted paragraphs. not called for cached documents
         @return:
         """
+        key = None
+        if self._cache is not None:
+            fingerprint = source.fingerprint()
+            key = cache_key(fingerprint, self.config()) if fingerprint else None
+        if key:
+            cached = self._cache.get(key)
+            if cached is not None:
+                enrich_metadata(cached, source)
+                return cached
+
+        stats = ParseStats() if self._collect_stats else None
+        clock = self.__stage_clock(observer, stats)
+
         # 1. iterate once through PDF and analyse style distribution
-        distribution = count_sizes(source.read())
-        size_mapper = PivotLogMapper(distribution)
-        style_annotator = StyleAnnotator(sizemapper=size_mapper, style_info=distribution)
+        distribution = self.analyse_style(source, clock)
 
         # 2. iterate second time trough pdf
-        # - annotate each paragraph with mapped Style
-        elements_with_style = style_annotator.process(source.read(
-            override_la_params=LAParams(line_margin=distribution.line_margin)))
-
-        # - create nested document structure on the fly
-        structured_elements = self.create_hierarchy(elements_with_style, distribution)
+        structured_elements = list(self.__iter_structure(source, distribution, clock))
 
         # 3. create wrapped document and capture some metadata
         pdf_document = StructuredPdfDocument(elements=structured_elements, style_info=distribution)
         enrich_metadata(pdf_document, source)
+        if distribution.sampling:
+            pdf_document.update_metadata("style_sampling", distribution.sampling)
+        if stats:
+            pdf_document.update_metadata("parse_stats", stats)
+        if key:
+            self._cache.put(key, pdf_document)
         return pdf_document
 
+    def iter_sections(self, source: Source, observer: ParseObserver = None) -> Generator[Section, None, None]:
+        """
+        Streaming variant of parse_pdf, yields each top-level section as soon as it is complete,
+        i.e. as soon as the next top-level section starts. Only the currently open section is kept in memory.
+        @param source:
+        @param observer: notified about stages, pages and emitted paragraphs
+        @return:
+        """
+        clock = self.__stage_clock(observer)
+        distribution = self.analyse_style(source, clock)
+        yield from self.__iter_structure(source, distribution, clock)
+
+    @staticmethod
+    def __stage_clock(observer: ParseObserver, stats: ParseStats = None):
+        """
+        @return: StageClock reporting to observer and stats, None if there is nobody to notify
+        """
+        observers = [o for o in (observer, stats) if o is not None]
+        if not observers:
+            return None
+        return StageClock(observers[0] if len(observers) == 1 else ObserverGroup(observers))
+
+    def __iter_structure(self, source: Source, distribution: StyleDistribution,
+                         clock: StageClock = None) -> Generator[Section, None, None]:
+        size_mapper = self._size_mapper(distribution)
+        style_annotator = StyleAnnotator(sizemapper=size_mapper, style_info=distribution)
+        la_params = LAParams(line_margin=distribution.line_margin)
+
+        if clock is None:
+            # - annotate each paragraph with mapped Style
+            elements_with_style = style_annotator.process(source.read(override_la_params=la_params))
+            # - create nested document structure on the fly
+            sections = self.iter_hierarchy(elements_with_style, distribution)
+        else:
+            if accepts_keyword(source.read, "observer"):
+                elements = source.read(override_la_params=la_params, observer=clock.observer)
+            else:
+                # e.g. custom source implementing read() as documented by Source, pages are not reported
+                elements = source.read(override_la_params=la_params)
+            elements = clock.wrap(elements, "extraction")
+            elements_with_style = clock.wrap(style_annotator.process(elements), "annotate")
+            sections = clock.wrap(self.iter_hierarchy(elements_with_style, distribution, clock.observer),
+                                  "create_hierarchy")
+
+        for section in sections:
+            if self._compact:
+                section.compact()
+            yield section
+
+    def parse_many(self, sources: Iterable[Union[Source, str, Path]], workers=None, max_tasks_per_child=None,
+                   memory_limit=None, chunk_size=1) -> Generator[ParseResult, None, None]:
+        """
+        Parses many documents using a pool of worker processes, results are yielded as soon as they are completed.
+        An error while parsing a document is captured within its ParseResult, remaining documents are not affected.
+        That includes worker processes that die while parsing (e.g. crash of a native library, killed by the OS):
+        documents that were in progress at that time are parsed once more one by one in a new pool,
+        the document that terminates its worker again fails with a BrokenProcessPool error.
+        Returned documents are compacted, i.e. detached from pdfminers layout objects (see Section.compact).
+        @param sources: Source objects or file paths
+        @param workers: amount of worker processes, defaults to cpu count
+        @param max_tasks_per_child: replace a worker process after it parsed this many chunks,
+            worker processes are spawned instead of forked then
+        @param memory_limit: max address space per worker process in bytes, exceeding it fails the current document
+            with a MemoryError (unix only)
+        @param chunk_size: amount of documents sent to a worker at once
+        """
+        for result in self.__parse_in_pool(sources, workers, max_tasks_per_child, memory_limit, chunk_size):
+            if self._cache is not None and result.cached is not None:
+                # workers look up copies of the cache
+                self._cache.count(result.cached)
+            yield result
+
+    def __parse_in_pool(self, sources, workers, max_tasks_per_child, memory_limit, chunk_size):
+        tasks = ((index, source if isinstance(source, Source) else FileSource(str(source)))
+                 for index, source in enumerate(sources))
+        chunks = iter(lambda: list(itertools.islice(tasks, chunk_size)), [])
+        max_in_flight = 2 * (workers or os.cpu_count() or 1)
+        pool_args = {"max_tasks_per_child": max_tasks_per_child} if max_tasks_per_child else {}
+        # tasks that were in progress when a worker process died, parsed one at a time to find the culprit
+        isolated = deque()
+
+        while True:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self, memory_limit), **pool_args)
+            in_flight = {}
+            try:
+                while True:
+                    if not isolated:
+                        for chunk in itertools.islice(chunks, max_in_flight - len(in_flight)):
+                            in_flight[_submit(executor, chunk)] = chunk
+                    elif not in_flight:
+                        chunk = [isolated.popleft()]
+                        in_flight[_submit(executor, chunk)] = chunk
+                    if not in_flight:
+                        return
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                        break
+                    for future in done:
+                        yield from _chunk_results(future, in_flight.pop(future))
+
+                # a worker process died, all pending futures of the pool fail
+                wait(in_flight)
+                suspects = []
+                for future, chunk in in_flight.items():
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        suspects.extend(chunk)
+                    else:
+                        yield from _chunk_results(future, chunk)
+                if len(suspects) == 1:
+                    index, source = suspects[0]
+                    yield ParseResult(index, source.uri, error="BrokenProcessPool: worker process terminated "
+                                                               "abruptly while parsing the document")
+                else:
+                    isolated.extendleft(reversed(suspects))
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def analyse_style(self, source: Source, clock: StageClock = None):
+        """
+        analyse style distribution of the whole document, or of a page sample if enabled and the pages are known.
+        @param source:
+        @param clock: measures the stages "style_extraction" and "count_sizes"
+        @return: StyleDistribution, its sampling stats are None if all pages were analysed
+        """
+        read = source.pre_scan if self._pre_scan else source.read
+        if clock is not None:
+            unmeasured = read
+
+            def read(*args, **kwargs):
+                return clock.wrap(unmeasured(*args, **kwargs), "style_extraction")
+
+        pages = source.available_pages() if self._sample_pages else None
+        if not pages:
+            if clock is None:
+                return count_sizes(read())
+            return clock.run("count_sizes", count_sizes, read())
+        if clock is None:
+            return count_sizes_sampled(lambda batch: read(override_page_numbers=batch), pages)
+        return clock.run("count_sizes", count_sizes_sampled, lambda batch: read(override_page_numbers=batch), pages)
+
     def create_hierarchy(self, element_gen: Generator[TextElement, LTTextContainer, None],
                          style_distribution: StyleDistribution) -> List[Section]:
         """
+        Takes incoming flat list of paragraphs and creates nested natural order hierarchy, see iter_hierarchy.
+        @param element_gen:
+        @return:
+        """
+        return list(self.iter_hierarchy(element_gen, style_distribution))
+
+    def iter_hierarchy(self, element_gen: Generator[TextElement, LTTextContainer, None],
+                       style_distribution: StyleDistribution,
+                       observer: ParseObserver = None) -> Generator[Section, None, None]:
+        """
         Takes incoming flat list of paragraphs and creates nested natural order hierarchy.
+        Top-level sections are yielded as soon as the next top-level section starts, they are complete by then.
 
         Example Structure:
         ==================
@@ -63,6 +324,7 @@ class HierarchyParser:
         >>
 
         @param element_gen:
+        @param observer: notified about each paragraph placed within the hierarchy
         @return:
         """
         structured = []
@@ -78,6 +340,8 @@ class HierarchyParser:
                 # initial state - push and continue with next element
                 if not level_stack:
                     self.__push_to_stack(child, level_stack, structured)
+                    if observer is not None:
+                        observer.element_emitted(child, True)
                     continue
 
                 stack_peek_size = level_stack[-1].heading.style.mapped_font_size
@@ -91,6 +355,9 @@ class HierarchyParser:
                     self.__pop_stack_until_match(level_stack, header_size, child)
                     self.__push_to_stack(child, level_stack, structured)
 
+                if observer is not None:
+                    observer.element_emitted(child, True)
+
             else:
                 # no header found, add paragraph as a content element to previous node
                 # - content is on same level as its corresponding header
@@ -108,7 +375,14 @@ class HierarchyParser:
                         dangling_content.set_level(len(level_stack))
                         structured.append(dangling_content)
 
-        return structured
+                if observer is not None:
+                    observer.element_emitted(content_node, False)
+
+            # all but the last top-level section are complete
+            while len(structured) > 1:
+                yield structured.pop(0)
+
+        yield from structured
 
     def __pop_stack_until_match(self, stack, headerSize, header):
         # if top level is smaller than current header to test, pop it
@@ -135,7 +409,7 @@ class HierarchyParser:
         """
         if stack:
             child.set_level(len(stack))
-            stack[-1].children.append(child)
+            stack[-1].append_children(child)
         else:
             # append as highest order element
             output.append(child)
@@ -161,7 +435,99 @@ class HierarchyParser:
         """
         if not stack:
             return False
-        return len(stack[-1].heading._data) == 0
+        heading = stack[-1].heading
+        if heading._data is None:
+            # element without extracted pdfminer objects, e.g. decoded from json
+            return not heading.text
+        return len(heading._data) == 0
+
+
+_worker_parser = None
+
+
+def _init_worker(parser: HierarchyParser, memory_limit):
+    global _worker_parser
+    _worker_parser = parser
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _submit(executor: ProcessPoolExecutor, chunk) -> Future:
+    try:
+        return executor.submit(_parse_chunk, chunk)
+    except BrokenProcessPool as e:
+        # pool broke since the last completed chunk
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def _chunk_results(future: Future, chunk) -> List[ParseResult]:
+    if future.exception() is None:
+        return future.result()
+    # e.g. source or document can't be pickled
+    error = "{}: {}".format(type(future.exception()).__name__, future.exception())
+    return [ParseResult(index, source.uri, error=error) for index, source in chunk]
+
+
+def _parse_chunk(tasks) -> List[ParseResult]:
+    return [_parse_task(index, source) for index, source in tasks]
+
+
+def _parse_task(index, source: Source) -> ParseResult:
+    start = time.perf_counter()
+    cache = _worker_parser._cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    try:
+        document = _worker_parser.parse_pdf(source).compact()
+        result = ParseResult(index, source.uri, document=document, duration=time.perf_counter() - start)
+    except Exception as e:
+        result = ParseResult(index, source.uri, error="{}: {}".format(type(e).__name__, e),
+                             error_trace=traceback.format_exc(), duration=time.perf_counter() - start)
+    if cache is not None and (cache.hits, cache.misses) != (hits, misses):
+        result.cached = cache.hits > hits
+    return result
+
+
+def accepts_keyword(function, keyword):
+    """
+    @return: True if function can be called with given keyword argument
+    """
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(parameter.name == keyword and parameter.kind != parameter.POSITIONAL_ONLY
+               or parameter.kind == parameter.VAR_KEYWORD for parameter in parameters)
+
+
+def stable_name(obj):
+    """
+    identifies a function, class or callable object across processes & runs.
+    @param obj:
+    @return: string, None for lambdas, closures and objects whose state is unknown or depends on memory addresses
+    """
+    if isinstance(obj, functools.partial):
+        func = stable_name(obj.func)
+        arguments = [repr(argument) for argument in obj.args] + \
+                    ["{}={!r}".format(key, value) for key, value in sorted(obj.keywords.items())]
+        identifier = None if func is None else "{}({})".format(func, ", ".join(arguments))
+    elif isinstance(obj, types.MethodType):
+        owner = stable_name(obj.__self__)
+        identifier = None if owner is None else "{}.{}".format(owner, obj.__name__)
+    elif isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+        identifier = "{}.{}".format(obj.__module__, obj.__qualname__)
+    elif hasattr(obj, "__dict__"):
+        # callable object, its attributes are its parameters
+        cls = stable_name(type(obj))
+        attributes = ["{}={!r}".format(key, value) for key, value in sorted(vars(obj).items())]
+        identifier = None if cls is None else "{}({})".format(cls, ", ".join(attributes))
+    else:
+        identifier = None
+    if identifier is None or "<lambda>" in identifier or "<locals>" in identifier or " at 0x" in identifier:
+        return None
+    return identifier
 
 
 def enrich_metadata(pdf: StructuredPdfDocument, source: Source):
@@ -9,7 +9,7 @@ def get_document_depth(document: StructuredPdfDocument):
     """
     retrieves document depth found within tree structure, + 1 because the levels are 0 notated.
     """
-    return max(set([section.level for section in traverse_in_order(document)])) + 1
+    return document.preorder_index().depth
 
 
 def traverse_inorder_sections_with_content(document: StructuredPdfDocument) -> Generator[
@@ -42,15 +42,16 @@ def traverse_in_order(document: StructuredPdfDocument) \
     - [5,1,a,b,c,2,10,3,x]
     """
 
-    def __traverse__(section: Section):
-        child: Section
-        for child in section.children:
-            yield child
-            yield from __traverse__(child)
-
-    for element in document.elements:
-        yield element
-        yield from __traverse__(element)
+    # iterators over the remaining children of each open section
+    stack = [iter(document.elements)]
+    while stack:
+        for section in stack[-1]:
+            yield section
+            if section.children:
+                stack.append(iter(section.children))
+                break
+        else:
+            stack.pop()
 
 
 def traverse_level_order(document: StructuredPdfDocument, max_depth=sys.maxsize) \
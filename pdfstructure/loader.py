@@ -0,0 +1,346 @@
+"""
+Incremental loader for documents encoded by the json printers.
+
+Unlike StructuredPdfDocument.from_json the json is read chunk by chunk and sections are built with an explicit
+stack, thus there is no need to hold the decoded dicts of the whole document and deep documents do not hit the
+recursion limit. In lazy mode the children of each section are skipped and only decoded on first access.
+"""
+import json
+import re
+from typing import Generator, Optional
+
+from pdfstructure.model.document import StructuredPdfDocument, Section, TextElement, DanglingTextSection
+from pdfstructure.model.style import Style
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER = re.compile(r"(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?")
+# anything but square brackets outside of strings, used to skip over nested arrays without decoding them
+SKIP_CONTENT = re.compile(r'[^"\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]]*)*', re.DOTALL)
+DECODER = json.JSONDecoder()
+LITERALS = (("true", True), ("false", False), ("null", None), ("NaN", float("nan")), ("Infinity", float("inf")),
+            ("-Infinity", float("-inf")))
+PUNCTUATION = "{}[],:"
+
+
+class _Tokenizer:
+    """
+    splits json text into punctuation characters and scalar values, reads from a text stream on demand.
+    """
+
+    def __init__(self, fp=None, text="", chunk_size=1 << 16, start=0, end=None):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self.text = text
+        self.position = start
+        self.end = len(text) if end is None else end
+        self._eof = fp is None
+
+    def __fill(self, size=None):
+        """
+        drops consumed text and reads the next chunk.
+        @param size: characters to read, defaults to chunk size
+        @return: False if the stream is exhausted
+        """
+        if self._eof:
+            return False
+        chunk = self._fp.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self.text = self.text[self.position:] + chunk
+        self.position = 0
+        self.end = len(self.text)
+        return True
+
+    def next(self):
+        """
+        @return: (punctuation character, None) or ("", scalar value), (None, None) at the end of input
+        """
+        while True:
+            position = WHITESPACE.match(self.text, self.position, self.end).end()
+            if position == self.end:
+                self.position = position
+                if self.__fill():
+                    continue
+                return None, None
+            self.position = position
+            c = self.text[position]
+            if c in PUNCTUATION:
+                self.position += 1
+                return c, None
+            if c == '"':
+                try:
+                    value, self.position = json.decoder.scanstring(self.text, position + 1)
+                    return "", value
+                except json.JSONDecodeError:
+                    if self.__fill():
+                        continue
+                    raise
+            number = NUMBER.match(self.text, position, self.end)
+            if number:
+                # the number might continue within the next chunk, e.g. "1." of "1.5"
+                if number.end() == self.end or self.text[number.end()] in ".eE+-":
+                    if self.__fill():
+                        continue
+                integer, fraction, exponent = number.groups()
+                self.position = number.end()
+                if fraction or exponent:
+                    return "", float(integer + (fraction or "") + (exponent or ""))
+                return "", int(integer)
+            for literal, value in LITERALS:
+                if self.text.startswith(literal, position, self.end):
+                    self.position = position + len(literal)
+                    return "", value
+            # token might continue within the next chunk
+            if self.end - position < 16 and self.__fill():
+                continue
+            raise json.JSONDecodeError("Expecting value", self.text, position)
+
+    def decode_value(self):
+        """
+        decodes the value starting at the current position at once, used for shallow values like headings.
+        @return: decoded value
+        """
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.text, self.position)
+                if end <= self.end:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                pass
+            # value continues within the next chunks, read as much as there is to avoid quadratic retries
+            if not self.__fill(max(self._chunk_size, self.end - self.position)):
+                value, self.position = DECODER.raw_decode(self.text[:self.end], self.position)
+                return value
+
+    def skip_array(self):
+        """
+        skips over the array starting at the current position, the whole json text has to be loaded.
+        @return: (start, end) position of the array within text, None if there is no array at the current position
+        """
+        start = WHITESPACE.match(self.text, self.position, self.end).end()
+        if not self.text.startswith("[", start, self.end):
+            return None
+        depth = 1
+        position = start + 1
+        while depth:
+            position = SKIP_CONTENT.match(self.text, position, self.end).end()
+            if position >= self.end:
+                raise json.JSONDecodeError("Unterminated array", self.text, start)
+            depth += 1 if self.text[position] == "[" else -1
+            position += 1
+        self.position = position
+        return start, position
+
+
+class LazySection(Section):
+    """
+    Section whose children are decoded from the json text on first access.
+    Decoding skips over the encoded grandchildren, each level of a subtree is scanned once per level above it.
+    """
+
+    def __init__(self, element: TextElement, level=0, children_span=None):
+        """
+
+        @param children_span: (text, start, end) of the encoded children array
+        """
+        Section.__init__(self, element, level)
+        self._children_span = children_span
+        self._children = None
+
+    @property
+    def children(self):
+        if self._children is None:
+            text, start, end = self._children_span
+            self._children_span = None
+            self._children = JsonLoader(lazy=True).loads_sections(text, start, end)
+            for child in self._children:
+                child._parent = self
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+        self._children_span = None
+
+    @property
+    def is_loaded(self):
+        return self._children is not None
+
+
+class LazyDanglingTextSection(LazySection, DanglingTextSection):
+    def __init__(self, level=0, children_span=None):
+        LazySection.__init__(self, None, level, children_span)
+
+
+class _Frame:
+    """
+    container that is open while parsing.
+    """
+    __slots__ = ("kind", "container", "key")
+
+    def __init__(self, kind, container):
+        self.kind = kind
+        self.container = container
+        self.key = None
+
+
+def _child_kind(parent: Optional[_Frame]):
+    """
+    kind of a container nested in parent: how it gets converted once complete.
+    "plain" and "heading" containers are shallow and decoded at once.
+    """
+    if parent is None:
+        return "document"
+    elif parent.kind == "document":
+        return "sections" if parent.key == "elements" else "plain"
+    elif parent.kind == "sections":
+        return "section"
+    elif parent.kind == "section":
+        if parent.key == "children":
+            return "sections"
+        elif parent.key == "heading":
+            return "heading"
+    return "plain"
+
+
+class JsonLoader:
+    """
+    Loads documents encoded by JsonStringPrinter / JsonFilePrinter.
+    The result equals StructuredPdfDocument.from_json.
+    """
+
+    def __init__(self, lazy=False, chunk_size=1 << 16):
+        """
+
+        @param lazy: decode children of a section on first access, see LazySection.
+            the json text is kept in memory as long as there are sections with children not yet decoded
+        @param chunk_size: characters read at once from a stream
+        """
+        self.lazy = lazy
+        self.chunk_size = chunk_size
+
+    def load(self, fp) -> StructuredPdfDocument:
+        """
+        @param fp: text stream
+        """
+        if self.lazy:
+            return self.loads(fp.read())
+        return self.__complete(self.__parse(_Tokenizer(fp=fp, chunk_size=self.chunk_size)))
+
+    def loads(self, text: str) -> StructuredPdfDocument:
+        return self.__complete(self.__parse(_Tokenizer(text=text)))
+
+    def loads_sections(self, text: str, start=0, end=None) -> list:
+        """
+        decodes an encoded list of sections, e.g. the children of a section.
+        """
+        return self.__complete(self.__parse(_Tokenizer(text=text, start=start, end=end), root_kind="sections"))
+
+    def iter_sections(self, fp) -> Generator[Section, None, StructuredPdfDocument]:
+        """
+        yields top-level sections as soon as they are decoded, without keeping them.
+        @param fp: text stream
+        @return: document holding the metadata only, as return value of the generator
+        """
+        if self.lazy:
+            tokenizer = _Tokenizer(text=fp.read())
+        else:
+            tokenizer = _Tokenizer(fp=fp, chunk_size=self.chunk_size)
+        return (yield from self.__parse(tokenizer, stream=True))
+
+    @staticmethod
+    def __complete(generator):
+        while True:
+            try:
+                next(generator)
+            except StopIteration as stop:
+                return stop.value
+
+    def __parse(self, tokenizer: _Tokenizer, root_kind="document", stream=False):
+        """
+        builds the encoded value with an explicit stack of open containers.
+        @param root_kind: kind of the outermost container, see _child_kind
+        @param stream: yield top-level sections instead of adding them to the document
+        @return: decoded value, as return value of the generator
+        """
+        stack = []
+        while True:
+            c, value = tokenizer.next()
+            if c is None:
+                raise json.JSONDecodeError("Unexpected end of input", tokenizer.text, tokenizer.position)
+            top = stack[-1] if stack else None
+            if c == "":
+                if top is not None and top.key is None and isinstance(top.container, dict):
+                    top.key = value
+                    if self.lazy and top.kind == "section" and value == "children":
+                        if tokenizer.next()[0] != ":":
+                            raise json.JSONDecodeError("Expecting ':' delimiter", tokenizer.text, tokenizer.position)
+                        span = tokenizer.skip_array()
+                        if span:
+                            top.container["children"] = (tokenizer.text,) + span
+                            top.key = None
+                    continue
+            elif c in "{[":
+                kind = _child_kind(top) if stack else root_kind
+                if kind not in ("plain", "heading"):
+                    stack.append(_Frame(kind, {} if c == "{" else []))
+                    continue
+                tokenizer.position -= 1
+                value = tokenizer.decode_value()
+                if kind == "heading":
+                    value = self.__heading(value)
+            elif c in "}]":
+                value = self.__convert(stack.pop())
+                top = stack[-1] if stack else None
+                if stream and len(stack) == 2 and top.kind == "sections":
+                    yield value
+                    continue
+            else:
+                # "," and ":"
+                continue
+
+            if top is None:
+                return value
+            elif top.key is not None:
+                top.container[top.key] = value
+                top.key = None
+            else:
+                top.container.append(value)
+
+    def __convert(self, frame: _Frame):
+        data = frame.container
+        if frame.kind == "section":
+            heading = data.get("heading")
+            children = data.get("children") or []
+            level = data.get("level", 0)
+            if self.lazy and isinstance(children, tuple):
+                if heading is None:
+                    return LazyDanglingTextSection(level, children_span=children)
+                return LazySection(heading, level, children_span=children)
+            section = DanglingTextSection() if heading is None else Section(heading)
+            section.set_level(level)
+            for child in children:
+                section.append_children(child)
+            return section
+        elif frame.kind == "document":
+            document = StructuredPdfDocument(data.get("elements") or [])
+            document.metadata.update(data.get("metadata") or {})
+            return document
+        return data
+
+    @staticmethod
+    def __heading(data: dict) -> TextElement:
+        style = data.get("style")
+        return TextElement(text_container=None, style=Style.from_json(style) if style else None,
+                           text=data.get("text"), page=data.get("page"))
+
+
+def load_json(fp, lazy=False) -> StructuredPdfDocument:
+    """
+    loads a document encoded by the json printers, see JsonLoader.
+    @param fp: text stream
+    @param lazy: decode children of sections on first access
+    """
+    return JsonLoader(lazy=lazy).load(fp)
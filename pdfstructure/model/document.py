@@ -1,29 +1,97 @@
+import sys
 from collections import defaultdict
 from typing import List
 
-from pdfminer.layout import LTTextContainer
+from pdfminer.layout import LTTextContainer, LTTextLine
 
 from pdfstructure.analysis.styledistribution import StyleDistribution
 from pdfstructure.model.style import Style
+from pdfstructure.utils import char_generator, word_generator, numeration_pattern
+
+
+class TextFeatures:
+    """
+    Text properties of a paragraph, computed once and shared by header detection and sub-header conditions.
+    """
+    __slots__ = ("text", "first_token", "enumerated", "alpha_count", "numeric_count", "line_count")
+
+    def __init__(self, text, first_token, alpha_count, numeric_count, line_count):
+        """
+
+        @param text: stripped paragraph text
+        @param first_token: first word of paragraph, empty if there is none
+        @param alpha_count: amount of letters
+        @param numeric_count: amount of numeric characters
+        @param line_count: amount of text lines
+        """
+        self.text = text
+        self.first_token = first_token
+        self.enumerated = bool(numeration_pattern.match(first_token))
+        self.alpha_count = alpha_count
+        self.numeric_count = numeric_count
+        self.line_count = line_count
+
+    @classmethod
+    def from_container(cls, text_container: LTTextContainer):
+        alpha_count = 0
+        numeric_count = 0
+        for obj in char_generator(text_container):
+            for c in obj.get_text():
+                if c.isalpha():
+                    alpha_count += 1
+                if c.isnumeric():
+                    numeric_count += 1
+        line_count = sum(1 for obj in text_container if isinstance(obj, LTTextLine))
+        return cls(text=text_container.get_text().strip(),
+                   first_token=next(word_generator(text_container), ""),
+                   alpha_count=alpha_count, numeric_count=numeric_count, line_count=line_count)
+
+    @classmethod
+    def from_text(cls, text: str):
+        """
+        fallback for elements without extracted pdfminer objects, e.g. decoded from json.
+        """
+        text = text or ""
+        tokens = text.split()
+        return cls(text=text.strip(),
+                   first_token=tokens[0] if tokens else "",
+                   alpha_count=sum(1 for c in text if c.isalpha()),
+                   numeric_count=sum(1 for c in text if c.isnumeric()),
+                   line_count=len(text.strip().splitlines()))
 
 
 class TextElement:
     """
     Represents one single TextContainer like a line of words.
     """
+    __slots__ = ("_data", "_text", "style", "page", "_features")
 
-    def __init__(self, text_container: LTTextContainer, style: Style, text=None, page=None):
+    def __init__(self, text_container: LTTextContainer, style: Style, text=None, page=None,
+                 features: TextFeatures = None):
         self._data = text_container
         self._text = text
         self.style = style
         self.page = page
+        self._features = features
 
     @property
     def text(self):
         if not self._data:
             return self._text
         else:
-            return self._data.get_text().strip()
+            return self.features.text
+
+    @property
+    def features(self) -> TextFeatures:
+        """
+        text properties of this element, computed on first access unless provided by the StyleAnnotator.
+        """
+        if self._features is None:
+            if self._data:
+                self._features = TextFeatures.from_container(self._data)
+            else:
+                self._features = TextFeatures.from_text(self._text)
+        return self._features
 
     @classmethod
     def from_json(cls, data: dict):
@@ -34,49 +102,148 @@ class TextElement:
         """
         if data:
             return TextElement(text_container=None, style=Style.from_json(data["style"]),
-                               text=data["text"])
+                               text=data["text"], page=data.get("page"))
         return None
 
+    @property
+    def bbox(self):
+        return self._data.bbox if self._data else None
+
+    def compact(self):
+        """
+        @return: CompactTextElement holding text, style, page & bbox only, without the extracted pdfminer objects.
+        """
+        return CompactTextElement(text=self.text, style=self.style, page=self.page, bbox=self.bbox,
+                                  features=self.features)
+
     def __str__(self):
         return self.text
 
 
+class CompactTextElement(TextElement):
+    """
+    Memory efficient TextElement, that keeps no reference to pdfminers layout objects (characters, fonts, ..).
+    Created by TextElement.compact() once header detection is done, text and features are computed once and kept.
+    """
+    __slots__ = ("_bbox",)
+
+    def __init__(self, text, style: Style, page=None, bbox=None, features: TextFeatures = None):
+        super().__init__(text_container=None, style=style, text=text, page=page, features=features)
+        self._bbox = bbox
+
+    @property
+    def bbox(self):
+        return self._bbox
+
+    def compact(self):
+        return self
+
+
 class Section:
     """
     Represents a section with title, contents and children
     """
-    heading: TextElement
+    # section this section was appended to (see append_children), or SectionList of the document it belongs to
+    _parent = None
+    # incremented for this section and all its parents by append_children, cached aggregates like full_content or
+    # the PreorderIndex compare it to detect changes within the subtree
+    _version = 0
+    # (_version, text) of the last full_content call
+    _full_content = None
 
     def __init__(self, element: TextElement, level=0):
-        self.heading = element
+        self._heading = element
         self.children = []  # Section
         self.level = None
         self.set_level(level)
 
+    @property
+    def heading(self) -> TextElement:
+        return self._heading
+
+    @heading.setter
+    def heading(self, element: TextElement):
+        """
+        replacing the heading changes the text of this section and all its parents, see _version.
+        """
+        self._heading = element
+        _increment_versions(self)
+
     def set_level(self, level):
         self.level = level
 
     def append_children(self, section):
         self.children.append(section)
+        previous = section._parent
+        section._parent = self
+        _increment_versions(self)
+        if previous is not None:
+            # the former parent lost the section from its subtree
+            _increment_versions(previous)
+
+    def compact(self):
+        """
+        replaces the headings of this section and all its nested children by CompactTextElements.
+        """
+        stack = [self]
+        while stack:
+            section = stack.pop()
+            if section.heading:
+                # same text, cached aggregates stay valid
+                section._heading = section.heading.compact()
+            stack.extend(section.children)
 
     @property
     def full_content(self):
         """
         Returns merged full content of all nested children.
+        The text is cached, append_children or replaced headings within the subtree invalidate it.
         @return:
         """
-        contents = [self.heading_text] if self.heading_text else []
+        cached = self._full_content
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        text = "\n".join(self.__iter_text(use_cache=True))
+        self._full_content = (self._version, text)
+        return text
+
+    def iter_text(self):
+        """
+        yields the non-empty paragraphs of this section and all nested children in order of traverse_in_order.
+        """
+        return self.__iter_text(use_cache=False)
 
-        def __traverse__(section: Section):
-            child: Section
-            for child in section.children:
-                yield child
-                yield from __traverse__(child)
+    def write_text(self, fp):
+        """
+        writes full_content to a text stream paragraph by paragraph, without building the whole string.
+        @param fp: text stream
+        """
+        for index, text in enumerate(self.iter_text()):
+            if index:
+                fp.write("\n")
+            fp.write(text)
 
-        for child in __traverse__(self):
-            if child.heading_text:
-                contents.append(child.heading_text)
-        return "\n".join(contents)
+    def __iter_text(self, use_cache):
+        """
+        @param use_cache: yield the cached full_content of a nested child at once instead of its paragraphs
+        """
+        if self.heading_text:
+            yield self.heading_text
+        stack = [iter(self.children)]
+        while stack:
+            for child in stack[-1]:
+                cached = child._full_content if use_cache else None
+                if cached is not None and cached[0] == child._version:
+                    if cached[1]:
+                        yield cached[1]
+                    continue
+                if child.heading_text:
+                    yield child.heading_text
+                if child.children:
+                    stack.append(iter(child.children))
+                    break
+            else:
+                stack.pop()
 
     @property
     def top_level_content(self):
@@ -106,7 +273,8 @@ class Section:
         children = list(map(Section.from_json, data.get("children")))
         heading = TextElement.from_json(data.get("heading"))
         element = cls(heading, data["level"])
-        element.children = children
+        for child in children:
+            element.append_children(child)
         return element
 
     @property
@@ -130,24 +298,263 @@ class DanglingTextSection(Section):
         return "{}".format(" ".join([str(e) for e in self.content]))
 
 
+class PreorderIndex:
+    """
+    Flat arrays over all sections of a document in order of traverse_in_order (preorder).
+    The sections of the subtree of sections[i] are sections[i:ends[i]].
+    """
+
+    def __init__(self, elements: List[Section]):
+        self.sections = []
+        # index of parent section, -1 for top-level sections
+        self.parents = []
+        self.levels = []
+        # distance to the top-level, unlike Section.level content of a section is one step below its heading
+        self.depths = []
+        self.ends = []
+        # iterators over the remaining children of each open section, index of that section
+        stack = [(iter(elements), -1)]
+        while stack:
+            children, parent = stack[-1]
+            for section in children:
+                index = len(self.sections)
+                self.sections.append(section)
+                self.parents.append(parent)
+                self.levels.append(section.level)
+                self.depths.append(len(stack) - 1)
+                self.ends.append(index + 1)
+                if section.children:
+                    stack.append((iter(section.children), index))
+                    break
+            else:
+                stack.pop()
+                if parent >= 0:
+                    self.ends[parent] = len(self.sections)
+        self._positions = None
+
+    def __len__(self):
+        return len(self.sections)
+
+    @property
+    def depth(self):
+        """
+        document depth, see get_document_depth.
+        """
+        return max(self.levels) + 1 if self.levels else 0
+
+    def position(self, section: Section) -> int:
+        """
+        @return: index of given section within sections
+        """
+        if self._positions is None:
+            self._positions = {id(s): index for index, s in enumerate(self.sections)}
+        return self._positions[id(section)]
+
+    def subtree(self, section: Section) -> List[Section]:
+        """
+        @return: section and all its nested children in preorder
+        """
+        index = self.position(section)
+        return self.sections[index:self.ends[index]]
+
+    def in_order(self) -> List[Section]:
+        return list(self.sections)
+
+    def level_order(self, max_depth=sys.maxsize) -> List[Section]:
+        """
+        sections in order of traverse_level_order: sections of the same depth keep their preorder.
+        sections with a level >= max_depth are skipped including their children.
+        """
+        visible = [False] * len(self.sections)
+        buckets = []
+        for index, section in enumerate(self.sections):
+            parent = self.parents[index]
+            if self.levels[index] < max_depth and (parent < 0 or visible[parent]):
+                visible[index] = True
+                depth = self.depths[index]
+                while len(buckets) <= depth:
+                    buckets.append([])
+                buckets[depth].append(section)
+        return [section for bucket in buckets for section in bucket]
+
+
+def _increment_versions(node):
+    """
+    increments _version of node and all its parents, see Section._version.
+    """
+    while node is not None:
+        node._version += 1
+        node = node._parent
+
+
+class SectionList(list):
+    """
+    Top-level sections of a document. Each modification of the list increments its _version.
+    Sections without parent become part of the list (_parent), appending to their subtree increments the lists
+    _version as well. Sections of other sections or documents are borrowed, their _version is checked separately.
+    """
+    _parent = None
+    _version = 0
+    # (_version, borrowed sections) of the last version() call
+    _borrowed = None
+
+    def __init__(self, sections=()):
+        super().__init__(sections)
+        self.__adopt(self)
+
+    def version(self):
+        """
+        changes whenever the list or the subtree of one of its sections changes,
+        constant time unless the list holds sections of other documents.
+        @return: hashable state
+        """
+        if self._borrowed is None or self._borrowed[0] != self._version:
+            self._borrowed = (self._version, [section for section in self if section._parent is not self])
+        borrowed = self._borrowed[1]
+        if not borrowed:
+            return self._version
+        return self._version, tuple(section._version for section in borrowed)
+
+    def __adopt(self, sections):
+        for section in sections:
+            if section._parent is None:
+                section._parent = self
+
+    def __release(self, sections):
+        for section in sections:
+            if section._parent is self and not any(element is section for element in self):
+                section._parent = None
+
+    def __changed(self, added=(), removed=()):
+        self.__release(removed)
+        self.__adopt(added)
+        self._version += 1
+
+    def append(self, section):
+        super().append(section)
+        self.__changed(added=(section,))
+
+    def extend(self, sections):
+        sections = list(sections)
+        super().extend(sections)
+        self.__changed(added=sections)
+
+    def __iadd__(self, sections):
+        self.extend(sections)
+        return self
+
+    def __imul__(self, n):
+        removed = list(self) if n <= 0 else ()
+        super().__imul__(n)
+        self.__changed(removed=removed)
+        return self
+
+    def insert(self, index, section):
+        super().insert(index, section)
+        self.__changed(added=(section,))
+
+    def __setitem__(self, key, value):
+        removed = self[key] if isinstance(key, slice) else (self[key],)
+        added = list(value) if isinstance(key, slice) else (value,)
+        super().__setitem__(key, added if isinstance(key, slice) else value)
+        self.__changed(added=added, removed=removed)
+
+    def __delitem__(self, key):
+        removed = self[key] if isinstance(key, slice) else (self[key],)
+        super().__delitem__(key)
+        self.__changed(removed=removed)
+
+    def pop(self, index=-1):
+        section = super().pop(index)
+        self.__changed(removed=(section,))
+        return section
+
+    def remove(self, section):
+        super().remove(section)
+        self.__changed(removed=(section,))
+
+    def clear(self):
+        removed = list(self)
+        super().clear()
+        self.__changed(removed=removed)
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.__changed()
+
+    def reverse(self):
+        super().reverse()
+        self.__changed()
+
+
 class StructuredPdfDocument:
     """
     PDF document containing its natural order hierarchy, as detected by the HierarchyParser.
     """
-    elements: List[Section]
 
     def __init__(self, elements: [Section], style_info=None):
         self.metadata = defaultdict(str)
         self.elements = elements
         self.metadata["style_distribution"] = style_info
+        self._preorder_index = None
+        self._indexed = None
+
+    @property
+    def elements(self) -> SectionList:
+        """
+        top-level sections, modifications of the list are tracked, see SectionList.
+        """
+        return self._elements
+
+    @elements.setter
+    def elements(self, elements: List[Section]):
+        self._elements = elements if isinstance(elements, SectionList) else SectionList(elements)
+
+    def preorder_index(self) -> PreorderIndex:
+        """
+        PreorderIndex of all sections, cached until sections are added or replaced (Section.append_children or
+        elements). Appending to sections of other documents keeps the index, see Section._version.
+        """
+        state = self.elements.version()
+        if self._preorder_index is None or self._indexed != state:
+            self._preorder_index = PreorderIndex(self.elements)
+            self._indexed = state
+        return self._preorder_index
 
     def update_metadata(self, key, value):
         self.metadata[key] = value
 
+    def compact(self):
+        """
+        drops extracted pdfminer objects of all sections, see Section.compact.
+        @return: self
+        """
+        for element in self.elements:
+            element.compact()
+        return self
+
     @property
     def text(self):
         return "\n".join([item.full_content for item in self.elements])
 
+    def iter_text(self):
+        """
+        yields the non-empty paragraphs of all sections in order of traverse_in_order.
+        unlike text & write_text, top-level sections without text don't add an empty line.
+        """
+        for element in self.elements:
+            yield from element.iter_text()
+
+    def write_text(self, fp):
+        """
+        writes text to a text stream paragraph by paragraph, without building the whole string.
+        @param fp: text stream
+        """
+        for index, element in enumerate(self.elements):
+            if index:
+                fp.write("\n")
+            element.write_text(fp)
+
     @property
     def title(self):
         return self.metadata.get("title")
@@ -0,0 +1,179 @@
+import time
+from typing import Iterable
+
+
+class ParseObserver:
+    """
+    Receives events while HierarchyParser.parse_pdf runs, e.g. for logging or profiling.
+    All methods are no-ops, override the ones of interest.
+    Stages of one parse run are interleaved (paragraphs are streamed from source to hierarchy),
+    durations are exclusive, i.e. time spent in nested stages is not counted twice.
+    """
+
+    def stage_started(self, stage: str):
+        pass
+
+    def stage_finished(self, stage: str, duration: float):
+        """
+        @param stage: e.g. "extraction", "annotate", "create_hierarchy"
+        @param duration: seconds spent in this stage
+        """
+        pass
+
+    def page_done(self, page: int):
+        """
+        all paragraphs of given page were read, the page is zero-indexed within the read pages.
+        reported by sources whose read() takes an observer argument, e.g. FileSource.
+        """
+        pass
+
+    def element_emitted(self, section, header: bool):
+        """
+        a paragraph got its place within the hierarchy.
+        @param section: Section created for the paragraph
+        @param header: whether the paragraph was detected as header
+        """
+        pass
+
+    def box_split(self, container, parts: int):
+        """
+        a paragraph was split into #parts paragraphs of different style, see FileSource.split_boxes_by_style.
+        """
+        pass
+
+    def figure_rewritten(self, figure, paragraphs: int):
+        """
+        text of a LTFigure was rewritten into #paragraphs paragraphs.
+        """
+        pass
+
+
+class ObserverGroup(ParseObserver):
+    """
+    forwards events to all given observers.
+    """
+
+    def __init__(self, observers: Iterable[ParseObserver]):
+        self.observers = list(observers)
+
+    def stage_started(self, stage):
+        for observer in self.observers:
+            observer.stage_started(stage)
+
+    def stage_finished(self, stage, duration):
+        for observer in self.observers:
+            observer.stage_finished(stage, duration)
+
+    def page_done(self, page):
+        for observer in self.observers:
+            observer.page_done(page)
+
+    def element_emitted(self, section, header):
+        for observer in self.observers:
+            observer.element_emitted(section, header)
+
+    def box_split(self, container, parts):
+        for observer in self.observers:
+            observer.box_split(container, parts)
+
+    def figure_rewritten(self, figure, paragraphs):
+        for observer in self.observers:
+            observer.figure_rewritten(figure, paragraphs)
+
+
+class ParseStats(ParseObserver):
+    """
+    Statistics of a parse run, stored as metadata["parse_stats"] if enabled (HierarchyParser(collect_stats=True)).
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.pages = 0
+        self.paragraphs = 0
+        self.headers = 0
+        self.splits = 0
+        self.figure_rewrites = 0
+        self.max_depth = 0
+
+    def stage_finished(self, stage, duration):
+        self.durations[stage] = self.durations.get(stage, 0.0) + duration
+
+    def page_done(self, page):
+        self.pages = max(self.pages, page + 1)
+
+    def element_emitted(self, section, header):
+        self.paragraphs += 1
+        if header:
+            self.headers += 1
+        self.max_depth = max(self.max_depth, section.level + 1)
+
+    def box_split(self, container, parts):
+        self.splits += parts - 1
+
+    def figure_rewritten(self, figure, paragraphs):
+        self.figure_rewrites += 1
+
+    def __repr__(self):
+        return "ParseStats({})".format(self.__dict__)
+
+
+class StageClock:
+    """
+    measures exclusive time of interleaved stages and reports them to an observer.
+    """
+
+    def __init__(self, observer: ParseObserver):
+        self.observer = observer
+        self._stack = []
+        self._mark = None
+        self._durations = {}
+
+    def wrap(self, iterable, stage):
+        """
+        yields from iterable, time spent producing its items is charged to stage.
+        the stage is finished as soon as iterable is exhausted.
+        """
+        iterator = iter(iterable)
+        self.observer.stage_started(stage)
+        while True:
+            self.__enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                self.__exit()
+            yield item
+        self.__finish(stage)
+
+    def run(self, stage, function, *args, **kwargs):
+        """
+        calls function, time spent is charged to stage.
+        """
+        self.observer.stage_started(stage)
+        self.__enter(stage)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.__exit()
+            self.__finish(stage)
+
+    def __enter(self, stage):
+        now = time.perf_counter()
+        if self._stack:
+            self.__charge(now)
+        self._stack.append(stage)
+        self._mark = now
+
+    def __exit(self):
+        now = time.perf_counter()
+        self.__charge(now)
+        self._stack.pop()
+        self._mark = now
+
+    def __charge(self, now):
+        stage = self._stack[-1]
+        self._durations[stage] = self._durations.get(stage, 0.0) + now - self._mark
+
+    def __finish(self, stage):
+        self.observer.stage_finished(stage, self._durations.pop(stage, 0.0))
@@ -4,7 +4,6 @@ from typing import Iterator
 from pdfstructure.hierarchy.traversal import traverse_in_order
 from pdfstructure.model.document import Section, StructuredPdfDocument, TextElement
 from pdfstructure.model.style import Style
-from pdfstructure.utils import dict_subset
 
 
 class Printer:
@@ -85,34 +84,242 @@ def encode_pdf_element(obj):
     @return:
     """
     if isinstance(obj, TextElement):
-        properties = dict_subset(obj.__dict__.copy(), ("_data", "_text"))
-        properties["text"] = obj.text
-        properties["style"] = encode_pdf_element(obj.style)
-        return properties
+        return {"style": encode_pdf_element(obj.style), "page": obj.page, "text": obj.text}
     elif isinstance(obj, Style):
         properties = obj.__dict__.copy()
         properties["mapped_font_size"] = str(obj.mapped_font_size.name)
         return properties
+    elif isinstance(obj, Section):
+        # cached aggregates are not encoded
+        return {"heading": obj.heading, "children": obj.children, "level": obj.level}
+    elif isinstance(obj, StructuredPdfDocument):
+        return {"metadata": obj.metadata, "elements": obj.elements}
     else:
         return obj.__dict__
 
 
+class _JsonLayout:
+    """
+    whitespace of the json output, matches json.dumps with given indent.
+    """
+
+    def __init__(self, indent=4):
+        self.indent = indent
+        if indent is None:
+            self.separators = (",", ":")
+        else:
+            self.separators = (",", ": ")
+        self._newlines = []
+
+    def newline(self, depth):
+        """
+        @return: line break followed by indentation of given depth, empty in compact mode
+        """
+        if self.indent is None:
+            return ""
+        while len(self._newlines) <= depth:
+            self._newlines.append("\n" + " " * (self.indent * len(self._newlines)))
+        return self._newlines[depth]
+
+    def encode(self, value, depth):
+        """
+        encodes a value that is nested at given depth.
+        dicts with string keys, lists and scalars are encoded here, anything else by json.dumps.
+        """
+        if isinstance(value, str):
+            return json.encoder.encode_basestring_ascii(value)
+        elif value is None:
+            return "null"
+        elif value is True:
+            return "true"
+        elif value is False:
+            return "false"
+        elif isinstance(value, int):
+            return int.__repr__(value)
+        elif isinstance(value, float):
+            if value != value:
+                return "NaN"
+            elif value == float("inf"):
+                return "Infinity"
+            elif value == -float("inf"):
+                return "-Infinity"
+            return float.__repr__(value)
+        elif isinstance(value, dict) and all(isinstance(key, str) for key in value):
+            if not value:
+                return "{}"
+            key_separator = self.separators[1]
+            inner = self.newline(depth + 1)
+            items = ["{}{}{}{}".format(inner, json.encoder.encode_basestring_ascii(key), key_separator,
+                                       self.encode(item, depth + 1)) for key, item in value.items()]
+            return "{" + ",".join(items) + self.newline(depth) + "}"
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                return "[]"
+            inner = self.newline(depth + 1)
+            return "[" + ",".join(inner + self.encode(item, depth + 1) for item in value) + self.newline(depth) + "]"
+        elif isinstance(value, (TextElement, Style)):
+            return self.encode(encode_pdf_element(value), depth)
+        else:
+            encoded = json.dumps(value, default=encode_pdf_element, indent=self.indent, separators=self.separators)
+            # json strings never contain raw line breaks, thus each one is followed by indentation
+            return encoded.replace("\n", self.newline(depth)) if self.indent is not None else encoded
+
+
+def iter_json(document: StructuredPdfDocument, indent=4) -> Iterator[str]:
+    """
+    encodes document incrementally, chunk by chunk, as expected by StructuredPdfDocument.from_json.
+    the section tree is walked with an explicit stack, thus deep documents do not hit the recursion limit.
+    the concatenated chunks equal json.dumps(document, default=encode_pdf_element, indent=indent).
+    @param document:
+    @param indent: None for compact output without any whitespace
+    @return: json chunks
+    """
+    layout = _JsonLayout(indent)
+    newline = layout.newline
+    key_separator = layout.separators[1]
+    heading_key = '"heading"' + key_separator
+    children_key = '"children"' + key_separator
+    level_key = '"level"' + key_separator
+
+    yield "{" + newline(1) + '"metadata"' + key_separator + layout.encode(document.metadata, 1) + "," + \
+          newline(1) + '"elements"' + key_separator
+    if not document.elements:
+        yield "[]" + newline(0) + "}"
+        return
+
+    yield "["
+    # open lists of sections: iterator over remaining sections, depth of the list, section owning the list
+    stack = [(iter(document.elements), 1, None)]
+    first = True
+    while stack:
+        sections, depth, owner = stack[-1]
+        section = next(sections, None)
+        if section is None:
+            stack.pop()
+            if owner is None:
+                yield newline(depth) + "]" + newline(depth - 1) + "}"
+            else:
+                yield newline(depth) + "]," + newline(depth) + level_key + layout.encode(owner.level, depth) + \
+                      newline(depth - 1) + "}"
+            first = False
+            continue
+
+        chunk = ("" if first else ",") + newline(depth + 1) + "{" + newline(depth + 2) + heading_key + \
+                layout.encode(section.heading, depth + 2) + "," + newline(depth + 2) + children_key
+        if section.children:
+            yield chunk + "["
+            stack.append((iter(section.children), depth + 2, section))
+            first = True
+        else:
+            yield chunk + "[]," + newline(depth + 2) + level_key + layout.encode(section.level, depth + 2) + \
+                  newline(depth + 1) + "}"
+            first = False
+
+
+def write_json(document: StructuredPdfDocument, fp, indent=4, buffer_size=1 << 16):
+    """
+    writes document to a text file handle as it gets encoded, see iter_json.
+    @param buffer_size: chunks are collected until they exceed this amount of characters
+    """
+    buffered = []
+    size = 0
+    for chunk in iter_json(document, indent):
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            fp.write("".join(buffered))
+            buffered.clear()
+            size = 0
+    fp.write("".join(buffered))
+
+
 class JsonStringPrinter(Printer):
     def print(self, document: StructuredPdfDocument, *args, **kwargs):
-        return json.dumps(document, default=encode_pdf_element, indent=4)
+        """
+        @param document:
+        @param args:
+        @param kwargs:
+            Keyword Args:
+                compact (bool): no indentation & whitespace
+        @return: json string
+        """
+        return "".join(iter_json(document, indent=None if kwargs.get("compact") else 4))
 
 
 class JsonFilePrinter(Printer):
     def print(self, document: StructuredPdfDocument, *args, **kwargs):
         """
+        the document is written while it gets encoded, without building the whole json string in memory.
         @param document:
         @param args:
         @param kwargs:
             Keyword Args:
                 file_path (str): path to output file
+                compact (bool): no indentation & whitespace
         @return:
         """
         file_path = kwargs.get("file_path")
         with open(file_path, "w") as fp:
-            json.dump(document, fp=fp, default=encode_pdf_element, indent=4)
+            write_json(document, fp, indent=None if kwargs.get("compact") else 4)
         return file_path
+
+
+def iter_section_records(document: StructuredPdfDocument) -> Iterator[dict]:
+    """
+    flat representation of each section in order of traverse_in_order.
+    record fields:
+        id: position within the tree, child indices joined by "/", e.g. "5/0/2"
+        path: headings of all ancestors, top-level first
+        heading: heading text of the section
+        level: Section.level
+        page: page of the heading
+        style: style of the heading, encoded like the json printers do
+        content: top_level_content of the section, joined by line breaks
+    @param document:
+    @return: records
+    """
+    # section, id, headings of ancestors; children are pushed in reverse to pop them in order
+    stack = [(section, str(index), ()) for index, section in reversed(list(enumerate(document.elements)))]
+    while stack:
+        section, section_id, path = stack.pop()
+        heading = section.heading
+        yield {"id": section_id,
+               "path": list(path),
+               "heading": section.heading_text,
+               "level": section.level,
+               "page": heading.page if heading else None,
+               "style": encode_pdf_element(heading.style) if heading and heading.style else None,
+               "content": "\n".join(child.heading_text for child in section.top_level_content)}
+        if section.children:
+            child_path = path + (section.heading_text,)
+            stack.extend((child, "{}/{}".format(section_id, index), child_path)
+                         for index, child in reversed(list(enumerate(section.children))))
+
+
+class JsonLinesPrinter(Printer):
+    """
+    one json object per section and line, see iter_section_records. suited for bulk indexing.
+    """
+
+    def print(self, document: StructuredPdfDocument, *args, **kwargs):
+        """
+        @param document:
+        @param args:
+        @param kwargs:
+            Keyword Args:
+                file_path (str): path to output file
+                fp: text stream to write to, used instead of file_path
+        @return: file_path or fp if given, json lines string otherwise
+        """
+        encode = json.JSONEncoder(default=encode_pdf_element).encode
+        fp = kwargs.get("fp")
+        file_path = kwargs.get("file_path")
+        if fp is None and file_path is None:
+            return "".join(encode(record) + "\n" for record in iter_section_records(document))
+
+        if fp is None:
+            with open(file_path, "w") as fp:
+                fp.writelines(encode(record) + "\n" for record in iter_section_records(document))
+            return file_path
+        fp.writelines(encode(record) + "\n" for record in iter_section_records(document))
+        return fp
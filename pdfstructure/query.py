@@ -0,0 +1,341 @@
+"""
+Selectors of sections by heading path, level and page, answered by secondary indexes over the PreorderIndex.
+
+Selector syntax, filters separated by whitespace, all of them have to match:
+    path="Chapter 3 > Results"    headings from the top-level down to a header, * matches any single heading
+    level<=1                       Section.level, also <, >, >=, = and ranges like level=1..2
+    page=10..20                    pages of the section and its nested children overlap the range
+    header / paragraph             sections with / without children
+
+Indexes are built on first use only: a trie of the heading paths of headers, a bucket list of sections per level,
+the positions of headers and an interval tree of the pages spanned by each section. They are kept per document
+until its PreorderIndex changes. Selected sections are returned in order of traverse_in_order:
+    select(document, 'header level<=1')
+"""
+import json
+import re
+import threading
+import weakref
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+from pdfstructure.model.document import StructuredPdfDocument, Section, PreorderIndex
+
+FILTER = re.compile(r'\s*(?:(\w+)\s*(<=|>=|<|>|=)\s*("(?:[^"\\]|\\.)*"|[^\s"]+)|(\w+))')
+RANGE = re.compile(r"(-?\d+)?\.\.(-?\d+)?")
+# filters are applied in this order, the first one selects the candidates, the others check each candidate
+ORDER = ("path", "page", "level", "header")
+
+
+class Selector:
+    """
+    Immutable conjunction of filters, created by parse or by chaining the filter methods:
+        Selector().header().level(high=1).pages(10, 20)
+    """
+
+    def __init__(self, filters: Tuple = ()):
+        self.filters = filters
+
+    def __and(self, *selector_filter):
+        return Selector(self.filters + (selector_filter,))
+
+    def path(self, *headings):
+        """
+        @param headings: headings from the top-level down to a header, "*" matches any heading
+        """
+        return self.__and("path", tuple(heading.strip() for heading in headings))
+
+    def level(self, low: Optional[int] = None, high: Optional[int] = None):
+        """
+        Section.level within [low, high], None for open ends.
+        """
+        return self.__and("level", low, high)
+
+    def pages(self, first: Optional[int] = None, last: Optional[int] = None):
+        """
+        sections with content on any of the pages [first, last], None for open ends.
+        """
+        return self.__and("page", first, last)
+
+    def header(self, header=True):
+        """
+        @param header: sections with children if True, paragraphs (without children) otherwise
+        """
+        return self.__and("header", header)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def parse(selector: str) -> "Selector":
+        """
+        @param selector: see module docs
+        """
+        parsed = Selector()
+        position = 0
+        selector = selector.rstrip()
+        while position < len(selector):
+            match = FILTER.match(selector, position)
+            if not match or match.end() == position:
+                raise ValueError("invalid selector at {}: {}".format(position, selector[position:]))
+            position = match.end()
+            name, operator, value, flag = match.groups()
+            if flag in ("header", "paragraph"):
+                parsed = parsed.header(flag == "header")
+            elif name == "path" and operator == "=":
+                if value.startswith('"'):
+                    value = json.loads(value)
+                parsed = parsed.path(*value.split(">"))
+            elif name in ("level", "page") and operator:
+                low, high = Selector.__bounds(operator, value, selector)
+                parsed = parsed.level(low, high) if name == "level" else parsed.pages(low, high)
+            else:
+                raise ValueError("invalid selector filter: {}".format(match.group().strip()))
+        return parsed
+
+    @staticmethod
+    def __bounds(operator, value, selector):
+        try:
+            if operator == "=":
+                bounds = RANGE.fullmatch(value)
+                if bounds:
+                    return tuple(None if bound is None else int(bound) for bound in bounds.groups())
+                return int(value), int(value)
+            value = int(value)
+        except ValueError:
+            raise ValueError("invalid selector value {}: {}".format(value, selector))
+        return {"<": (None, value - 1), "<=": (None, value), ">": (value + 1, None), ">=": (value, None)}[operator]
+
+    def __repr__(self):
+        return "Selector{}".format(self.filters)
+
+
+class PageIntervals:
+    """
+    Interval tree of page ranges, implicit over the intervals sorted by their first page.
+    Each node of the binary tree holds the max last page of its range, subtrees ending before a query are skipped.
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int, int]]):
+        """
+
+        @param intervals: (first page, last page, section position)
+        """
+        intervals = sorted(intervals)
+        self.firsts = [first for first, _, _ in intervals]
+        self.positions = [position for _, _, position in intervals]
+        self.size = 1
+        while self.size < len(intervals):
+            self.size *= 2
+        self.max_last = [-1] * (2 * self.size)
+        for index, (_, last, _) in enumerate(intervals):
+            self.max_last[self.size + index] = last
+        for node in range(self.size - 1, 0, -1):
+            self.max_last[node] = max(self.max_last[2 * node], self.max_last[2 * node + 1])
+
+    def overlapping(self, first, last) -> List[int]:
+        """
+        @return: positions of the intervals overlapping [first, last], unordered
+        """
+        # only intervals starting at or before last, i.e. leaves [0, limit)
+        limit = bisect_right(self.firsts, last)
+        found = []
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self.max_last[node] < first:
+                continue
+            if node >= self.size:
+                found.append(self.positions[low])
+            else:
+                middle = (low + high) // 2
+                stack.append((2 * node + 1, middle, high))
+                stack.append((2 * node, low, middle))
+        return found
+
+
+class SectionIndexes:
+    """
+    Secondary indexes over the sections of a PreorderIndex, each one is built on first use.
+    """
+
+    def __init__(self, preorder: PreorderIndex):
+        """
+
+        @param preorder:
+        """
+        self.preorder = preorder
+        self._trie = None
+        self._headers = None
+        self._levels = None
+        self._spans = None
+        self._page_intervals = None
+
+    @property
+    def trie(self):
+        """
+        heading path trie of all sections with children,
+        node: [{heading: child node}, positions of the sections having that path]
+        """
+        if self._trie is None:
+            root = [{}, []]
+            nodes = {-1: root}
+            parents = self.preorder.parents
+            sections = self.preorder.sections
+            for position in self.headers:
+                section = sections[position]
+                children = nodes[parents[position]][0]
+                heading = section.heading_text.strip()
+                node = children.get(heading)
+                if node is None:
+                    node = children[heading] = [{}, []]
+                node[1].append(position)
+                nodes[position] = node
+            self._trie = root
+        return self._trie
+
+    @property
+    def headers(self) -> List[int]:
+        """
+        positions of all sections with children, ascending
+        """
+        if self._headers is None:
+            ends = self.preorder.ends
+            self._headers = [position for position in range(len(ends)) if ends[position] > position + 1]
+        return self._headers
+
+    @property
+    def levels(self) -> List[List[int]]:
+        """
+        bucket list, positions of all sections per Section.level
+        """
+        if self._levels is None:
+            buckets = []
+            for position, level in enumerate(self.preorder.levels):
+                if level is None:
+                    continue
+                while len(buckets) <= level:
+                    buckets.append([])
+                buckets[level].append(position)
+            self._levels = buckets
+        return self._levels
+
+    @property
+    def spans(self) -> List[Optional[Tuple[int, int]]]:
+        """
+        (first, last) page of the headings of each section and its nested children, None if none has a page
+        """
+        if self._spans is None:
+            sections = self.preorder.sections
+            spans = [None] * len(sections)
+            for position in range(len(sections) - 1, -1, -1):
+                heading = sections[position].heading
+                span = spans[position]
+                if heading is not None and heading.page is not None:
+                    page = heading.page
+                    span = (page, page) if span is None else (min(span[0], page), max(span[1], page))
+                    spans[position] = span
+                parent = self.preorder.parents[position]
+                if span is not None and parent >= 0:
+                    known = spans[parent]
+                    spans[parent] = span if known is None else (min(known[0], span[0]), max(known[1], span[1]))
+            self._spans = spans
+        return self._spans
+
+    @property
+    def page_intervals(self) -> PageIntervals:
+        if self._page_intervals is None:
+            self._page_intervals = PageIntervals([(span[0], span[1], position)
+                                                  for position, span in enumerate(self.spans) if span is not None])
+        return self._page_intervals
+
+    def select(self, selector: Selector) -> List[int]:
+        """
+        @return: positions of the selected sections within the PreorderIndex, ascending
+        """
+        filters = sorted(selector.filters, key=lambda selector_filter: ORDER.index(selector_filter[0]))
+        if not filters:
+            return list(range(len(self.preorder)))
+        candidates = self.__lookup(filters[0])
+        for selector_filter in filters[1:]:
+            if not candidates:
+                break
+            matches = self.__predicate(selector_filter)
+            candidates = [position for position in candidates if matches(position)]
+        return sorted(candidates)
+
+    def __lookup(self, selector_filter) -> List[int]:
+        kind = selector_filter[0]
+        if kind == "path":
+            nodes = [self.trie]
+            for heading in selector_filter[1]:
+                if heading == "*":
+                    nodes = [child for node in nodes for child in node[0].values()]
+                else:
+                    nodes = [node[0][heading] for node in nodes if heading in node[0]]
+            return [position for node in nodes for position in node[1]]
+        elif kind == "level":
+            _, low, high = selector_filter
+            buckets = self.levels
+            low = 0 if low is None else max(low, 0)
+            high = len(buckets) - 1 if high is None else min(high, len(buckets) - 1)
+            return [position for level in range(low, high + 1) for position in buckets[level]]
+        elif kind == "page":
+            _, first, last = selector_filter
+            return self.page_intervals.overlapping(float("-inf") if first is None else first,
+                                                   float("inf") if last is None else last)
+        elif selector_filter[1]:
+            return list(self.headers)
+        matches = self.__predicate(selector_filter)
+        return [position for position in range(len(self.preorder)) if matches(position)]
+
+    def __predicate(self, selector_filter):
+        kind = selector_filter[0]
+        if kind == "path":
+            selected = set(self.__lookup(selector_filter))
+            return selected.__contains__
+        elif kind == "level":
+            _, low, high = selector_filter
+            levels = self.preorder.levels
+            return lambda position: levels[position] is not None and \
+                (low is None or levels[position] >= low) and (high is None or levels[position] <= high)
+        elif kind == "page":
+            _, first, last = selector_filter
+            spans = self.spans
+            return lambda position: spans[position] is not None and \
+                (first is None or spans[position][1] >= first) and (last is None or spans[position][0] <= last)
+        header = selector_filter[1]
+        ends = self.preorder.ends
+        return lambda position: (ends[position] > position + 1) == header
+
+
+# SectionIndexes per document, dropped together with the document
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def section_indexes(document: StructuredPdfDocument) -> SectionIndexes:
+    """
+    secondary indexes of document used by select, rebuilt lazily together with its preorder_index.
+    """
+    preorder = document.preorder_index()
+    with _indexes_lock:
+        indexes = _indexes.get(document)
+        if indexes is None or indexes.preorder is not preorder:
+            indexes = _indexes[document] = SectionIndexes(preorder)
+    return indexes
+
+
+def select(document: StructuredPdfDocument, selector: Union[str, Selector]) -> List[Section]:
+    """
+    sections of document matching selector in order of traverse_in_order, e.g.
+        select(document, 'header level<=1')
+        select(document, 'path="Chapter 3 > Results"')
+        select(document, 'page=10..20')
+    @param document:
+    @param selector: selector string or Selector
+    """
+    if isinstance(selector, str):
+        selector = Selector.parse(selector)
+    indexes = section_indexes(document)
+    sections = indexes.preorder.sections
+    return [sections[position] for position in indexes.select(selector)]
@@ -0,0 +1,249 @@
+"""
+Inverted full-text index over the sections of one or more documents.
+
+Each section with children is indexed with two fields: its heading and its content, i.e. the paragraphs of
+top_level_content. Paragraphs without a parent section are indexed as content on their own. Postings map a term to
+the indexed sections containing it and the positions within the field, thus phrases are matched without looking at
+the text again. Results are ranked by BM25F and refer to sections by id and heading path, like the records of
+printer.iter_section_records.
+"""
+import json
+import math
+import re
+from collections import defaultdict
+from typing import List, Optional
+
+from pdfstructure.model.document import StructuredPdfDocument
+
+VERSION = 1
+TOKEN = re.compile(r"\w+")
+QUERY = re.compile(r'"([^"]*)"|(\S+)')
+HEADING = "heading"
+CONTENT = "content"
+FIELDS = (HEADING, CONTENT)
+
+
+def build_search_index(document: StructuredPdfDocument, name=None) -> "SearchIndex":
+    """
+    indexes the headings and contents of all sections, more documents can be added to the returned index.
+    @param document:
+    @param name: name referring to the document within results, see SearchIndex.add_document
+    """
+    index = SearchIndex()
+    index.add_document(document, name)
+    return index
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    lower-cased word tokens of text.
+    """
+    return TOKEN.findall(text.lower()) if text else []
+
+
+class SearchHit:
+    __slots__ = ("document", "id", "path", "score")
+
+    def __init__(self, document, section_id, path, score):
+        """
+
+        @param document: name of the document
+        @param section_id: position within the tree, child indices joined by "/", e.g. "5/0/2"
+        @param path: headings of the section and all its ancestors, top-level first
+        @param score: BM25 score
+        """
+        self.document = document
+        self.id = section_id
+        self.path = path
+        self.score = score
+
+    def __repr__(self):
+        return "SearchHit({!r}, {!r}, {!r}, {:.3f})".format(self.document, self.id, " > ".join(self.path), self.score)
+
+
+class SearchIndex:
+    """
+    Inverted index of a collection of documents, documents are added incrementally by add_document.
+    Queries are parsed by search: bare terms are optional and ranked, "quoted phrases" are required.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, heading_weight=2.0):
+        """
+
+        @param k1: BM25 term frequency saturation
+        @param b: BM25 field length normalisation
+        @param heading_weight: weight of heading matches relative to content matches
+        """
+        self.k1 = k1
+        self.b = b
+        self.weights = {HEADING: heading_weight, CONTENT: 1.0}
+        self.documents = []
+        # indexed sections: [document index, section id, path]
+        self.sections = []
+        self._lengths = {field: [] for field in FIELDS}
+        self._total_lengths = {field: 0 for field in FIELDS}
+        # field -> term -> {section number: positions}
+        self._postings = {field: defaultdict(dict) for field in FIELDS}
+
+    def __len__(self):
+        return len(self.sections)
+
+    def add_document(self, document: StructuredPdfDocument, name=None):
+        """
+        tokenizes and indexes all sections of document.
+        @param document:
+        @param name: name referring to the document within results, defaults to its filename or title
+        @return: name of the document
+        """
+        if name is None:
+            name = document.metadata.get("filename") or document.title or str(len(self.documents))
+        if name in self.documents:
+            raise ValueError("document {} is already indexed".format(name))
+        document_index = len(self.documents)
+        self.documents.append(name)
+
+        # section, id, headings of ancestors, see printer.iter_section_records
+        stack = [(section, str(index), ()) for index, section in reversed(list(enumerate(document.elements)))]
+        while stack:
+            section, section_id, path = stack.pop()
+            if section.children:
+                path = path + (section.heading_text,)
+                self.__add_section(document_index, section_id, path, section.heading_text,
+                                   [child.heading_text for child in section.top_level_content])
+                stack.extend((child, "{}/{}".format(section_id, index), path)
+                             for index, child in reversed(list(enumerate(section.children))) if child.children)
+            elif not path:
+                self.__add_section(document_index, section_id, path, "", [section.heading_text])
+        return name
+
+    def __add_section(self, document_index, section_id, path, heading, paragraphs):
+        number = len(self.sections)
+        self.sections.append([document_index, section_id, list(path)])
+        for field, texts in ((HEADING, [heading]), (CONTENT, paragraphs)):
+            postings = self._postings[field]
+            position = 0
+            for text in texts:
+                for term in tokenize(text):
+                    postings[term].setdefault(number, []).append(position)
+                    position += 1
+                # gap between paragraphs, phrases do not span them
+                position += 1
+            length = max(position - len(texts), 0)
+            self._lengths[field].append(length)
+            self._total_lengths[field] += length
+
+    def search(self, query: str, heading_only=False, limit: Optional[int] = 10) -> List[SearchHit]:
+        """
+        @param query: terms and "quoted phrases", e.g. 'queue "breadth first"'
+        @param heading_only: match headings only
+        @param limit: max number of hits, None for all
+        @return: hits ranked by score
+        """
+        phrases, terms = [], []
+        for phrase, term in QUERY.findall(query):
+            if phrase:
+                tokens = tokenize(phrase)
+                if tokens:
+                    phrases.append(tokens)
+            else:
+                terms.extend(tokenize(term))
+        fields = (HEADING,) if heading_only else FIELDS
+
+        scores = defaultdict(float)
+        required = None
+        for tokens in phrases:
+            matches = {field: self.__phrase_frequencies(field, tokens) for field in fields}
+            self.__score(scores, matches)
+            matched = set().union(*matches.values())
+            required = matched if required is None else required & matched
+        for term in set(terms):
+            self.__score(scores, {field: {number: len(positions) for number, positions in
+                                          self._postings[field].get(term, {}).items()} for field in fields})
+
+        numbers = required if required is not None else scores
+        hits = sorted(numbers, key=lambda number: (-scores[number], number))
+        if limit is not None:
+            hits = hits[:limit]
+        return [self.__hit(number, scores[number]) for number in hits]
+
+    def __phrase_frequencies(self, field, tokens) -> dict:
+        """
+        @return: section number -> occurrences of the phrase within field
+        """
+        postings = [self._postings[field].get(term) for term in tokens]
+        if not all(postings):
+            return {}
+        # start with the rarest term, candidates have to contain all of them
+        rarest = min(range(len(tokens)), key=lambda index: len(postings[index]))
+        frequencies = {}
+        for number, positions in postings[rarest].items():
+            if not all(number in posting for posting in postings):
+                continue
+            others = [(offset - rarest, set(postings[offset][number])) for offset in range(len(tokens))
+                      if offset != rarest]
+            count = sum(1 for position in positions
+                        if all(position + shift in other for shift, other in others))
+            if count:
+                frequencies[number] = count
+        return frequencies
+
+    def __score(self, scores, frequencies: dict):
+        """
+        adds the BM25F score of one term or phrase to scores.
+        @param frequencies: field -> section number -> occurrences
+        """
+        matched = set().union(*frequencies.values())
+        if not matched:
+            return
+        idf = math.log(1 + (len(self.sections) - len(matched) + 0.5) / (len(matched) + 0.5))
+        weighted = defaultdict(float)
+        for field, counts in frequencies.items():
+            average = self._total_lengths[field] / len(self.sections) or 1
+            lengths = self._lengths[field]
+            for number, count in counts.items():
+                normalisation = 1 - self.b + self.b * lengths[number] / average
+                weighted[number] += self.weights[field] * count / normalisation
+        for number, frequency in weighted.items():
+            scores[number] += idf * frequency * (self.k1 + 1) / (frequency + self.k1)
+
+    def __hit(self, number, score) -> SearchHit:
+        document_index, section_id, path = self.sections[number]
+        return SearchHit(self.documents[document_index], section_id, path, score)
+
+    def to_json(self) -> dict:
+        return {"version": VERSION,
+                "parameters": {"k1": self.k1, "b": self.b, "heading_weight": self.weights[HEADING]},
+                "documents": self.documents,
+                "sections": self.sections,
+                "lengths": self._lengths,
+                "postings": {field: {term: list(postings.items()) for term, postings in self._postings[field].items()}
+                             for field in FIELDS}}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "SearchIndex":
+        if data.get("version") != VERSION:
+            raise ValueError("unsupported search index version {}".format(data.get("version")))
+        index = cls(**data["parameters"])
+        index.documents = data["documents"]
+        index.sections = data["sections"]
+        for field in FIELDS:
+            index._lengths[field] = data["lengths"][field]
+            index._total_lengths[field] = sum(index._lengths[field])
+            postings = index._postings[field]
+            for term, entries in data["postings"][field].items():
+                postings[term] = {number: positions for number, positions in entries}
+        return index
+
+    def save(self, fp):
+        """
+        @param fp: text stream
+        """
+        json.dump(self.to_json(), fp, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, fp) -> "SearchIndex":
+        """
+        @param fp: text stream written by save
+        """
+        return cls.from_json(json.load(fp))
+
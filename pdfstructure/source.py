@@ -1,9 +1,37 @@
+import bisect
+import copy
+import hashlib
+import io
 import itertools
+import json
+import mmap
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
 from typing import Generator, Any
 
+import numpy as np
+from pdfminer.converter import PDFPageAggregator
 from pdfminer.high_level import extract_pages
 from pdfminer.layout import LTTextContainer, LAParams, LTFigure, LTTextBoxHorizontal, LTTextLineHorizontal, LTChar, \
-    LTTextBoxVertical
+    LTTextBoxVertical, LTPage, LTTextLineVertical, LTComponent, LTAnno, LTText
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from pdfminer.utils import open_filename
+
+from pdfstructure.analysis.chartable import CharTable
+from pdfstructure.utils import write_atomic
+
+# pdfminer's default LAParams values, used for grouping characters into lines in FileSource.pre_scan()
+LINE_OVERLAP = 0.5
+CHAR_MARGIN = 2.0
+WORD_MARGIN = 0.1
 
 
 class Source:
@@ -34,18 +62,407 @@ class Source:
         """
         pass
 
+    def pre_scan(self, *args, **kwargs) -> Generator[LTTextContainer, Any, None]:
+        """
+        yields text lines sufficient for the style analysis, defaults to read().
+        @param args:
+        @param kwargs:
+        @return:
+        """
+        return self.read(*args, **kwargs)
+
+    def available_pages(self):
+        """
+        zero-indexed page numbers that can be read from the source, None if unknown.
+        @return:
+        """
+        return None
+
+    def fingerprint(self):
+        """
+        identifies the content of the source and all settings that affect what is read, used as cache key.
+        @return: string, None if the source can't be identified
+        """
+        return None
+
+
+def extract_raw_pages(pdf_file, page_numbers=None) -> Generator[LTPage, Any, None]:
+    """
+    yields pages as interpreted by pdfminer, but without running its layout analysis.
+    each page still holds the plain characters (LTChar), figures, lines, etc. as found in the content stream.
+    @param pdf_file: path or file-like object
+    @param page_numbers: zero-indexed page numbers to extract
+    """
+    with open_filename(pdf_file, "rb") as fp:
+        resource_manager = PDFResourceManager()
+        device = PDFPageAggregator(resource_manager, laparams=None)
+        interpreter = PDFPageInterpreter(resource_manager, device)
+        for page in PDFPage.get_pages(fp, page_numbers):
+            interpreter.process_page(page)
+            yield device.get_result()
+
+
+def group_chars_to_lines(objs) -> Generator[LTTextLineHorizontal, Any, None]:
+    """
+    lightweight version of pdfminers character grouping (LTLayoutContainer.group_objects), horizontal lines only.
+    consecutive characters are put on the same line as long as they are horizontally aligned.
+    @param objs: layout objects in content stream order, anything else than LTChar is skipped
+    """
+    line = None
+    prior = None
+    for char in objs:
+        if not isinstance(char, LTChar):
+            continue
+        if prior is not None and prior.is_voverlap(char) \
+                and min(prior.height, char.height) * LINE_OVERLAP < prior.voverlap(char) \
+                and prior.hdistance(char) < max(prior.width, char.width) * CHAR_MARGIN:
+            line.add(char)
+        else:
+            if line is not None:
+                yield line
+            line = LTTextLineHorizontal(WORD_MARGIN)
+            line.add(char)
+        prior = char
+    if line is not None:
+        yield line
+
+
+class PlainChar(LTChar):
+    """
+    Character rebuilt from plain data (see encode_container), holds text, bbox, size and fontname only.
+    """
+
+    def __init__(self, text, bbox, size, fontname):
+        LTComponent.__init__(self, bbox)
+        self._text = text
+        self.size = size
+        self.fontname = fontname
+
+
+_CONTAINER_TYPES = {container_type.__name__: container_type for container_type in
+                    (LTTextBoxHorizontal, LTTextBoxVertical, LTTextLineHorizontal, LTTextLineVertical)}
+
+
+def encode_container(container: LTTextContainer) -> tuple:
+    """
+    converts a paragraph into plain, picklable data without any pdfminer objects.
+        paragraph:  (type name, bbox, [line, ..])
+        line:       (type name, bbox, [character or annotation, ..])
+        character:  (text, bbox, size, fontname)
+        annotation: text, e.g. whitespace or newline inserted by the layout analysis
+    """
+    lines = []
+    for line in container:
+        objs = []
+        for obj in line:
+            if isinstance(obj, LTChar):
+                objs.append((obj.get_text(), obj.bbox, obj.size, obj.fontname))
+            elif isinstance(obj, LTText):
+                objs.append(obj.get_text())
+        lines.append((type(line).__name__, line.bbox, objs))
+    return type(container).__name__, container.bbox, lines
+
+
+def decode_container(data: tuple) -> LTTextContainer:
+    """
+    rebuilds a paragraph from plain data created by encode_container.
+    """
+    container_type, bbox, lines = data
+    container = _CONTAINER_TYPES[container_type]()
+    for line_type, line_bbox, objs in lines:
+        line = _CONTAINER_TYPES[line_type](0)
+        line._objs = [LTAnno(obj) if isinstance(obj, str) else PlainChar(*obj) for obj in objs]
+        line.set_bbox(line_bbox)
+        container._objs.append(line)
+    container.set_bbox(bbox)
+    return container
+
+
+def encode_layout_objects(objs) -> list:
+    """
+    converts the content of a page or figure without layout analysis into plain data, see encode_page.
+        character:  ("c", text, bbox, size, fontname)
+        figure:     ("f", name, bbox, [object, ..])
+        other:      ("o", bbox), e.g. lines, curves or images, only their position is kept
+    """
+    encoded = []
+    for obj in objs:
+        if isinstance(obj, LTChar):
+            encoded.append(("c", obj.get_text(), obj.bbox, obj.size, obj.fontname))
+        elif isinstance(obj, LTFigure):
+            encoded.append(("f", obj.name, obj.bbox, encode_layout_objects(obj)))
+        elif isinstance(obj, LTComponent):
+            encoded.append(("o", obj.bbox))
+    return encoded
+
+
+def decode_layout_objects(data: list) -> list:
+    # sequences may be lists if restored from json, bboxes are tuples again
+    objs = []
+    for obj in data:
+        if obj[0] == "c":
+            _, text, bbox, size, fontname = obj
+            objs.append(PlainChar(text, tuple(bbox), size, fontname))
+        elif obj[0] == "f":
+            _, name, bbox, children = obj
+            figure = LTFigure(name, (0, 0, 0, 0), (1, 0, 0, 1, 0, 0))
+            figure.extend(decode_layout_objects(children))
+            figure.set_bbox(tuple(bbox))
+            objs.append(figure)
+        else:
+            objs.append(LTComponent(tuple(obj[1])))
+    return objs
+
+
+def encode_page(page: LTPage) -> tuple:
+    """
+    converts a page as extracted by extract_raw_pages into plain data: (pageid, bbox, rotate, [object, ..])
+    only strings, numbers and sequences are used, thus pages can be stored as json.
+    """
+    return page.pageid, page.bbox, page.rotate, encode_layout_objects(page)
+
+
+def decode_page(data: tuple) -> LTPage:
+    """
+    rebuilds a page created by encode_page, ready for pdfminers layout analysis (LTPage.analyze).
+    """
+    pageid, bbox, rotate, objs = data
+    page = LTPage(pageid, tuple(bbox), rotate)
+    page.extend(decode_layout_objects(objs))
+    return page
+
+
+def encode_page_json(page: LTPage) -> bytes:
+    """
+    serializes a page for the layout cache. json is used instead of pickle,
+    loading a cache file must never execute code, even if the directory was tampered with.
+    """
+    return zlib.compress(json.dumps(encode_page(page), separators=(",", ":")).encode("utf-8"), 1)
+
+
+def decode_page_json(data: bytes) -> LTPage:
+    return decode_page(json.loads(zlib.decompress(data).decode("utf-8")))
+
+
+def hash_pdf(fp) -> str:
+    """
+    @param fp: binary file object, read from the start
+    @return: sha256 hex digest of its content
+    """
+    content = hashlib.sha256()
+    fp.seek(0)
+    for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+        content.update(chunk)
+    return content.hexdigest()
+
+
+@lru_cache(maxsize=1024)
+def _hash_file(path, mtime_ns, size):
+    with open(path, "rb") as fp:
+        return hash_pdf(fp)
+
+
+def hash_file(path) -> str:
+    """
+    sha256 hex digest of a file, memoized as long as path, modification time and size of the file stay the same.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def read_chunk(source: Source):
+    """
+    worker function of parallel reads, reads the pages of given source and returns them as plain data.
+    @return: list of (page number within chunk or None, encoded paragraph)
+    """
+    return [(getattr(element, "page", None), encode_container(element)) for element in source.read()]
+
 
 class FileSource(Source):
-    def __init__(self, file_path: str, page_numbers=None,
-                 la_params=LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)):
+    """
+    Reads paragraphs from a PDF file.
+    Thread-safe: the configuration is never modified by read(), overrides only apply to the read they are passed to.
+    Thus a source can be read concurrently and repeatedly with different settings.
+    """
+
+    def __init__(self, file_path: str, page_numbers=None, la_params: LAParams = None,
+                 reuse_layout=False, workers=None, pages_per_chunk=8, layout_cache=None):
+        """
+
+        @param file_path: path to pdf file
+        @param page_numbers: zero-indexed page numbers to read, all pages if None
+        @param la_params: pdfminer layout analysis parameters,
+            defaults to LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)
+        @param reuse_layout: keep the raw characters of each page from the first read in memory.
+            following reads (e.g. with an adapted line_margin) redo the layout analysis on that data,
+            instead of interpreting the whole PDF again.
+        @param workers: read pages in parallel using a pool of #workers processes (not combined with reuse_layout).
+            paragraphs are sent back as plain data and rebuilt without font & graphic state information.
+            the source is copied to each worker, thus it has to be picklable.
+        @param pages_per_chunk: amount of pages read by a worker at once
+        @param layout_cache: directory to persist the characters of each page (text, position, size & fontname).
+            pages are stored per document content on first read, later reads with any parser or layout settings
+            are served from there without interpreting the PDF again. pages are stored as compressed json.
+        """
         super().__init__(uri=file_path)
         self.page_numbers = page_numbers
-        self.la_params = la_params
+        self.la_params = la_params if la_params else LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)
+        self.reuse_layout = reuse_layout
+        self.workers = workers
+        self.pages_per_chunk = pages_per_chunk
+        self.layout_cache = layout_cache
+        self._raw_pages = None
 
     def config(self):
-        return self.__dict__
+        return {key: value for key, value in self.__dict__.items() if key != "_raw_pages"}
+
+    @contextmanager
+    def open_pdf(self):
+        """
+        opens the PDF for a single read.
+        @return: context manager yielding a file path or a seekable binary file object
+        """
+        yield self.uri
 
-    def __handle_lt_figure(self, element: LTFigure):
+    def content_hash(self):
+        """
+        @return: sha256 hex digest of the pdf content, files are only read again once they changed (see hash_file)
+        """
+        with self.open_pdf() as pdf:
+            if isinstance(pdf, (str, os.PathLike)):
+                return hash_file(pdf)
+            with open_filename(pdf, "rb") as fp:
+                return hash_pdf(fp)
+
+    def fingerprint(self):
+        return "{} pages={} la_params={}".format(self.content_hash(),
+                                                 sorted(self.page_numbers) if self.page_numbers else None,
+                                                 sorted(vars(self.la_params).items()))
+
+    def available_pages(self):
+        if self.page_numbers:
+            return sorted(self.page_numbers)
+        with self.open_pdf() as pdf, open_filename(pdf, "rb") as fp:
+            document = PDFDocument(PDFParser(fp))
+            return list(range(resolve1(document.catalog["Pages"])["Count"]))
+
+    def __iter_raw_pages(self, page_numbers) -> Generator[LTPage, Any, None]:
+        """
+        yields pages without layout analysis, restored from memory if kept by a prior read (see reuse_layout).
+        """
+        raw = self._raw_pages
+        if raw and raw[0] == page_numbers:
+            for (pageid, bbox, rotate), objs in raw[1]:
+                # fresh page holding the plain characters, kept pages are never modified
+                page = LTPage(pageid, bbox, rotate)
+                page.extend(objs)
+                yield page
+            return
+
+        raw_pages = []
+        for page in self.__extract_raw_pages(page_numbers):
+            if self.reuse_layout:
+                raw_pages.append(((page.pageid, page.bbox, page.rotate), tuple(page)))
+            yield page
+        # only keep complete reads
+        if self.reuse_layout:
+            self._raw_pages = (page_numbers, raw_pages)
+
+    def __extract_raw_pages(self, page_numbers) -> Generator[LTPage, Any, None]:
+        """
+        yields pages without layout analysis, served from the layout cache directory if enabled.
+        """
+        if not self.layout_cache:
+            with self.open_pdf() as pdf:
+                yield from extract_raw_pages(pdf, page_numbers=page_numbers)
+            return
+
+        directory = Path(self.layout_cache) / self.content_hash()
+        pages = sorted(set(page_numbers)) if page_numbers else None
+        if pages is None and (directory / "pages").exists():
+            pages = range(int((directory / "pages").read_text()))
+        if pages is not None and all((directory / "{}.page.json".format(number)).exists() for number in pages):
+            for number in pages:
+                yield decode_page_json((directory / "{}.page.json".format(number)).read_bytes())
+            return
+
+        directory.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with self.open_pdf() as pdf:
+            numbers = pages if pages is not None else itertools.count()
+            for number, page in zip(numbers, extract_raw_pages(pdf, page_numbers=pages)):
+                write_atomic(directory / "{}.page.json".format(number), encode_page_json(page))
+                count += 1
+                yield page
+        if pages is None:
+            # all pages are stored
+            write_atomic(directory / "pages", str(count).encode())
+
+    def __iter_layouts(self, la_params, page_numbers) -> Generator[LTPage, Any, None]:
+        """
+        yields analysed pages, either freshly extracted by pdfminer or rebuilt from raw page data,
+        kept by a prior read or stored in the layout cache.
+        """
+        if not self.reuse_layout and not self.layout_cache:
+            with self.open_pdf() as pdf:
+                yield from extract_pages(pdf, laparams=la_params, page_numbers=page_numbers)
+            return
+
+        for page in self.__iter_raw_pages(page_numbers):
+            page.analyze(la_params)
+            yield page
+
+    def __read_parallel(self, la_params, page_numbers, observer=None) -> Generator[LTTextContainer, Any, None]:
+        """
+        splits pages into chunks which are read by worker processes, paragraphs are yielded in page order.
+        """
+        pages = sorted(page_numbers) if page_numbers else self.available_pages()
+        chunks = [pages[i:i + self.pages_per_chunk] for i in range(0, len(pages), self.pages_per_chunk)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(read_chunk, [self.__chunk_source(chunk, la_params) for chunk in chunks])
+            offset = 0
+            for chunk, elements in zip(chunks, results):
+                for page, data in elements:
+                    element = decode_container(data)
+                    if page is not None:
+                        element.page = offset + page
+                    yield element
+                if observer is not None:
+                    for page in range(offset, offset + len(chunk)):
+                        observer.page_done(page)
+                offset += len(chunk)
+
+    def __chunk_source(self, page_numbers, la_params):
+        """
+        copy of this source that reads given pages serially, sent to a worker process.
+        """
+        source = copy.copy(self)
+        source.page_numbers = page_numbers
+        source.la_params = la_params
+        source.workers = None
+        source._raw_pages = None
+        return source
+
+    def pre_scan(self, override_page_numbers=None) -> Generator[LTTextContainer, Any, None]:
+        """
+        lightweight alternative to read() for the style analysis (count_sizes).
+        skips pdfminers layout analysis, characters are grouped into plain text lines in content stream order,
+        no paragraphs are built. yields one container holding all lines per page.
+        """
+        page_numbers = self.page_numbers if not override_page_numbers else override_page_numbers
+        for pNumber, page in enumerate(self.__iter_raw_pages(page_numbers)):
+            container = LTTextBoxHorizontal()
+            container.page = pNumber
+            figures = [element for element in page if isinstance(element, LTFigure)]
+            for objs in [page] + figures:
+                for line in group_chars_to_lines(objs):
+                    container.add(line)
+            if not container.is_empty():
+                yield container
+
+    @staticmethod
+    def __handle_lt_figure(element: LTFigure, la_params: LAParams):
         """
         sometimes pieces of text are wrongly detected as LTFigure, e.g. in slide-sets with border lines.
         -> extract text from LTFigure line by line put them into a LTTextBoxHorizontal as a workaround
@@ -63,7 +480,7 @@ class FileSource(Source):
             if isinstance(letter, LTChar):
                 if abs(letter.y0 - y_prior) > 0.05:
                     # new line, yield wrapper
-                    wrapper.analyze(self.la_params)
+                    wrapper.analyze(la_params)
                     yield wrapper
 
                     wrapper = LTTextBoxHorizontal()
@@ -73,56 +490,221 @@ class FileSource(Source):
 
                 line.add(letter)
 
-    def split_boxes_by_style(self, container: LTTextContainer) -> Generator[LTTextContainer, LTTextContainer, None]:
+    @staticmethod
+    def style_breaks(table: CharTable) -> list:
+        """
+        lines of given table that start a new paragraph, as the max size within their first 10 objects differs
+        by more than 15% from the prior line.
+        @return: sorted line indices
+        """
+        sizes, _ = table.line_max_sizes(first_positions=10)
+        prior, current = sizes[:-1], sizes[1:]
+        with np.errstate(invalid="ignore"):
+            breaks = (prior != current) & (np.maximum(prior, current) / np.minimum(prior, current) > 1.15)
+        return (np.flatnonzero(breaks) + 1).tolist()
+
+    def split_boxes_by_style(self, container: LTTextContainer, table: CharTable = None, breaks=None,
+                             first_line=0) -> Generator[LTTextContainer, LTTextContainer, None]:
         """
         pdfminers paragraphs are sometimes too broad and contain lines that should be splitted into header and content
+        each part keeps a view on its characters as char_table.
         @param container: the extracted original paragraph
+        @param table: CharTable holding the container, e.g. of the whole page. created for the container if None
+        @param breaks: style_breaks of table
+        @param first_line: index of the containers first line within table
         """
+        if table is None:
+            table = CharTable.from_containers([container])
+            breaks = self.style_breaks(table)
+            first_line = 0
+        lines = list(container)
+        end_line = first_line + len(lines)
+
         if isinstance(container, LTTextBoxVertical):
+            container.char_table = table.lines(first_line, end_line)
             yield container
             return
 
-        line: LTTextLineHorizontal
-        wrapper = LTTextBoxHorizontal()
-        wrapper.page = container.page
-        stack = []
-        for line in container:
-            size = max([obj.size for obj in itertools.islice(line, 10) if isinstance(obj, LTChar)])
-            if not stack:
-                wrapper.add(line)
-                stack.append(size)
-            else:
-                prior = stack.pop()
-                stack.append(size)
-                diff = abs(prior - size)
-                if diff != 0 and max(prior, size) / min(prior, size) > 1.15:
-                    # break paragraph
-                    yield wrapper
-                    wrapper = LTTextBoxHorizontal()
+        start = bisect.bisect_right(breaks, first_line)
+        end = bisect.bisect_left(breaks, end_line, lo=start)
+        bounds = [first_line] + breaks[start:end] + [end_line]
+
+        for index, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            wrapper = LTTextBoxHorizontal()
+            if index == 0:
+                wrapper.page = container.page
+            for line in lines[start - first_line:end - first_line]:
                 wrapper.add(line)
-        yield wrapper
+            wrapper.char_table = table.lines(start, end)
+            yield wrapper
 
-    def read(self, override_la_params=None, override_page_numbers=None) -> Generator[LTTextContainer, Any, None]:
+    def read(self, override_la_params=None, override_page_numbers=None,
+             observer=None) -> Generator[LTTextContainer, Any, None]:
+        """
+        yields flat list of paragraphs within a document.
+        @param override_la_params: line_margin is used instead of the configured one
+        @param override_page_numbers: read these pages instead of the configured ones
+        @param observer: ParseObserver notified about each page, paragraph splits and LTFigure rewrites.
+            splits and rewrites are not reported for parallel reads
+        """
         pNumber = 0
         # disable boxes_flow, style based hierarchy detection is based on purely flat list of paragraphs
         # params = LAParams(boxes_flow=None, detect_vertical=False)  # setting for easy doc
         # params = LAParams(boxes_flow=0.5, detect_vertical=True) # setting for column doc
+        la_params = copy.copy(self.la_params)
         if override_la_params:
             # use dynamic line_margin
-            self.la_params.line_margin = override_la_params.line_margin
+            la_params.line_margin = override_la_params.line_margin
+        page_numbers = self.page_numbers if not override_page_numbers else override_page_numbers
         # todo, do pre-analysis in count_sizes --> are there many boxes within same line
         # todo, understand LAParams, for columns, NONE works better, for vertical only layout LAParams(boxes_flow=None, detect_vertical=False) works better!! :O
         #   do some sort of layout analyis, if there are many boxes vertically next to each other, use layout analysis
         #   - column type
         #   - straight forward document
-        for page_layout in extract_pages(self.uri,
-                                         laparams=self.la_params,
-                                         page_numbers=self.page_numbers if not override_page_numbers else override_page_numbers):
+        if self.workers and self.workers > 1:
+            yield from self.__read_parallel(la_params, page_numbers, observer)
+            return
+
+        for page_layout in self.__iter_layouts(la_params, page_numbers):
+            # characters of all paragraphs on the page are analysed at once
+            table = CharTable.from_containers([element for element in page_layout
+                                               if isinstance(element, LTTextContainer)])
+            breaks = self.style_breaks(table)
+            box = 0
             for element in page_layout:
                 element.page = pNumber
                 if isinstance(element, LTTextContainer):
-                    yield from self.split_boxes_by_style(element)
+                    parts = self.split_boxes_by_style(element, table, breaks, table.box_lines[box])
+                    box += 1
+                    if observer is not None:
+                        parts = list(parts)
+                        if len(parts) > 1:
+                            observer.box_split(element, len(parts))
+                    yield from parts
                     #yield element
                 elif isinstance(element, LTFigure):
-                    yield from self.__handle_lt_figure(element)
+                    lines = self.__handle_lt_figure(element, la_params)
+                    if observer is not None:
+                        lines = list(lines)
+                        if lines:
+                            observer.figure_rewritten(element, len(lines))
+                    yield from lines
+            if observer is not None:
+                observer.page_done(pNumber)
             pNumber += 1
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable binary file object on top of a buffer (bytes, memoryview, mmap).
+    The payload is not copied, only the requested chunks are.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._position + size, len(self._view))
+        data = self._view[self._position:end].tobytes()
+        self._position = max(self._position, end)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = len(self._view) + offset
+        else:
+            raise ValueError("invalid whence ({})".format(whence))
+        self._position = max(self._position, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
+class BytesSource(FileSource):
+    """
+    Reads a PDF held in memory, e.g. a request body. Each read works on its own cursor without copying the payload.
+    """
+
+    def __init__(self, data, filename=None, **kwargs):
+        """
+
+        @param data: pdf content as bytes, bytearray or memoryview
+        @param filename: name stored in the document metadata, optional
+        @param kwargs: see FileSource
+        """
+        super().__init__(file_path=filename, **kwargs)
+        self.data = data
+
+    def config(self):
+        return {key: value for key, value in super().config().items() if key != "data"}
+
+    @contextmanager
+    def open_pdf(self):
+        yield BufferReader(self.data)
+
+
+class StreamSource(FileSource):
+    """
+    Reads a PDF from a seekable binary file object, which is rewound for each read.
+    Reads share the file position, thus a StreamSource must not be read concurrently.
+    """
+
+    def __init__(self, stream, filename=None, **kwargs):
+        """
+
+        @param stream: seekable binary file object
+        @param filename: name stored in the document metadata, defaults to stream.name if available
+        @param kwargs: see FileSource
+        """
+        if filename is None and isinstance(getattr(stream, "name", None), str):
+            filename = stream.name
+        super().__init__(file_path=filename, **kwargs)
+        self.stream = stream
+
+    @contextmanager
+    def open_pdf(self):
+        self.stream.seek(0)
+        yield self.stream
+
+
+class MmapSource(FileSource):
+    """
+    Reads a PDF file through a read-only memory map, which is created per read.
+    Large files are paged in by the OS on demand and shared between concurrent reads.
+    """
+
+    def __init__(self, file_path: str, filename=None, **kwargs):
+        """
+
+        @param file_path: path to pdf file
+        @param filename: name stored in the document metadata, defaults to the name of file_path
+        @param kwargs: see FileSource
+        """
+        super().__init__(file_path=filename if filename else file_path, **kwargs)
+        self.file_path = file_path
+
+    def content_hash(self):
+        return hash_file(self.file_path)
+
+    @contextmanager
+    def open_pdf(self):
+        with open(self.file_path, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
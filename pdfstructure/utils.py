@@ -1,12 +1,17 @@
 import itertools
 import math
 import os
+import re
+import threading
 from pathlib import Path
 from typing import Generator
 
 from pdfminer.high_level import extract_pages
 from pdfminer.layout import LTTextContainer, LTChar, LTTextLine, LAParams, LTTextLineHorizontal
 
+# enumerated headers like "1.2" or "3:"
+numeration_pattern = re.compile("^(?=.*\\d+)((?=.*\\.)|(?=.*:)).*$")
+
 
 def char_generator(text_container: LTTextContainer):
     for container in text_container:
@@ -67,6 +72,16 @@ def element_generator(file_path: str, page_numbers=None) -> Generator[LTTextCont
         pNumber += 1
 
 
+def write_atomic(path: Path, data: bytes):
+    """
+    write to temporary file first, concurrent readers never see partially written files.
+    the temporary file is unique per process & thread.
+    """
+    tmp = path.with_name("{}.{}.{}.tmp".format(path.name, os.getpid(), threading.get_ident()))
+    tmp.write_bytes(data)
+    os.replace(str(tmp), str(path))
+
+
 def truncate(number, decimals=0):
     """
     Returns a value truncated to a specific number of decimal places.
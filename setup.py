@@ -6,5 +6,5 @@ setup(
     version='0.0.1',
     author="Christian Hofer",
     author_email="christianhofer91@gmail.com",
-    packages=find_packages(exclude=("tests"))
+    packages=find_packages(exclude=("tests", "benchmarks"))
 )
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks import scaling
+from benchmarks.stages import run, compare, PRINTERS
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order, get_document_depth
+from pdfstructure.model.document import StructuredPdfDocument
+
+
+class TestStageBenchmark(TestCase):
+    test_doc = str(Path("resources/samplepptx.pdf").absolute())
+
+    def test_run(self):
+        results = json.loads(json.dumps(run([self.test_doc], repeat=1)))
+        stages = results["documents"]["samplepptx.pdf"]
+
+        expected = ["extraction", "count_sizes", "annotate", "create_hierarchy", "traversal"] + \
+                   ["print:{}".format(name) for name in PRINTERS]
+        self.assertListEqual(expected, list(stages))
+        for measured in stages.values():
+            self.assertGreaterEqual(measured["time"], 0)
+            self.assertGreaterEqual(measured["peak_memory"], 0)
+        self.assertGreater(stages["extraction"]["peak_memory"], 0)
+        self.assertEqual([], compare(results, results, threshold=0.0))
+
+    def test_compare(self):
+        baseline = {"documents": {"a.pdf": {"extraction": {"time": 1.0, "peak_memory": 1000000},
+                                            "traversal": {"time": 0.001, "peak_memory": 100}}}}
+        current = {"documents": {"a.pdf": {"extraction": {"time": 1.3, "peak_memory": 1100000},
+                                           "traversal": {"time": 0.003, "peak_memory": 1000},
+                                           "print:New": {"time": 1.0, "peak_memory": 100}},
+                                 "b.pdf": {"extraction": {"time": 2.0, "peak_memory": 100}}}}
+
+        self.assertListEqual([("a.pdf", "extraction", "time", 1.0, 1.3)], compare(baseline, current, threshold=0.25))
+        self.assertListEqual([], compare(baseline, current, threshold=0.5))
+        self.assertEqual(2, len(compare(baseline, current, threshold=0.05)))
+
+
+class TestScalingBenchmark(TestCase):
+
+    def test_synthetic_elements(self):
+        for depth in (1, 3, 6):
+            levels = []
+            elements = list(scaling.synthetic_elements(2000, depth=depth, header_ratio=0.3, levels=levels))
+            sections = HierarchyParser().create_hierarchy(elements, scaling.synthetic_distribution())
+            document = StructuredPdfDocument(elements=sections)
+
+            self.assertListEqual(levels, [section.level for section in traverse_in_order(document)])
+            self.assertEqual(depth + 1, get_document_depth(document))
+
+        texts = [e.text for e in scaling.synthetic_elements(100, seed=1)]
+        self.assertListEqual(texts, [e.text for e in scaling.synthetic_elements(100, seed=1)])
+        self.assertNotEqual(texts, [e.text for e in scaling.synthetic_elements(100, seed=2)])
+
+    def test_run(self):
+        results = json.loads(json.dumps(scaling.run(sizes=(100, 200), trace_memory=False)))
+        self.assertListEqual(["100", "200"], list(results["sizes"]))
+        expected = ["create_hierarchy", "traverse_in_order", "traverse_level_order", "full_content"] + \
+                   ["print:{}".format(name) for name in PRINTERS]
+        self.assertListEqual(expected, list(results["sizes"]["100"]))
+        self.assertIsNone(results["sizes"]["100"]["full_content"]["peak_memory"])
+
+    def test_super_linear(self):
+        self.assertAlmostEqual(1.0, scaling.growth_exponent([10, 100, 1000], [1, 10, 100]))
+        self.assertAlmostEqual(2.0, scaling.growth_exponent([10, 100, 1000], [1, 100, 10000]))
+        self.assertIsNone(scaling.growth_exponent([10], [1]))
+
+        def measured(time, memory):
+            return {"time": time, "peak_memory": memory}
+
+        results = {"sizes": {"1000": {"linear": measured(0.01, 10 ** 6), "quadratic": measured(0.01, None),
+                                      "noise": measured(0.0001, 100)},
+                             "10000": {"linear": measured(0.1, 10 ** 7), "quadratic": measured(1.0, None),
+                                       "noise": measured(0.004, 10000)}}}
+        self.assertListEqual([("quadratic", "time", 2.0)],
+                             [(stage, metric, round(exponent, 6))
+                              for stage, metric, exponent in scaling.super_linear(results)])
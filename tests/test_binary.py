@@ -0,0 +1,101 @@
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from pdfstructure.binary import BinaryDocument, BinaryFilePrinter, write_binary, load_binary
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order
+from pdfstructure.model.document import StructuredPdfDocument, Section, DanglingTextSection
+from pdfstructure.printer import JsonStringPrinter
+from pdfstructure.source import FileSource
+
+
+class TestBinaryFormat(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+    same_style_doc = str(Path("resources/SameStyleOnly.pdf").absolute())
+
+    testDocument = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.testDocument = HierarchyParser().parse_pdf(FileSource(cls.straight_forward_doc))
+
+    @staticmethod
+    def encode(document):
+        fp = io.BytesIO()
+        write_binary(document, fp)
+        return BinaryDocument(fp.getvalue())
+
+    def test_round_trip_equals_json(self):
+        printer = JsonStringPrinter()
+        for document in (self.testDocument, HierarchyParser().parse_pdf(FileSource(self.same_style_doc))):
+            decoded = self.encode(document).to_document()
+            self.assertEqual(printer.print(document), printer.print(decoded))
+
+        # documents loaded from json encode to the same json again
+        from_json = StructuredPdfDocument.from_json(json.loads(printer.print(self.testDocument)))
+        self.assertEqual(printer.print(from_json), printer.print(self.encode(from_json).to_document()))
+
+        self.assertIsInstance(self.encode(self.testDocument).to_document().elements[0], DanglingTextSection)
+        empty = StructuredPdfDocument(elements=[])
+        self.assertEqual(printer.print(empty), printer.print(self.encode(empty).to_document()))
+
+    def test_random_access(self):
+        binary = self.encode(self.testDocument)
+        sections = list(traverse_in_order(self.testDocument))
+        self.assertEqual(len(sections), len(binary))
+        self.assertListEqual([s.heading_text for s in sections], [s.heading_text for s in binary.iter_sections()])
+        self.assertListEqual([s.level for s in sections], [s.level for s in binary.iter_sections()])
+
+        top_level = binary.top_level()
+        self.assertEqual(len(self.testDocument.elements), len(top_level))
+        data_structures = top_level[5]
+        self.assertEqual("Data Structure Basics", binary.section(data_structures).heading_text)
+        self.assertListEqual([], binary.section(data_structures).children)
+
+        array = binary.children(data_structures)[0]
+        self.assertEqual("Array", binary.section(array).heading_text)
+        self.assertEqual(data_structures, binary.parent(array))
+        self.assertIsNone(binary.parent(data_structures))
+
+        expected = StructuredPdfDocument(elements=[self.testDocument.elements[5].children[0]])
+        subtree = binary.subtree(array)
+        self.assertEqual(JsonStringPrinter().print(expected),
+                         JsonStringPrinter().print(StructuredPdfDocument(elements=[subtree])))
+        start, end = binary.subtree_range(array)
+        self.assertEqual(sum(1 for _ in traverse_in_order(expected)), end - start)
+
+        with self.assertRaises(IndexError):
+            binary.section(len(binary))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = str(Path(directory, "doc.bin"))
+            BinaryFilePrinter().print(self.testDocument, file_path=file_path)
+            with BinaryDocument.open(file_path) as binary:
+                self.assertEqual("interview_cheatsheet.pdf", binary.metadata["filename"])
+                self.assertEqual("Basic Types of Algorithms", binary.section(binary.top_level()[-1]).heading_text)
+            self.assertEqual(JsonStringPrinter().print(self.testDocument),
+                             JsonStringPrinter().print(load_binary(file_path)))
+
+            Path(file_path).write_bytes(b"{}" * 64)
+            with self.assertRaises(ValueError):
+                load_binary(file_path)
+
+    def test_deep_document(self):
+        heading = self.testDocument.elements[5].heading
+        root = section = Section(heading)
+        depth = sys.getrecursionlimit() * 2
+        for level in range(1, depth):
+            child = Section(heading, level=level)
+            section.append_children(child)
+            section = child
+
+        binary = self.encode(StructuredPdfDocument(elements=[root]))
+        self.assertEqual(depth, len(binary))
+        self.assertEqual((0, depth), binary.subtree_range(0))
+        self.assertEqual(depth - 2, binary.parent(depth - 1))
+        self.assertEqual(2, binary.subtree(0).children[0].children[0].level)
@@ -0,0 +1,106 @@
+import json
+import tempfile
+from functools import partial
+from pathlib import Path
+from unittest import TestCase
+
+from pdfminer.layout import LAParams
+
+from pdfstructure.analysis.sizemapper import PivotLogMapper
+from pdfstructure.cache import DirectoryCache, SqliteCache, cache_key
+from pdfstructure.hierarchy.headercompare import SubHeaderPredicate
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.model.document import StructuredPdfDocument
+from pdfstructure.printer import JsonStringPrinter
+from pdfstructure.source import FileSource, BytesSource
+
+
+class TestParseCache(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+    test_doc = str(Path("resources/SameSize_EnumeratedTitle.pdf").absolute())
+
+    @staticmethod
+    def create_source(path, **kwargs):
+        return FileSource(path, la_params=LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3), **kwargs)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_hit_equals_loaded_json(self, cache):
+        parser = HierarchyParser(cache=cache)
+        parsed = parser.parse_pdf(self.create_source(self.straight_forward_doc))
+        cached = parser.parse_pdf(self.create_source(self.straight_forward_doc))
+
+        self.assertEqual({"hits": 1, "misses": 1}, cache.stats)
+        printer = JsonStringPrinter()
+        expected = StructuredPdfDocument.from_json(json.loads(printer.print(parsed)))
+        self.assertEqual(printer.print(expected), printer.print(cached))
+        self.assertEqual("interview_cheatsheet.pdf", cached.metadata["filename"])
+
+    def test_directory_cache(self):
+        self.check_hit_equals_loaded_json(DirectoryCache(self.tmp.name))
+
+    def test_sqlite_cache(self):
+        self.check_hit_equals_loaded_json(SqliteCache(Path(self.tmp.name) / "cache.db"))
+
+    def test_key_depends_on_content_and_config(self):
+        source = self.create_source(self.straight_forward_doc)
+        same_content = BytesSource(Path(self.straight_forward_doc).read_bytes(), filename="copy.pdf",
+                                   la_params=LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3))
+        config = HierarchyParser().config()
+
+        self.assertEqual(source.fingerprint(), same_content.fingerprint())
+        self.assertEqual(cache_key(source.fingerprint(), config), cache_key(same_content.fingerprint(), config))
+        self.assertNotEqual(source.fingerprint(), self.create_source(self.test_doc).fingerprint())
+        self.assertNotEqual(source.fingerprint(), self.create_source(self.straight_forward_doc,
+                                                                     page_numbers=[0]).fingerprint())
+        self.assertNotEqual(source.fingerprint(), FileSource(self.straight_forward_doc,
+                                                                           la_params=LAParams()).fingerprint())
+        self.assertNotEqual(cache_key(source.fingerprint(), config),
+                            cache_key(source.fingerprint(), HierarchyParser(pre_scan=True).config()))
+
+    def test_lru_eviction(self):
+        for cache in (DirectoryCache(Path(self.tmp.name) / "dir"), SqliteCache(Path(self.tmp.name) / "cache.db")):
+            parser = HierarchyParser(cache=cache)
+            printer = JsonStringPrinter()
+            first = printer.print(parser.parse_pdf(self.create_source(self.test_doc)))
+            second = printer.print(parser.parse_pdf(self.create_source(self.straight_forward_doc)))
+            # room for two documents
+            cache.max_bytes = len(first.encode("utf-8")) + len(second.encode("utf-8"))
+
+            parser.parse_pdf(self.create_source(self.test_doc))
+            parser.parse_pdf(self.create_source(self.test_doc, page_numbers=[0]))
+            # least recently used document got evicted
+            parser.parse_pdf(self.create_source(self.test_doc))
+            parser.parse_pdf(self.create_source(self.straight_forward_doc))
+
+            self.assertEqual({"hits": 2, "misses": 4}, cache.stats)
+
+    def test_key_depends_on_mapper_and_condition_parameters(self):
+        config = HierarchyParser().config()
+        self.assertEqual(config, HierarchyParser(size_mapper=PivotLogMapper).config())
+        self.assertNotEqual(config, HierarchyParser(size_mapper=partial(PivotLogMapper, bins=7)).config())
+        self.assertNotEqual(HierarchyParser(size_mapper=partial(PivotLogMapper, bins=3)).config(),
+                            HierarchyParser(size_mapper=partial(PivotLogMapper, bins=7)).config())
+
+        conditions = SubHeaderPredicate()
+        conditions.add_condition(lambda h1, h2: False)
+        with self.assertRaises(ValueError):
+            HierarchyParser(sub_header_conditions=conditions, cache=DirectoryCache(self.tmp.name))
+        with self.assertRaises(ValueError):
+            HierarchyParser(size_mapper=lambda distribution: PivotLogMapper(distribution),
+                            cache=DirectoryCache(self.tmp.name))
+
+    def test_parse_many_stats(self):
+        cache = DirectoryCache(self.tmp.name)
+        parser = HierarchyParser(cache=cache)
+        paths = [self.test_doc, self.straight_forward_doc]
+        self.assertTrue(all(result.ok and result.cached is False for result in parser.parse_many(paths, workers=2)))
+        self.assertEqual({"hits": 0, "misses": 2}, cache.stats)
+
+        results = list(parser.parse_many(paths + [self.test_doc], workers=2))
+        self.assertTrue(all(result.ok and result.cached for result in results))
+        self.assertEqual({"hits": 3, "misses": 2}, cache.stats)
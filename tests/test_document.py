@@ -1,8 +1,17 @@
+import gc
+import io
 import json
+import tracemalloc
 from pathlib import Path
 from unittest import TestCase
 
-from pdfstructure.model.document import StructuredPdfDocument
+from pdfminer.layout import LAParams
+
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order
+from pdfstructure.model.document import StructuredPdfDocument, CompactTextElement, Section, TextElement
+from pdfstructure.printer import JsonStringPrinter
+from pdfstructure.source import FileSource
 
 
 class TestSection(TestCase):
@@ -16,3 +25,99 @@ class TestSection(TestCase):
             expected_newline_merged_subsections_excerpt = "Greedy Algorithm\nDefinition:\nAn algorithm that, while"
 
             self.assertTrue(expected_newline_merged_subsections_excerpt in text)
+
+    @staticmethod
+    def load_document():
+        with open(str(Path("resources/parsed/interview_cheatsheet.json").absolute()), "r") as fp:
+            return StructuredPdfDocument.from_json(json.load(fp))
+
+    def test_full_content_cached(self):
+        document = self.load_document()
+        chapter = next(element for element in document.elements
+                       if any(child.children for child in element.children))
+        nested = next(child for child in chapter.children if child.children)
+        nested_text = nested.full_content
+        text = chapter.full_content
+        self.assertIn(nested_text, text)
+        self.assertIs(text, chapter.full_content)
+        self.assertEqual(text, "\n".join(chapter.iter_text()))
+
+        # appending to sections of other trees keeps the cached text
+        Section(None).append_children(Section(None))
+        self.assertIs(text, chapter.full_content)
+
+        # appending to a nested section invalidates the cached text of its ancestors
+        nested.children[-1].append_children(Section(TextElement(text_container=None, style=None, text="appended")))
+        self.assertTrue(nested.full_content.endswith("\nappended"))
+        self.assertIn("\nappended", chapter.full_content)
+        self.assertEqual(chapter.full_content, "\n".join(chapter.iter_text()))
+
+    def test_full_content_replaced_heading(self):
+        document = self.load_document()
+        chapter = next(element for element in document.elements
+                       if any(child.children for child in element.children))
+        nested = next(child for child in chapter.children if child.children)
+        text = document.text
+        self.assertIn(nested.heading_text, chapter.full_content)
+
+        nested.heading = TextElement(text_container=None, style=nested.heading.style, text="replaced heading")
+        self.assertNotEqual(text, document.text)
+        self.assertIn("\nreplaced heading\n", chapter.full_content)
+        self.assertEqual(chapter.full_content, "\n".join(chapter.iter_text()))
+        fp = io.StringIO()
+        document.write_text(fp)
+        self.assertEqual(document.text, fp.getvalue())
+
+        # compacting keeps the cached text
+        text = chapter.full_content
+        document.compact()
+        self.assertIs(text, chapter.full_content)
+
+    def test_write_text(self):
+        document = self.load_document()
+        expected = document.text
+        fp = io.StringIO()
+        document.write_text(fp)
+        self.assertEqual(expected, fp.getvalue())
+
+        fp = io.StringIO()
+        document.elements[0].write_text(fp)
+        self.assertEqual(document.elements[0].full_content, fp.getvalue())
+
+        paragraphs = list(document.iter_text())
+        self.assertEqual(sum(1 for section in traverse_in_order(document) if section.heading_text), len(paragraphs))
+        self.assertEqual(expected.split("\n")[:10], "\n".join(paragraphs).split("\n")[:10])
+
+
+class TestCompactDocument(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+
+    @staticmethod
+    def parse_traced(parser):
+        gc.collect()
+        tracemalloc.start()
+        source = FileSource(TestCompactDocument.straight_forward_doc,
+                            la_params=LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3))
+        document = parser.parse_pdf(source)
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return document, retained
+
+    def test_compact_document(self):
+        document, retained = self.parse_traced(HierarchyParser())
+        compact, retained_compact = self.parse_traced(HierarchyParser(compact=True))
+
+        self.assertLess(retained_compact, retained * 0.1)
+
+        printer = JsonStringPrinter()
+        self.assertEqual(printer.print(document), printer.print(compact))
+
+        for section in traverse_in_order(compact):
+            if section.heading:
+                self.assertIsInstance(section.heading, CompactTextElement)
+                self.assertIsNone(section.heading._data)
+                self.assertFalse(hasattr(section.heading, "__dict__"))
+                self.assertIs(section.heading.features, section.heading.features)
+        self.assertEqual(4, compact.elements[8].heading.page)
+        self.assertEqual(document.elements[8].heading.bbox, compact.elements[8].heading.bbox)
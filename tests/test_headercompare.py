@@ -2,8 +2,10 @@ from unittest import TestCase
 
 from pdfminer.layout import LTChar, LTTextBoxHorizontal, LTTextLineHorizontal
 
-from pdfstructure.hierarchy.headercompare import condition_h2_extends_h1, condition_h1_enum_h2_not
-from pdfstructure.model.document import TextElement, Section
+from pdfstructure.hierarchy.detectheader import check_valid_header_tokens
+from pdfstructure.hierarchy.headercompare import condition_h2_extends_h1, condition_h1_enum_h2_not, \
+    condition_boldness
+from pdfstructure.model.document import TextElement, Section, TextFeatures
 from pdfstructure.model.style import Style, TextSize
 
 
@@ -50,3 +52,29 @@ class TestSubHeaderConditions(TestCase):
 
         self.assertTrue(condition_h1_enum_h2_not(Section(h1), Section(subheader)))
         self.assertFalse(condition_h1_enum_h2_not(Section(h1), Section(neighbor_element)))
+
+    def test_text_features(self):
+        features = TextFeatures.from_container(self.create_container("1.1.2 This is a subheader of 1.1"))
+        self.assertEqual("1.1.2 This is a subheader of 1.1", features.text)
+        self.assertEqual("1.1.2", features.first_token)
+        self.assertTrue(features.enumerated)
+        self.assertEqual(18, features.alpha_count)
+        self.assertEqual(5, features.numeric_count)
+        self.assertEqual(1, features.line_count)
+
+        features = TextFeatures.from_container(self.create_container("This is a subheader"))
+        self.assertEqual("This", features.first_token)
+        self.assertFalse(features.enumerated)
+
+    def test_conditions_without_text_container(self):
+        h1 = TextElement(text_container=None, text="1.1 This is a test header", style=self.style_middle_bold)
+        h2 = TextElement(text_container=None, text="1.1.2 This is a subheader of 1.1", style=self.style_middle_bold)
+        neighbor = TextElement(text_container=None, text="Not enumerated", style=self.style_middle_bold)
+
+        self.assertTrue(condition_h2_extends_h1(Section(h1), Section(h2)))
+        self.assertTrue(condition_h1_enum_h2_not(Section(h1), Section(neighbor)))
+        self.assertFalse(condition_boldness(Section(neighbor), Section(h1)))
+
+    def test_check_valid_header_tokens(self):
+        self.assertTrue(check_valid_header_tokens(self.create_container("1.1 ab")))
+        self.assertFalse(check_valid_header_tokens(self.create_container("1.1 a")))
@@ -1,12 +1,42 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest import TestCase
 
 from pdfminer.high_level import extract_text
+from pdfminer.layout import LAParams
 
+from pdfstructure.analysis.styledistribution import count_sizes
 from pdfstructure.hierarchy.parser import HierarchyParser
-from pdfstructure.model.document import DanglingTextSection
+from pdfstructure.hierarchy.traversal import get_document_depth
+from pdfstructure.model.document import DanglingTextSection, StructuredPdfDocument
+from pdfstructure.observer import ParseObserver
 from pdfstructure.printer import PrettyStringPrinter
-from pdfstructure.source import FileSource
+from pdfstructure.source import FileSource, Source
+from pdfstructure.utils import element_generator
+from tests.helper import generate_annotated_lines
+
+
+class DocumentedSource(Source):
+    """
+    implements read() with the arguments documented by Source only.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.source = FileSource(path)
+
+    def read(self, override_la_params=None, override_page_numbers=None):
+        return self.source.read(override_la_params=override_la_params, override_page_numbers=override_page_numbers)
+
+
+class ExitingSource(FileSource):
+    """
+    terminates the reading (worker) process without raising an exception.
+    """
+
+    def read(self, *args, **kwargs):
+        os._exit(1)
 
 
 class TestHierarchy(TestCase):
@@ -55,10 +85,177 @@ class TestHierarchy(TestCase):
         self.assertEqual("Outdoorpädagogik", doc.elements[0].heading.text)
         self.assertEqual("„Fange den Stock“", doc.elements[0].children[0].heading.text)
 
+    def test_reuse_layout_matches_fresh_extraction(self):
+        printer = PrettyStringPrinter()
+        for path in (self.straight_forward_doc, self.nested_doc_bold_title):
+            la_params = LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)
+            expected = printer.print(self.parser.parse_pdf(FileSource(path, la_params=la_params)))
+
+            la_params = LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)
+            source = FileSource(path, la_params=la_params, reuse_layout=True)
+            self.assertEqual(expected, printer.print(self.parser.parse_pdf(source)))
+
+    def test_pre_scan_with_reused_layout(self):
+        printer = PrettyStringPrinter()
+        la_params = LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)
+        expected = printer.print(self.parser.parse_pdf(FileSource(self.straight_forward_doc, la_params=la_params)))
+
+        parser = HierarchyParser(pre_scan=True)
+        la_params = LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3)
+        source = FileSource(self.straight_forward_doc, la_params=la_params, reuse_layout=True)
+        self.assertEqual(expected, printer.print(parser.parse_pdf(source)))
+
+    def test_sampled_style_analysis(self):
+        parser = HierarchyParser(sample_pages=True)
+        pdf = parser.parse_pdf(FileSource(self.straight_forward_doc))
+        self.assertListEqual(list(range(6)), pdf.metadata["style_sampling"]["pages"])
+        self.assertEqual(9, len(pdf.elements))
+        self.assertEqual("Data Structure Basics", pdf.elements[5].heading.text)
+
+    def test_parse_many(self):
+        paths = [self.same_size_bold_header, self.same_style_doc, str(Path("resources/missing.pdf").absolute()),
+                 FileSource(self.same_size_enum_header)]
+        results = sorted(self.parser.parse_many(paths, workers=2, max_tasks_per_child=1), key=lambda r: r.index)
+
+        self.assertListEqual([True, True, False, True], [result.ok for result in results])
+        self.assertTrue(results[2].error.startswith("FileNotFoundError"))
+        self.assertIsNone(results[2].document)
+
+        printer = PrettyStringPrinter()
+        for result in (results[0], results[1], results[3]):
+            self.assertGreater(result.duration, 0)
+            expected = self.parser.parse_pdf(FileSource(result.uri))
+            self.assertEqual(printer.print(expected), printer.print(result.document))
+            self.assertEqual(expected.metadata["filename"], result.document.metadata["filename"])
+
+    def test_parse_many_worker_dies(self):
+        paths = [self.same_size_bold_header, ExitingSource(self.same_style_doc), self.same_size_enum_header,
+                 self.same_style_doc]
+        results = sorted(self.parser.parse_many(paths, workers=2), key=lambda r: r.index)
+
+        self.assertListEqual([0, 1, 2, 3], [result.index for result in results])
+        self.assertListEqual([True, False, True, True], [result.ok for result in results])
+        self.assertTrue(results[1].error.startswith("BrokenProcessPool"))
+        self.assertIsNone(results[1].document)
+
+        results = list(self.parser.parse_many([ExitingSource(self.same_style_doc)] * 2 + [self.same_style_doc],
+                                              workers=1, chunk_size=2))
+        self.assertListEqual([False, False, True], [result.ok for result in sorted(results, key=lambda r: r.index)])
+
+    def test_iter_sections(self):
+        printer = PrettyStringPrinter()
+        expected = self.parser.parse_pdf(FileSource(self.straight_forward_doc))
+        sections = list(self.parser.iter_sections(FileSource(self.straight_forward_doc)))
+        self.assertEqual(printer.print(expected), printer.print(StructuredPdfDocument(sections)))
+
+    def test_iter_hierarchy_yields_completed_sections(self):
+        distribution = count_sizes(element_generator(self.straight_forward_doc))
+        consumed = []
+
+        def element_gen():
+            for element in generate_annotated_lines(self.straight_forward_doc):
+                consumed.append(element)
+                yield element
+
+        sections = self.parser.iter_hierarchy(element_gen(), distribution)
+        next(sections)
+        consumed_for_first = len(consumed)
+        remaining = list(sections)
+
+        self.assertGreater(len(remaining), 0)
+        self.assertLess(consumed_for_first, len(consumed))
+
+    def test_concurrent_parsing(self):
+        printer = PrettyStringPrinter()
+        paths = [self.straight_forward_doc, self.nested_doc_bold_title, self.same_size_bold_header,
+                 self.same_size_enum_header, self.same_style_doc]
+        serial = [printer.print(self.parser.parse_pdf(FileSource(path))) for path in paths]
+
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            concurrent = list(pool.map(lambda path: printer.print(self.parser.parse_pdf(FileSource(path))),
+                                       paths * 2))
+        self.assertListEqual(serial * 2, concurrent)
+
+    def test_source_configuration_not_modified_by_read(self):
+        la_params = LAParams(line_margin=0.3)
+        source = FileSource(self.straight_forward_doc, la_params=la_params, reuse_layout=True)
+        self.parser.parse_pdf(source)
+        self.assertEqual(0.3, source.la_params.line_margin)
+        self.assertEqual(0.3, FileSource(self.straight_forward_doc).la_params.line_margin)
+
+        narrow = [e.get_text() for e in source.read(override_la_params=LAParams(line_margin=0.01))]
+        wide = [e.get_text() for e in source.read(override_la_params=LAParams(line_margin=0.5))]
+        self.assertGreater(len(narrow), len(wide))
+        self.assertListEqual(wide, [e.get_text() for e in source.read(override_la_params=LAParams(line_margin=0.5))])
+
     def test_grouping_bold_key_and_size(self):
         doc = self.parser.parse_pdf(FileSource(self.straight_forward_doc))
         self.assertEqual(len(doc.elements), 9)
 
+    def test_parse_stats(self):
+        printer = PrettyStringPrinter()
+        expected = self.parser.parse_pdf(FileSource(self.straight_forward_doc))
+        pdf = HierarchyParser(collect_stats=True).parse_pdf(FileSource(self.straight_forward_doc))
+        self.assertEqual(printer.print(expected), printer.print(pdf))
+        self.assertNotIn("parse_stats", expected.metadata)
+
+        def sections(elements):
+            for section in elements:
+                if not isinstance(section, DanglingTextSection):
+                    yield section
+                yield from sections(section.children)
+
+        stats = pdf.metadata["parse_stats"]
+        self.assertEqual(6, stats.pages)
+        self.assertEqual(sum(1 for _ in sections(pdf.elements)), stats.paragraphs)
+        # headers without content have no children
+        self.assertLessEqual(sum(1 for s in sections(pdf.elements) if s.children), stats.headers)
+        self.assertLess(stats.headers, stats.paragraphs)
+        self.assertEqual(get_document_depth(pdf), stats.max_depth)
+        self.assertSetEqual({"style_extraction", "count_sizes", "extraction", "annotate", "create_hierarchy"},
+                            set(stats.durations))
+        self.assertTrue(all(duration >= 0 for duration in stats.durations.values()))
+
+        lorem = HierarchyParser(collect_stats=True).parse_pdf(FileSource(str(Path("resources/lorem.pdf").absolute())))
+        self.assertEqual(2, lorem.metadata["parse_stats"].splits)
+
+    def test_parse_observer(self):
+        class Recorder(ParseObserver):
+            def __init__(self):
+                self.events = []
+
+            def stage_started(self, stage):
+                self.events.append(("started", stage))
+
+            def stage_finished(self, stage, duration):
+                self.events.append(("finished", stage))
+
+            def page_done(self, page):
+                self.events.append(("page", page))
+
+            def element_emitted(self, section, header):
+                self.events.append(("element", header))
+
+        recorder = Recorder()
+        sections = list(self.parser.iter_sections(FileSource(self.same_size_bold_header), observer=recorder))
+        events = recorder.events
+
+        self.assertListEqual([("started", "count_sizes"), ("started", "style_extraction")], events[:2])
+        self.assertLess(events.index(("finished", "count_sizes")), events.index(("started", "extraction")))
+        self.assertEqual(("finished", "create_hierarchy"), events[-1])
+        self.assertListEqual([("page", 0)], [e for e in events if e[0] == "page"])
+        self.assertEqual(len(sections), len([e for e in events if e == ("element", True)]))
+
+    def test_parse_observer_with_custom_source(self):
+        printer = PrettyStringPrinter()
+        expected = self.parser.parse_pdf(FileSource(self.straight_forward_doc))
+        pdf = HierarchyParser(collect_stats=True).parse_pdf(DocumentedSource(self.straight_forward_doc),
+                                                            observer=ParseObserver())
+        self.assertEqual(printer.print(expected), printer.print(pdf))
+        stats = pdf.metadata["parse_stats"]
+        self.assertIn("extraction", stats.durations)
+        self.assertEqual(0, stats.pages)
+
     def skip_test_grouping_bold_columns(self):
         doc = self.parser.parse_pdf(FileSource(self.doc_with_columns))
         self.assertEqual("Xtrackers MSCI World Information Technology UCITS ETF 1C", doc.elements[1].heading.text)
@@ -0,0 +1,88 @@
+import io
+import json
+import sys
+from pathlib import Path
+from unittest import TestCase
+
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order
+from pdfstructure.loader import JsonLoader, LazySection, load_json
+from pdfstructure.model.document import StructuredPdfDocument, Section, DanglingTextSection
+from pdfstructure.printer import JsonStringPrinter
+from pdfstructure.source import FileSource
+
+
+class TestJsonLoader(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+
+    testDocument = None
+    printed = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.testDocument = HierarchyParser().parse_pdf(FileSource(cls.straight_forward_doc))
+        cls.printed = JsonStringPrinter().print(cls.testDocument)
+
+    def test_load_equals_printed_document(self):
+        printer = JsonStringPrinter()
+        for lazy in (False, True):
+            for chunk_size in (5, 1 << 16):
+                for printed in (self.printed, printer.print(self.testDocument, compact=True)):
+                    loaded = JsonLoader(lazy=lazy, chunk_size=chunk_size).load(io.StringIO(printed))
+                    self.assertEqual(self.printed, printer.print(loaded))
+                    self.assertEqual("interview_cheatsheet.pdf", loaded.metadata["filename"])
+
+        loaded = load_json(io.StringIO(self.printed))
+        self.assertIsInstance(loaded.elements[0], DanglingTextSection)
+        # same structure as from_json, but headings keep their page
+        from_json = StructuredPdfDocument.from_json(json.loads(self.printed))
+        self.assertListEqual([(s.heading_text, s.level) for s in traverse_in_order(from_json)],
+                             [(s.heading_text, s.level) for s in traverse_in_order(loaded)])
+        self.assertEqual(4, loaded.elements[8].heading.page)
+
+    def test_lazy_children(self):
+        loaded = load_json(io.StringIO(self.printed), lazy=True)
+        chapter = loaded.elements[5]
+        self.assertIsInstance(chapter, LazySection)
+        self.assertFalse(chapter.is_loaded)
+        self.assertEqual("Data Structure Basics", chapter.heading_text)
+
+        array = chapter.children[0]
+        self.assertTrue(chapter.is_loaded)
+        self.assertFalse(array.is_loaded)
+        self.assertFalse(loaded.elements[6].is_loaded)
+        self.assertEqual("Time Complexity:", array.children[2].heading_text)
+        self.assertEqual(2, array.children[2].level)
+
+        new_child = Section(array.heading, level=3)
+        array.children[2].append_children(new_child)
+        self.assertIs(new_child, array.children[2].children[-1])
+
+    def test_iter_sections(self):
+        sections = JsonLoader(chunk_size=64).iter_sections(io.StringIO(self.printed))
+        headings = [section.heading_text for section in sections]
+        self.assertListEqual([section.heading_text for section in self.testDocument.elements], headings)
+
+    def test_deep_document(self):
+        heading = self.testDocument.elements[5].heading
+        root = section = Section(heading)
+        depth = sys.getrecursionlimit() * 2
+        for level in range(1, depth):
+            child = Section(heading, level=level)
+            section.append_children(child)
+            section = child
+        printed = JsonStringPrinter().print(StructuredPdfDocument(elements=[root]), compact=True)
+
+        for lazy in (False, True):
+            loaded = JsonLoader(lazy=lazy).loads(printed)
+            section = loaded.elements[0]
+            for level in range(1, depth):
+                section = section.children[0]
+            self.assertEqual(depth - 1, section.level)
+            self.assertListEqual([], section.children)
+
+    def test_invalid_json(self):
+        with self.assertRaises(json.JSONDecodeError):
+            load_json(io.StringIO(self.printed[:len(self.printed) // 2]))
+        with self.assertRaises(json.JSONDecodeError):
+            load_json(io.StringIO('{"metadata": {}, "elements": [x]}'))
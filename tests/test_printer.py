@@ -1,10 +1,15 @@
+import io
 import json
+import sys
+import tempfile
 from pathlib import Path
 from unittest import TestCase
 
 from pdfstructure.hierarchy.parser import HierarchyParser
-from pdfstructure.model.document import StructuredPdfDocument
-from pdfstructure.printer import PrettyStringFilePrinter, PrettyStringPrinter, JsonFilePrinter, JsonStringPrinter
+from pdfstructure.hierarchy.traversal import traverse_in_order
+from pdfstructure.model.document import StructuredPdfDocument, Section, TextElement
+from pdfstructure.printer import PrettyStringFilePrinter, PrettyStringPrinter, JsonFilePrinter, JsonStringPrinter, \
+    encode_pdf_element, write_json, JsonLinesPrinter
 from pdfstructure.source import FileSource
 
 
@@ -67,3 +72,73 @@ class TestPrettyStringPrinter(TestCase):
 
             self.assertEqual("Array", decoded_document.elements[5].children[0].heading.text)
             self.assertEqual("Time Complexity:", decoded_document.elements[5].children[0].children[2].heading.text)
+
+    def test_json_matches_json_dump(self):
+        expected = json.dumps(self.testDocument, default=encode_pdf_element, indent=4)
+        self.assertEqual(expected, JsonStringPrinter().print(self.testDocument))
+
+        compact = JsonStringPrinter().print(self.testDocument, compact=True)
+        self.assertEqual(json.dumps(self.testDocument, default=encode_pdf_element, separators=(",", ":")), compact)
+        self.assertEqual(json.loads(expected), json.loads(compact))
+
+        fp = io.StringIO()
+        write_json(self.testDocument, fp, buffer_size=100)
+        self.assertEqual(expected, fp.getvalue())
+
+        empty = StructuredPdfDocument(elements=[])
+        self.assertEqual(json.dumps(empty, default=encode_pdf_element, indent=4), JsonStringPrinter().print(empty))
+
+    def test_print_json_file_compact(self):
+        printer = JsonFilePrinter()
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, "interview_cheatsheet.json")
+            printer.print(self.testDocument, file_path=str(file_path), compact=True)
+
+            with open(file_path, "r") as file:
+                data = file.read()
+        self.assertNotIn("\n", data)
+        decoded_document = StructuredPdfDocument.from_json(json.loads(data))
+        self.assertEqual("Time Complexity:", decoded_document.elements[5].children[0].children[2].heading.text)
+        self.assertEqual(PrettyStringPrinter().print(self.testDocument), PrettyStringPrinter().print(decoded_document))
+
+    def test_print_json_deep_document(self):
+        heading = self.testDocument.elements[5].heading
+        root = section = Section(heading)
+        depth = sys.getrecursionlimit() * 2
+        for level in range(1, depth):
+            child = Section(heading, level=level)
+            section.append_children(child)
+            section = child
+
+        printed = JsonStringPrinter().print(StructuredPdfDocument(elements=[root]), compact=True)
+        self.assertEqual(depth, printed.count('"heading"'))
+        self.assertTrue(printed.endswith('"level":1}],"level":0}]}'))
+
+    def test_print_json_lines(self):
+        printer = JsonLinesPrinter()
+        records = [json.loads(line) for line in printer.print(self.testDocument).splitlines()]
+        sections = list(traverse_in_order(self.testDocument))
+
+        self.assertEqual(len(sections), len(records))
+        self.assertListEqual([section.heading_text for section in sections], [r["heading"] for r in records])
+        self.assertListEqual([section.level for section in sections], [r["level"] for r in records])
+        self.assertEqual(len(records), len(set(r["id"] for r in records)))
+
+        time_complexity = next(r for r in records if r["heading"] == "Time Complexity:")
+        self.assertEqual("5/0/2", time_complexity["id"])
+        self.assertListEqual(["Data Structure Basics", "Array"], time_complexity["path"])
+        self.assertEqual(self.testDocument.elements[5].children[0].children[2].heading.page, time_complexity["page"])
+        self.assertEqual("Times-Roman", records[1]["style"]["font_name"])
+        array = self.testDocument.elements[5].children[0]
+        self.assertEqual("\n".join(child.heading_text for child in array.top_level_content),
+                         next(r for r in records if r["id"] == "5/0")["content"])
+
+        fp = io.StringIO()
+        self.assertIs(fp, printer.print(self.testDocument, fp=fp))
+        file_path = Path("resources/parsed/interview_cheatsheet.jsonl")
+        try:
+            printer.print(self.testDocument, file_path=str(file_path.absolute()))
+            with open(file_path, "r") as file:
+                self.assertEqual(fp.getvalue(), file.read())
+        finally:
+            file_path.unlink()
@@ -0,0 +1,112 @@
+import io
+import json
+from pathlib import Path
+from unittest import TestCase
+
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.hierarchy.traversal import traverse_in_order
+from pdfstructure.loader import load_json
+from pdfstructure.model.document import StructuredPdfDocument, Section, TextElement
+from pdfstructure.printer import JsonStringPrinter
+from pdfstructure.query import Selector, PageIntervals, select, section_indexes
+from pdfstructure.source import FileSource
+
+
+def page_span(section):
+    pages = [element.heading.page for element in traverse_in_order(StructuredPdfDocument([section]))
+             if element.heading is not None and element.heading.page is not None]
+    return (min(pages), max(pages)) if pages else None
+
+
+class TestSelector(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+    document = None
+    json_text = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.json_text = JsonStringPrinter().print(HierarchyParser().parse_pdf(FileSource(cls.straight_forward_doc)))
+        cls.document = load_json(io.StringIO(cls.json_text))
+
+    def test_parse(self):
+        self.assertEqual((("level", None, 1), ("header", True)), Selector.parse("level<=1 header").filters)
+        self.assertEqual((("page", 10, 20),), Selector.parse("page=10..20").filters)
+        self.assertEqual((("page", 3, None), ("level", 2, 2)), Selector.parse("page>2 level=2").filters)
+        self.assertEqual((("path", ("Chapter 3", "Results")),),
+                         Selector.parse('path="Chapter 3 > Results"').filters)
+        self.assertEqual(Selector().header(False).level(high=1).filters, Selector.parse("paragraph level<2").filters)
+        for invalid in ("level", "level<=x", "size=3", 'path="open', "page~3"):
+            with self.assertRaises(ValueError):
+                Selector.parse(invalid)
+
+    def test_select_level_and_header(self):
+        expected = [section for section in traverse_in_order(self.document)
+                    if section.level <= 1 and section.children]
+        self.assertTrue(expected)
+        self.assertEqual(expected, select(self.document, "header level<=1"))
+        self.assertEqual(expected, select(self.document, Selector().level(high=1).header()))
+
+    def test_select_path(self):
+        # headings of all ancestors and the section itself, in preorder
+        paths = []
+        stack = [(section, ()) for section in reversed(self.document.elements)]
+        while stack:
+            section, path = stack.pop()
+            path = path + (section.heading_text.strip(),)
+            paths.append((section, path))
+            stack.extend((child, path) for child in reversed(section.children))
+        headers = [(section, path) for section, path in paths
+                   if section.children and len(path) == 3 and ">" not in "".join(path)]
+        self.assertTrue(headers)
+
+        section, path = headers[0]
+        expected = [other for other, other_path in paths if other.children and other_path == path]
+        self.assertIn(section, expected)
+        self.assertEqual(expected, select(self.document, "path={}".format(json.dumps(" > ".join(path)))))
+        self.assertEqual(expected, select(self.document, Selector().path(*path)))
+
+        expected = [other for other, other_path in paths if other.children and len(other_path) == 3
+                    and other_path[0] == path[0] and other_path[2] == path[2]]
+        self.assertEqual(expected, select(self.document, Selector().path(path[0], "*", path[2])))
+        self.assertEqual([], select(self.document, Selector().path(path[0], "Unknown heading")))
+
+    def test_select_pages(self):
+        sections = list(traverse_in_order(self.document))
+        for first, last in ((0, 0), (2, 3), (4, None), (None, 1)):
+            expected = [section for section in sections if page_span(section)
+                        and (first is None or page_span(section)[1] >= first)
+                        and (last is None or page_span(section)[0] <= last)]
+            self.assertTrue(expected)
+            self.assertEqual(expected, select(self.document, Selector().pages(first, last)))
+        self.assertEqual([section for section in sections if section.children and page_span(section)
+                          and page_span(section)[0] <= 3 <= page_span(section)[1]],
+                         select(self.document, "page=3 header"))
+
+    def test_select_pages_from_json(self):
+        document = StructuredPdfDocument.from_json(json.loads(self.json_text))
+        expected = [section for section in traverse_in_order(document)
+                    if page_span(section) and page_span(section)[0] <= 2 <= page_span(section)[1]]
+        self.assertTrue(expected)
+        self.assertEqual(expected, select(document, "page=2"))
+        self.assertEqual(len(select(self.document, "page=2")), len(expected))
+
+    def test_indexes_rebuilt_on_append(self):
+        document = StructuredPdfDocument([Section(TextElement(text_container=None, style=None, text="Chapter"))])
+        self.assertEqual([], select(document, "header"))
+        indexes = section_indexes(document)
+        self.assertIs(indexes, section_indexes(document))
+
+        chapter = document.elements[0]
+        chapter.append_children(Section(TextElement(text_container=None, style=None, text="paragraph"), 1))
+        self.assertIsNot(indexes, section_indexes(document))
+        self.assertEqual([chapter], select(document, 'header path="Chapter"'))
+        self.assertEqual(chapter.children, select(document, "level=1"))
+
+    def test_page_intervals(self):
+        intervals = [(0, 5, 0), (1, 1, 1), (2, 3, 2), (4, 9, 3), (7, 7, 4)]
+        index = PageIntervals(intervals)
+        for first in range(-1, 11):
+            for last in range(first, 11):
+                expected = [position for start, end, position in intervals if start <= last and end >= first]
+                self.assertEqual(expected, sorted(index.overlapping(first, last)))
+        self.assertEqual([], PageIntervals([]).overlapping(0, 10))
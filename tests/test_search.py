@@ -0,0 +1,100 @@
+import io
+from pathlib import Path
+from unittest import TestCase
+
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.model.document import StructuredPdfDocument, Section, TextElement
+from pdfstructure.search import SearchIndex, tokenize, build_search_index
+from pdfstructure.source import FileSource
+
+
+def section(text, *children):
+    element = Section(TextElement(text_container=None, style=None, text=text))
+    for child in children:
+        element.append_children(child)
+    return element
+
+
+class TestSearchIndex(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+    document = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.document = HierarchyParser().parse_pdf(FileSource(cls.straight_forward_doc))
+
+    def find(self, hit):
+        sections = self.document.elements
+        for index in hit.id.split("/"):
+            section = sections[int(index)]
+            sections = section.children
+        return section
+
+    def test_term_query(self):
+        index = build_search_index(self.document)
+        hits = index.search("queue", limit=None)
+        self.assertEqual([["Search Basics", "Depth First Search", "What you need to know:"]],
+                         [hit.path for hit in hits])
+        self.assertEqual("interview_cheatsheet.pdf", hits[0].document)
+        self.assertEqual([], index.search("nonexistingterm"))
+
+        hits = index.search("sort", limit=None)
+        self.assertEqual([["Efficient Sorting Basics", "Bubble Sort", "Time Complexity:"],
+                          ["Efficient Sorting Basics", "Quicksort", "Time Complexity:"],
+                          ["Efficient Sorting Basics", "Merge Sort", "Time Complexity:"],
+                          ["Efficient Sorting Basics", "Merge Sort"]], [hit.path for hit in hits[:4]])
+        self.assertEqual(sorted(hits, key=lambda hit: -hit.score), hits)
+        for hit in hits:
+            section = self.find(hit)
+            self.assertEqual(section.heading_text, hit.path[-1])
+            self.assertIn("sort", tokenize(section.heading_text) + [term for child in section.top_level_content
+                                                                    for term in tokenize(child.heading_text)])
+        self.assertEqual([repr(hit) for hit in hits[:3]], [repr(hit) for hit in index.search("sort", limit=3)])
+
+    def test_phrase_query(self):
+        index = build_search_index(self.document)
+        hits = index.search('"breadth first search"', limit=None)
+        self.assertEqual(["Search Basics > Breadth First Search",
+                          "Search Basics > Depth First Search > Breadth First Search Vs. Depth First Search",
+                          "Search Basics > Breadth First Search > Time Complexity:"],
+                         [" > ".join(hit.path) for hit in hits[:3]])
+        # all terms but not as phrase
+        self.assertNotIn(["Search Basics"], [hit.path for hit in index.search('"search first breadth"', limit=None)])
+
+    def test_heading_only(self):
+        index = build_search_index(self.document)
+        hits = index.search("search", heading_only=True, limit=None)
+        self.assertTrue(hits)
+        for hit in hits:
+            self.assertIn("search", tokenize(hit.path[-1]))
+
+    def test_phrase_within_paragraph(self):
+        document = StructuredPdfDocument([section("Chapter", section("red apple"), section("green tree")),
+                                          section("Other", section("an apple green tree"))])
+        index = build_search_index(document, "doc")
+        self.assertEqual(["Other"], [hit.path[-1] for hit in index.search('"apple green"')])
+        self.assertEqual(2, len(index.search("apple")))
+
+    def test_incremental(self):
+        index = build_search_index(self.document)
+        single = index.search("queue", limit=None)
+        with self.assertRaises(ValueError):
+            index.add_document(self.document)
+        index.add_document(self.document, name="copy")
+        self.assertEqual(["interview_cheatsheet.pdf", "copy"], index.documents)
+        both = index.search("queue", limit=None)
+        self.assertEqual(2 * len(single), len(both))
+        self.assertEqual({hit.id for hit in single}, {hit.id for hit in both if hit.document == "copy"})
+
+    def test_save_load(self):
+        index = build_search_index(self.document)
+        fp = io.StringIO()
+        index.save(fp)
+        fp.seek(0)
+        loaded = SearchIndex.load(fp)
+        for query in ("queue", '"breadth first search" tree', "sort"):
+            self.assertEqual([repr(hit) for hit in index.search(query)], [repr(hit) for hit in loaded.search(query)])
+
+        # keeps indexing after load
+        loaded.add_document(self.document, name="copy")
+        self.assertEqual(2 * len(index), len(loaded))
@@ -0,0 +1,138 @@
+import io
+import json
+import pickle
+import tempfile
+import zlib
+from pathlib import Path
+from unittest import TestCase, mock
+
+from pdfminer.layout import LAParams, LTChar
+
+from pdfstructure.hierarchy.parser import HierarchyParser
+from pdfstructure.printer import PrettyStringPrinter
+from pdfstructure.source import FileSource, encode_container, decode_container, BytesSource, StreamSource, \
+    MmapSource, BufferReader
+
+
+class TestFileSource(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+    test_doc = str(Path("resources/samplepptx.pdf").absolute())
+
+    @staticmethod
+    def create_source(path, **kwargs):
+        return FileSource(path, la_params=LAParams(boxes_flow=0.3, detect_vertical=True, line_margin=0.3), **kwargs)
+
+    def test_encode_container(self):
+        element = next(self.create_source(self.straight_forward_doc).read())
+        decoded = decode_container(pickle.loads(pickle.dumps(encode_container(element))))
+
+        self.assertIsInstance(decoded, type(element))
+        self.assertEqual(element.get_text(), decoded.get_text())
+        self.assertEqual(element.bbox, decoded.bbox)
+        chars = [c for line in decoded for c in line if isinstance(c, LTChar)]
+        self.assertEqual("Times-Roman", chars[0].fontname)
+        self.assertAlmostEqual(8.0, chars[0].size, 4)
+
+    def test_parallel_read(self):
+        serial = [(e.get_text(), getattr(e, "page", None), e.bbox)
+                  for e in self.create_source(self.straight_forward_doc).read()]
+        parallel = [(e.get_text(), getattr(e, "page", None), e.bbox)
+                    for e in self.create_source(self.straight_forward_doc, workers=2, pages_per_chunk=2).read()]
+
+        self.assertListEqual(serial, parallel)
+        self.assertEqual(5, parallel[-1][1])
+
+    def test_parallel_read_page_numbers(self):
+        serial = [e.get_text() for e in self.create_source(self.straight_forward_doc, page_numbers=[1, 3, 4]).read()]
+        parallel = [e.get_text() for e in self.create_source(self.straight_forward_doc, page_numbers=[1, 3, 4],
+                                                             workers=2, pages_per_chunk=1).read()]
+        self.assertListEqual(serial, parallel)
+
+    def test_layout_cache(self):
+        expected = [(e.get_text(), e.page, e.bbox) for e in self.create_source(self.straight_forward_doc).read()]
+        expected_lines = [e.get_text() for e in self.create_source(self.straight_forward_doc).pre_scan()]
+        with tempfile.TemporaryDirectory() as cache:
+            first = [(e.get_text(), e.page, e.bbox)
+                     for e in self.create_source(self.straight_forward_doc, layout_cache=cache).read()]
+            self.assertListEqual(expected, first)
+
+            # pdfminer is not used to interpret the pdf anymore
+            with mock.patch("pdfstructure.source.extract_raw_pages", side_effect=AssertionError):
+                source = self.create_source(self.straight_forward_doc, layout_cache=cache)
+                cached = [(e.get_text(), e.page, e.bbox) for e in source.read()]
+                self.assertListEqual(expected, cached)
+                self.assertListEqual(expected_lines, [e.get_text() for e in source.pre_scan()])
+                self.assertListEqual([e.get_text() for e in self.create_source(self.straight_forward_doc,
+                                                                               page_numbers=[2, 4]).read()],
+                                     [e.get_text() for e in source.read(override_page_numbers=[2, 4])])
+
+    def test_layout_cache_format(self):
+        with tempfile.TemporaryDirectory() as cache:
+            list(self.create_source(self.test_doc, layout_cache=cache, page_numbers=[0]).read())
+            stored = next(Path(cache).glob("*/0.page.json"))
+            # plain json, loading it never executes code
+            pageid, bbox, rotate, objs = json.loads(zlib.decompress(stored.read_bytes()))
+            self.assertIn("c", [obj[0] for obj in objs])
+
+    def test_content_hash_memoized(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "copy.pdf")
+            path.write_bytes(Path(self.test_doc).read_bytes())
+            source = self.create_source(str(path))
+            digest = source.content_hash()
+            with mock.patch("pdfstructure.source.hash_pdf", side_effect=AssertionError):
+                self.assertEqual(digest, source.content_hash())
+                self.assertEqual(digest, MmapSource(str(path)).content_hash())
+
+            with open(path, "ab") as fp:
+                fp.write(b"\n")
+            self.assertNotEqual(digest, source.content_hash())
+
+    def test_layout_cache_parse(self):
+        expected = PrettyStringPrinter().print(HierarchyParser().parse_pdf(self.create_source(self.test_doc)))
+        with tempfile.TemporaryDirectory() as cache:
+            # cache pages of a page sample first
+            list(self.create_source(self.test_doc, layout_cache=cache, page_numbers=[0]).read())
+            for _ in range(2):
+                document = HierarchyParser().parse_pdf(self.create_source(self.test_doc, layout_cache=cache))
+                self.assertEqual(expected, PrettyStringPrinter().print(document))
+
+
+class TestMemorySources(TestCase):
+    straight_forward_doc = str(Path("resources/interview_cheatsheet.pdf").absolute())
+    parser = HierarchyParser()
+    expected = None
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.expected = PrettyStringPrinter().print(cls.parser.parse_pdf(FileSource(cls.straight_forward_doc)))
+
+    def assert_parsed(self, source, filename):
+        document = self.parser.parse_pdf(source)
+        self.assertEqual(self.expected, PrettyStringPrinter().print(document))
+        self.assertEqual(filename, document.metadata.get("filename"))
+
+    def test_buffer_reader(self):
+        reader = BufferReader(memoryview(b"0123456789"))
+        self.assertEqual(b"012", reader.read(3))
+        reader.seek(-2, io.SEEK_END)
+        self.assertEqual(8, reader.tell())
+        self.assertEqual(b"89", reader.read())
+        self.assertEqual(b"", reader.read(5))
+
+    def test_bytes_source(self):
+        with open(self.straight_forward_doc, "rb") as fp:
+            data = fp.read()
+        self.assert_parsed(BytesSource(data, filename="cheatsheet.pdf"), "cheatsheet.pdf")
+        self.assert_parsed(BytesSource(memoryview(data)), None)
+        self.assertEqual(list(range(6)), BytesSource(data).available_pages())
+
+    def test_stream_source(self):
+        with open(self.straight_forward_doc, "rb") as fp:
+            self.assert_parsed(StreamSource(fp), "interview_cheatsheet.pdf")
+        with open(self.straight_forward_doc, "rb") as fp:
+            self.assert_parsed(StreamSource(io.BytesIO(fp.read()), filename="upload.pdf"), "upload.pdf")
+
+    def test_mmap_source(self):
+        self.assert_parsed(MmapSource(self.straight_forward_doc), "interview_cheatsheet.pdf")
+        self.assert_parsed(MmapSource(self.straight_forward_doc, filename="a.pdf", reuse_layout=True), "a.pdf")
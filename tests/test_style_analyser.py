@@ -1,15 +1,23 @@
 import itertools
+import math
+import statistics
 from collections import Counter
 from pathlib import Path
 from unittest import TestCase
 
 import pandas as pd
 
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer, LTChar, LTTextBoxHorizontal
+
 from pdfstructure.analysis.annotate import StyleAnnotator
-from pdfstructure.analysis.sizemapper import PivotLogMapper, PivotLinearMapper
-from pdfstructure.analysis.styledistribution import count_sizes, StyleDistribution
+from pdfstructure.analysis.chartable import CharTable, page_batches
+from pdfstructure.analysis.sizemapper import PivotLogMapper, PivotLinearMapper, LinearSizeMapper, SizeMapper
+from pdfstructure.analysis.styledistribution import count_sizes, StyleDistribution, count_sizes_sampled, \
+    stratified_page_order
 from pdfstructure.model.style import TextSize
-from pdfstructure.utils import element_generator, find_file, DocTypeFilter
+from pdfstructure.source import FileSource
+from pdfstructure.utils import element_generator, find_file, DocTypeFilter, truncate
 
 
 class TestSizeMapper(TestCase):
@@ -57,6 +65,97 @@ class TestSizeMapper(TestCase):
         self.assertEqual(TextSize.xlarge, scaler.translate(TextSize, 90))
         self.assertEqual(TextSize.xlarge, scaler.translate(TextSize, 120))
 
+    def test_translate_many(self):
+        distribution = StyleDistribution(Counter((1, 5, 6, 10, 10, 10, 10, 20, 100)))
+        for scaler in (PivotLogMapper(distribution), PivotLinearMapper(distribution), LinearSizeMapper(distribution)):
+            values = [-10, 0, 1, 5.5, 7.99, 10, 12, 15, 20, 30, 60, 99.9, 100, 200]
+            if scaler.borders:
+                # exact borders and their neighbouring floats
+                values += [value for border in scaler.borders
+                           for value in (border, math.nextafter(border, -math.inf), math.nextafter(border, math.inf))]
+            self.assertListEqual([scaler.translate(TextSize, value) for value in values],
+                                 scaler.translate_many(TextSize, values))
+            self.assertListEqual([], scaler.translate_many(TextSize, []))
+
+        unsorted = PivotLinearMapper(distribution)
+        unsorted._borders = (5.5, 3.25, 55.0, 32.5)
+        values = [0, 3.25, 4, 5.5, 20, 32.5, 40, 55, 60, float("nan")]
+        self.assertListEqual([unsorted.translate(TextSize, value) for value in values],
+                             unsorted.translate_many(TextSize, values))
+
+    def test_translate_many_custom_mapper(self):
+        distribution = StyleDistribution(Counter((1, 5, 6, 10, 10, 10, 10, 20, 100)))
+        values = [1, 10, 100]
+
+        class XLargeMapper(PivotLogMapper):
+            def translate(self, target_enum, value):
+                return TextSize.xlarge
+
+        self.assertListEqual([TextSize.xlarge] * 3, XLargeMapper(distribution).translate_many(TextSize, values))
+
+        class ThresholdMapper(SizeMapper):
+            def translate(self, target_enum, value):
+                return TextSize.large if value > 10 else TextSize.middle
+
+        mapper = ThresholdMapper()
+        self.assertIsNone(mapper.borders)
+        self.assertListEqual([TextSize.middle, TextSize.middle, TextSize.large],
+                             mapper.translate_many(TextSize, values))
+
+        annotator = StyleAnnotator(sizemapper=XLargeMapper(distribution), style_info=distribution)
+        source = FileSource(str(Path("resources/interview_cheatsheet.pdf").absolute()), page_numbers=[0])
+        elements = list(annotator.process(source.read()))
+        self.assertTrue(elements)
+        self.assertTrue(all(element.style.mapped_font_size == TextSize.xlarge for element in elements))
+
+
+class TestPreScan(TestCase):
+
+    def test_pre_scan_distribution(self):
+        for name in ("interview_cheatsheet.pdf", "paper.pdf", "lorem.pdf"):
+            source = FileSource(str(Path("resources/", name).absolute()))
+            expected = count_sizes(source.read())
+            scanned = count_sizes(source.pre_scan())
+
+            self.assertEqual(expected.data, scanned.data)
+            self.assertEqual(expected.body_size, scanned.body_size)
+            self.assertEqual(expected.min_found_size, scanned.min_found_size)
+            self.assertEqual(expected.max_found_size, scanned.max_found_size)
+            self.assertAlmostEqual(expected.line_margin, scanned.line_margin, 3)
+
+
+class TestPageSampling(TestCase):
+
+    def test_stratified_page_order(self):
+        self.assertListEqual([0, 4, 2, 6, 1, 5, 3, 7], stratified_page_order(range(8)))
+        self.assertListEqual([10, 12, 11, 13, 14], stratified_page_order([10, 11, 12, 13, 14]))
+        self.assertListEqual([], stratified_page_order([]))
+
+    def test_sampling_converges(self):
+        source = FileSource(str(Path("resources/5648.pdf").absolute()))
+        expected = count_sizes(source.read())
+
+        distribution = count_sizes_sampled(lambda pages: source.read(override_page_numbers=pages),
+                                           source.available_pages(), batch_size=2, patience=2)
+        stats = distribution.sampling
+        self.assertTrue(stats["converged"])
+        self.assertEqual(9, stats["page_count"])
+        self.assertListEqual([0, 1, 2, 4, 5, 6], stats["pages"])
+        self.assertEqual(expected.body_size, distribution.body_size)
+        self.assertEqual(expected.max_found_size, distribution.max_found_size)
+        self.assertAlmostEqual(expected.line_margin, distribution.line_margin, 3)
+
+    def test_sampling_reads_all_pages_if_not_converged(self):
+        source = FileSource(str(Path("resources/interview_cheatsheet.pdf").absolute()))
+        distribution = count_sizes_sampled(lambda pages: source.read(override_page_numbers=pages),
+                                           source.available_pages())
+        stats = distribution.sampling
+        self.assertFalse(stats["converged"])
+        self.assertListEqual(list(range(6)), stats["pages"])
+        expected = count_sizes(source.read())
+        self.assertEqual(expected.data, distribution.data)
+        self.assertIsNone(expected.sampling)
+
 
 class TestFonts(TestCase):
     def test_fontnames(self):
@@ -80,4 +179,109 @@ class TestFonts(TestCase):
         boldmasked = ds.loc[ds.apply(lambda x: "bold" in x.lower())]
         italic = ds.loc[ds.apply(lambda x: "italic" in x.lower())]
         
-        # todo, define test scenario for sample files
\ No newline at end of file
+        # todo, define test scenario for sample files
+
+
+class TestCharTable(TestCase):
+    test_doc = str(Path("resources/paper.pdf").absolute())
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        source = FileSource(cls.test_doc, page_numbers=[0, 1])
+        with source.open_pdf() as pdf:
+            cls.containers = [element for page in extract_pages(pdf, laparams=source.la_params,
+                                                                page_numbers=source.page_numbers)
+                              for element in page if isinstance(element, LTTextContainer)]
+
+    def test_columns(self):
+        table = CharTable.from_containers(self.containers)
+        chars = [c for container in self.containers for line in container for c in line if isinstance(c, LTChar)]
+
+        self.assertEqual(len(chars), len(table))
+        self.assertListEqual([c.size for c in chars], table.size.tolist())
+        self.assertListEqual([c.x0 for c in chars], table.x0.tolist())
+        self.assertListEqual([c.fontname for c in chars], [table.fonts[f] for f in table.font])
+        self.assertEqual(sum(len(container) for container in self.containers), table.line_count)
+        self.assertEqual(len(self.containers), table.box_count)
+
+    def test_line_max_sizes(self):
+        table = CharTable.from_containers(self.containers)
+        max_sizes, counts = table.line_max_sizes(first_chars=10)
+        lines = [line for container in self.containers for line in container]
+        for line, max_size, count in zip(lines, max_sizes, counts):
+            sizes = [c.size for c in line if isinstance(c, LTChar)][:10]
+            self.assertEqual(max(sizes), max_size)
+            self.assertEqual(sizes.count(max(sizes)), count)
+
+        max_sizes, _ = table.line_max_sizes(first_positions=10)
+        for line, max_size in zip(lines, max_sizes):
+            self.assertEqual(max([c.size for c in itertools.islice(line, 10) if isinstance(c, LTChar)]), max_size)
+
+    def test_box_styles(self):
+        table = CharTable.from_containers(self.containers)
+        mean_sizes, max_sizes, fonts = table.box_styles()
+        for index, container in enumerate(self.containers):
+            chars = [c for line in container for c in line if isinstance(c, LTChar)]
+            expected_font = Counter(c.fontname for c in chars).most_common(1)[0][0]
+            sizes = [c.size for c in chars]
+            self.assertAlmostEqual(statistics.mean(sizes), mean_sizes[index], 9)
+            self.assertEqual(max(sizes), max_sizes[index])
+            self.assertEqual(expected_font, table.fonts[fonts[index]])
+
+
+    def test_box_styles_of_views(self):
+        source = FileSource(self.test_doc)
+        table = CharTable.from_containers(self.containers)
+        breaks = source.style_breaks(table)
+        boxes = []
+        for index, container in enumerate(self.containers):
+            container.page = 0
+            boxes.extend(source.split_boxes_by_style(container, table, breaks, table.box_lines[index]))
+
+        page_table, line_ranges = CharTable.of_boxes(boxes)
+        self.assertIs(table, page_table)
+        mean_sizes, max_sizes, fonts = table.box_styles(line_ranges)
+        for index, box in enumerate(boxes):
+            chars = [c for line in box for c in line if isinstance(c, LTChar)]
+            sizes = [c.size for c in chars]
+            self.assertEqual(truncate(statistics.mean(sizes), 1), truncate(mean_sizes[index], 1))
+            self.assertEqual(max(sizes), max_sizes[index])
+            self.assertEqual(Counter(c.fontname for c in chars).most_common(1)[0][0], table.fonts[fonts[index]])
+
+    def test_page_batches(self):
+        elements = list(element_generator(self.test_doc, page_numbers=[0, 1]))
+        batches = list(page_batches(elements))
+        self.assertListEqual([0, 1], [batch[0].meta["page"] for batch in batches])
+        self.assertListEqual(elements, [element for batch in batches for element in batch])
+
+        # unknown pages are batched, elements are consumed lazily
+        unknown = (LTTextBoxHorizontal() for _ in itertools.count())
+        self.assertListEqual([10, 10], [len(batch) for batch in itertools.islice(page_batches(unknown, 10), 2)])
+
+        # views on different page tables of equal content are not merged
+        source = FileSource(self.test_doc)
+        boxes = []
+        for _ in range(2):
+            with source.open_pdf() as pdf:
+                containers = [element for element in next(extract_pages(pdf, laparams=source.la_params))
+                              if isinstance(element, LTTextContainer)]
+            table = CharTable.from_containers(containers)
+            breaks = source.style_breaks(table)
+            for index, container in enumerate(containers):
+                container.page = None
+                boxes.extend(source.split_boxes_by_style(container, table, breaks, table.box_lines[index]))
+        self.assertEqual(2, len(list(page_batches(boxes, batch_size=1))))
+
+    def test_split_boxes_by_style(self):
+        source = FileSource(self.test_doc)
+        table = CharTable.from_containers(self.containers)
+        breaks = source.style_breaks(table)
+        for index, container in enumerate(self.containers):
+            container.page = 0
+            split = list(source.split_boxes_by_style(container))
+            split_on_page = list(source.split_boxes_by_style(container, table, breaks, table.box_lines[index]))
+
+            self.assertListEqual([box.get_text() for box in split], [box.get_text() for box in split_on_page])
+            self.assertEqual(container.get_text(), "".join(box.get_text() for box in split))
+            for box in split_on_page:
+                self.assertEqual(sum(1 for line in box for c in line if isinstance(c, LTChar)), len(box.char_table))
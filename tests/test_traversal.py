@@ -1,10 +1,12 @@
+import sys
 from pathlib import Path
 from unittest import TestCase
 
 from pdfstructure.hierarchy.parser import HierarchyParser
 from pdfstructure.hierarchy.traversal import traverse_in_order, traverse_level_order, get_document_depth, \
     traverse_inorder_sections_with_content
-from pdfstructure.model.document import DanglingTextSection
+from pdfstructure.model.document import DanglingTextSection, Section, StructuredPdfDocument
+from pdfstructure.query import select
 from pdfstructure.source import FileSource
 
 
@@ -80,3 +82,81 @@ class TestDocumentTraversal(TestCase):
     def test_retrieve_sections_with_content(self):
         elements = [element for element in traverse_inorder_sections_with_content(self.test_doc)]
         print(elements)
+
+    def test_preorder_index(self):
+        index = self.test_doc.preorder_index()
+        self.assertIs(index, self.test_doc.preorder_index())
+        in_order = list(traverse_in_order(self.test_doc))
+        self.assertListEqual(in_order, index.in_order())
+        self.assertListEqual(list(traverse_level_order(self.test_doc)), index.level_order())
+        for max_depth in (1, 2, 3):
+            self.assertListEqual(list(traverse_level_order(self.test_doc, max_depth=max_depth)),
+                                 index.level_order(max_depth=max_depth))
+        self.assertEqual(4, index.depth)
+
+        array = self.test_doc.elements[5].children[0]
+        subtree = index.subtree(array)
+        self.assertIs(array, subtree[0])
+        self.assertEqual("\n".join(s.heading_text for s in subtree if s.heading_text), array.full_content)
+        position = index.position(array)
+        self.assertEqual(index.position(self.test_doc.elements[5]), index.parents[position])
+        self.assertEqual(1, index.depths[position])
+
+    def test_preorder_index_invalidated_on_append(self):
+        document = StructuredPdfDocument(elements=[Section(self.test_doc.elements[5].heading)])
+        index = document.preorder_index()
+        self.assertEqual(1, len(index))
+
+        child = Section(self.test_doc.elements[5].children[0].heading, level=1)
+        document.elements[0].append_children(child)
+        self.assertEqual(2, len(document.preorder_index()))
+        self.assertEqual(2, get_document_depth(document))
+
+        document.elements.append(Section(self.test_doc.elements[6].heading))
+        self.assertListEqual(list(traverse_in_order(document)), document.preorder_index().in_order())
+
+        # nested appends invalidate the index, appends to sections of other documents keep it
+        index = document.preorder_index()
+        Section(None).append_children(Section(None))
+        other = StructuredPdfDocument(elements=[Section(None)])
+        other.elements[0].append_children(Section(None))
+        self.assertIs(index, document.preorder_index())
+        child.append_children(Section(self.test_doc.elements[5].children[1].heading, level=2))
+        self.assertIsNot(index, document.preorder_index())
+        self.assertEqual(4, len(document.preorder_index()))
+
+    def test_preorder_index_invalidated_on_replace(self):
+        first, second, replacement = (Section(self.test_doc.elements[index].heading) for index in (5, 6, 7))
+        document = StructuredPdfDocument(elements=[first, second])
+        self.assertListEqual([first, second], document.preorder_index().sections)
+
+        document.elements[1] = replacement
+        self.assertListEqual([first, replacement], document.preorder_index().sections)
+        self.assertListEqual([first, replacement], select(document, "level=0"))
+        del document.elements[0]
+        self.assertListEqual([replacement], document.preorder_index().sections)
+        document.elements = [second]
+        self.assertListEqual([second], document.preorder_index().sections)
+
+        # sections shared with another document are checked on their own
+        shared = StructuredPdfDocument(elements=[second, first])
+        index = shared.preorder_index()
+        self.assertIs(index, shared.preorder_index())
+        second.append_children(Section(self.test_doc.elements[5].children[0].heading, level=1))
+        self.assertEqual(3, len(shared.preorder_index()))
+        self.assertEqual(2, len(document.preorder_index()))
+
+    def test_deep_document(self):
+        heading = self.test_doc.elements[5].heading
+        root = section = Section(heading)
+        depth = sys.getrecursionlimit() * 2
+        for level in range(1, depth):
+            child = Section(heading, level=level)
+            section.append_children(child)
+            section = child
+        document = StructuredPdfDocument(elements=[root])
+
+        self.assertEqual(depth, sum(1 for _ in traverse_in_order(document)))
+        self.assertEqual(depth, get_document_depth(document))
+        self.assertEqual(depth, len(root.full_content.splitlines()))
+        self.assertEqual(depth, document.preorder_index().ends[0])